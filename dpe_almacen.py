@@ -0,0 +1,61 @@
+# Almacén de informes compartido por todas las sesiones del proceso.
+# Cada informe parseado vive una sola vez, indexado por el hash de su contenido;
+# las sesiones solo guardan ese hash en st.session_state. Así, una docena de
+# consultores con el mismo archivo abierto comparten un único grafo de objetos y
+# el presupuesto de bytes se cumple de verdad: al desalojar una entrada no queda
+# ninguna sesión reteniéndola (la sesión la vuelve a parsear si la necesita).
+# Los informes diferidos (dpe_carga.ReporteDiferido) se vuelven a medir cada vez
+# que decodifican una sección, así que el presupuesto cubre lo decodificado y no
+# solo los bytes crudos. Las figuras y fragmentos cacheados tienen sus propias cachés.
+import threading
+
+from dpe_cache import CacheLRU
+from dpe_carga import cargar_reporte
+
+
+class AlmacenReportes:
+    """Informes inmutables por hash de contenido (LRU con presupuesto) y las sesiones que los usan."""
+
+    def __init__(self, max_entradas=8, max_bytes=256 * 1024 * 1024):
+        self._cache = CacheLRU(max_entradas=max_entradas, max_bytes=max_bytes)
+        self._sesiones = {}  # id de sesión -> hash del informe que tiene abierto
+        self._lock = threading.Lock()
+
+    def cargar(self, datos, sesion=None):
+        """Parsea `datos` (o reutiliza el informe ya almacenado) y lo asocia a la sesión."""
+        reporte = cargar_reporte(datos, cache=self._cache)
+        if sesion is not None:
+            self.referenciar(reporte["hash"], sesion)
+        return reporte
+
+    def obtener(self, clave, sesion=None):
+        """Informe almacenado con ese hash, o None si nunca se cargó o se desalojó."""
+        reporte = self._cache.get(clave) if clave else None
+        if reporte is not None and sesion is not None:
+            self.referenciar(clave, sesion)
+        return reporte
+
+    def referenciar(self, clave, sesion):
+        with self._lock:
+            self._sesiones[sesion] = clave
+
+    def liberar(self, sesion):
+        with self._lock:
+            self._sesiones.pop(sesion, None)
+
+    def depurar_sesiones(self, sesion_activa):
+        """Olvida las sesiones cerradas (`sesion_activa(id)` devuelve False)."""
+        with self._lock:
+            for sesion in [s for s in self._sesiones if not sesion_activa(s)]:
+                del self._sesiones[sesion]
+
+    def estadisticas(self):
+        """Ocupación del almacén y, por informe, su tamaño y las sesiones que lo referencian."""
+        tamanos = self._cache.tamanos()
+        with self._lock:
+            sesiones = dict(self._sesiones)
+        informes = {clave: {"bytes": tamano, "sesiones": [], "en_memoria": True} for clave, tamano in tamanos.items()}
+        for sesion, clave in sesiones.items():
+            # Una sesión puede apuntar a un informe ya desalojado: lo recargará al volver a usarlo.
+            informes.setdefault(clave, {"bytes": 0, "sesiones": [], "en_memoria": False})["sesiones"].append(sesion)
+        return dict(self._cache.estadisticas(), sesiones=len(sesiones), informes=informes)
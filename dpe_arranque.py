@@ -0,0 +1,71 @@
+# Arranque en frío de la app.
+# La pantalla de bienvenida no necesita la pila de gráficos: dpe_secciones (y con
+# él pandas, Plotly y dpe_figuras) se importa al cargar el primer informe, con
+# importar_secciones(). Con DPE_PRECALENTAR_GRAFICOS=1, un hilo en segundo plano
+# lo importa al arrancar el proceso, lanza la precarga de la geometría de provincias
+# y construye figuras mínimas para que el primer informe no pague la carga de
+# validadores y plantillas de Plotly. Los tiempos de cada fase quedan en
+# tiempos_arranque.
+import importlib
+import os
+import threading
+import time
+
+PRECALENTAR_GRAFICOS = os.environ.get("DPE_PRECALENTAR_GRAFICOS", "0") == "1"
+
+tiempos_arranque = {}  # fase -> segundos (solo la primera vez que ocurre)
+_lock = threading.Lock()
+_hilo_calentamiento = None
+
+
+def _medir(fase, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    with _lock:
+        tiempos_arranque.setdefault(fase, time.perf_counter() - inicio)
+    return resultado
+
+
+def importar(modulo):
+    """importlib.import_module con la primera importación (la real) medida.
+
+    Si el hilo de calentamiento lo está importando, espera a que termine (el
+    import de Python lo serializa) en lugar de importarlo dos veces.
+    """
+    return _medir(f"import {modulo}", lambda: importlib.import_module(modulo))
+
+
+def importar_secciones():
+    return importar("dpe_secciones")
+
+
+def _calentar():
+    try:
+        for modulo in ("pandas", "plotly.express", "plotly.graph_objects", "dpe_modelo", "dpe_secciones"):
+            importar(modulo)
+        from dpe_figuras import calentar_plotly
+        _medir("validadores y plantillas de Plotly", calentar_plotly)
+        from dpe_geo import iniciar_precarga
+        iniciar_precarga()
+    except Exception as e:  # el calentamiento es una optimización: el primer informe lo hará si falla
+        with _lock:
+            tiempos_arranque["error"] = f"{type(e).__name__}: {e}"
+
+
+def iniciar_calentamiento():
+    """Lanza una vez por proceso el hilo que precalienta la pila de gráficos."""
+    global _hilo_calentamiento
+    with _lock:
+        if _hilo_calentamiento is not None:
+            return
+        _hilo_calentamiento = threading.Thread(target=_calentar, name="dpe-calentamiento-graficos", daemon=True)
+        _hilo_calentamiento.start()
+
+
+def resumen_arranque():
+    """Texto con la duración de cada fase medida hasta ahora."""
+    with _lock:
+        fases = dict(tiempos_arranque)
+    error = fases.pop("error", None)
+    texto = " · ".join(f"{fase} {segundos * 1000:,.0f} ms" for fase, segundos in fases.items())
+    return texto + (f" · error: {error}" if error else "")
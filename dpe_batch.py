@@ -0,0 +1,274 @@
+# Renderizado por lotes: carpeta de informes DPE (.json) -> informes HTML estáticos.
+# Reutiliza las mismas funciones render_* de la app (dpe_secciones.py) con un
+# destino HTML que imita la parte de la API de Streamlit que usan.
+#
+#   python dpe_batch.py informes/ salida_html/ --procesos 4
+import argparse
+import base64
+import concurrent.futures
+import datetime
+import glob
+import html
+import os
+import re
+import sys
+import time
+
+import dpe_geo
+import dpe_secciones
+from dpe_carga import cargar_reporte
+from dpe_marca import ruta_local
+from dpe_tema import (COLOR_AZUL_ECO, COLOR_VERDE_ECO, COLOR_GRIS_ECO, COLOR_TEXTO_CUERPO_CSS,
+                      COLOR_TEXTO_SUTIL_CSS)
+
+CSS_HTML = f"""
+body {{ font-family: sans-serif; color: {COLOR_TEXTO_CUERPO_CSS}; line-height: 1.6; max-width: 1200px; margin: 0 auto; padding: 1rem 2rem; }}
+h1 {{ color: {COLOR_AZUL_ECO}; border-bottom: 3px solid {COLOR_AZUL_ECO}; padding-bottom: 0.5rem; }}
+h2 {{ color: {COLOR_VERDE_ECO}; border-bottom: 2px solid {COLOR_VERDE_ECO}; padding-bottom: 0.3rem; margin-top: 2rem; }}
+h3, h4 {{ color: {COLOR_GRIS_ECO}; margin-top: 1.5rem; }}
+hr {{ border: 0; border-top: 1px solid #D5D8DC; margin: 0.5rem 0 1rem; }}
+nav a {{ margin-right: 1rem; color: {COLOR_AZUL_ECO}; }}
+section {{ page-break-before: always; }}
+.caption {{ color: {COLOR_TEXTO_SUTIL_CSS}; font-size: 0.9em; }}
+.aviso {{ padding: 0.75rem 1rem; border-radius: 6px; margin: 0.5rem 0; }}
+.info {{ background: #E8F1FB; }} .warning {{ background: #FFF6DD; }} .error {{ background: #FDECEA; }} .success {{ background: #E9F5E1; }}
+.fila {{ display: flex; gap: 1rem; }} .columna {{ flex: 1; min-width: 0; }}
+details {{ border: 1px solid #D5D8DC; border-radius: 6px; padding: 0.5rem 1rem; margin: 0.5rem 0; }}
+summary {{ font-weight: 600; cursor: pointer; }}
+table {{ border-collapse: collapse; }} td, th {{ border: 1px solid #D5D8DC; padding: 0.25rem 0.5rem; }}
+"""
+
+
+def _markdown_a_html(texto, permitir_html=False):
+    """Conversión mínima del Markdown que emiten las secciones (negritas, cursivas, títulos, separadores)."""
+    texto = str(texto)
+    if not permitir_html:
+        texto = html.escape(texto, quote=False)
+    bloques = []
+    # Un bloque por párrafo (UIAgrupada junta varias llamadas separadas por línea en blanco).
+    for linea in texto.split("\n\n"):
+        linea_limpia = linea.strip()
+        if permitir_html and linea_limpia.startswith("<"):
+            bloques.append(linea)
+            continue
+        if linea_limpia == "---":
+            bloques.append("<hr>")
+            continue
+        encabezado = re.match(r"^(#{1,6})\s+(.*)$", linea_limpia)
+        linea = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", linea)
+        linea = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])", r"<em>\1</em>", linea)
+        linea = re.sub(r"(?<![\w_])_(?!\s)(.+?)(?<!\s)_(?![\w_])", r"<em>\1</em>", linea)
+        if encabezado:
+            nivel = len(encabezado.group(1))
+            contenido = re.sub(r"^#{1,6}\s+", "", linea.strip())
+            bloques.append(f"<h{nivel}>{contenido}</h{nivel}>")
+        else:
+            bloques.append(f"<p>{linea.replace(chr(10), '<br>')}</p>")
+    return "".join(bloques)
+
+
+class _EstadoSesion(dict):
+    # Sustituto de st.session_state: acceso por clave y por atributo.
+    def __getattr__(self, nombre):
+        try:
+            return self[nombre]
+        except KeyError as e:
+            raise AttributeError(nombre) from e
+
+
+class _Bloque:
+    def __init__(self, destino, apertura="", cierre=""):
+        self.destino = destino
+        self.apertura = apertura
+        self.cierre = cierre
+        self.partes = []
+
+    def __enter__(self):
+        self.destino._pila.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.destino._pila.pop()
+        return False
+
+    def html(self):
+        return self.apertura + "".join(p if isinstance(p, str) else p.html() for p in self.partes) + self.cierre
+
+
+class DestinoHTML:
+    """Implementa el subconjunto de `st` que usan las funciones render_* y acumula HTML."""
+
+    def __init__(self, json_data, nombre_cliente):
+        self.session_state = _EstadoSesion(metadatos_informe=json_data.get("metadatos_informe", {}),
+                                           nombre_cliente=nombre_cliente)
+        self._raiz = _Bloque(self)
+        self._pila = [self._raiz]
+        self.figuras = 0
+
+    def _agregar(self, parte):
+        self._pila[-1].partes.append(parte)
+        return parte
+
+    def html(self):
+        return self._raiz.html()
+
+    # --- Texto ---
+    def header(self, texto):
+        self._agregar(f"<h2>{html.escape(str(texto))}</h2>")
+
+    def subheader(self, texto):
+        self._agregar(f"<h3>{html.escape(str(texto))}</h3>")
+
+    def markdown(self, texto, unsafe_allow_html=False):
+        self._agregar(_markdown_a_html(texto, permitir_html=unsafe_allow_html))
+
+    def write(self, contenido):
+        if isinstance(contenido, str):
+            self.markdown(contenido)
+        else:
+            self._agregar(f"<pre>{html.escape(repr(contenido))}</pre>")
+
+    def caption(self, texto):
+        self._agregar(f"<div class='caption'>{_markdown_a_html(texto)}</div>")
+
+    def _aviso(self, tipo, texto):
+        self._agregar(f"<div class='aviso {tipo}'>{_markdown_a_html(texto)}</div>")
+
+    def info(self, texto):
+        self._aviso("info", texto)
+
+    def warning(self, texto):
+        self._aviso("warning", texto)
+
+    def error(self, texto):
+        self._aviso("error", texto)
+
+    def success(self, texto):
+        self._aviso("success", texto)
+
+    # --- Contenido enriquecido ---
+    def plotly_chart(self, fig, use_container_width=True, **kwargs):
+        self.figuras += 1
+        self._agregar(fig.to_html(full_html=False, include_plotlyjs=False,
+                                  default_width="100%" if use_container_width else None,
+                                  config={"responsive": True}))
+
+    def image(self, ruta, width=None):
+        with open(ruta_local(ruta), "rb") as f:
+            datos = base64.b64encode(f.read()).decode()
+        ancho = f" width='{int(width)}'" if width else ""
+        self._agregar(f"<div style='text-align:center;'><img src='data:image/png;base64,{datos}'{ancho}></div>")
+
+    def dataframe(self, df, use_container_width=True, **kwargs):
+        self._agregar(df.to_html(index=False, border=0))
+
+    # --- Contenedores ---
+    def container(self):
+        return self._agregar(_Bloque(self))
+
+    def expander(self, etiqueta, expanded=False):
+        abierto = " open" if expanded else ""
+        return self._agregar(_Bloque(self, f"<details{abierto}><summary>{html.escape(str(etiqueta))}</summary>", "</details>"))
+
+    def columns(self, n):
+        fila = self._agregar(_Bloque(self, "<div class='fila'>", "</div>"))
+        columnas = [_Bloque(self, "<div class='columna'>", "</div>") for _ in range(n)]
+        fila.partes.extend(columnas)
+        return columnas
+
+
+def renderizar_reporte_html(json_data, nombre_cliente, modelo=None):
+    """Documento HTML autónomo con todas las secciones; plotly.js se incluye una sola vez."""
+    destino = DestinoHTML(json_data, nombre_cliente)
+    metadatos = json_data.get("metadatos_informe", {})
+    navegacion = []
+    for titulo, clave in dpe_secciones.tab_titles_map.items():
+        navegacion.append(f"<a href='#{clave}'>{html.escape(titulo)}</a>")
+        with destino._agregar(_Bloque(destino, f"<section id='{clave}'>", "</section>")):
+            dpe_secciones.render_seccion(titulo, json_data, destino, modelo=modelo)
+
+    script_plotly = ""
+    if destino.figuras:
+        from plotly.offline import get_plotlyjs
+        script_plotly = f"<script type='text/javascript'>{get_plotlyjs()}</script>"
+    titulo_doc = f"{metadatos.get('titulo_informe_base', 'Informe DPE')} para {nombre_cliente}"
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>{html.escape(titulo_doc)}</title>
+<style>{CSS_HTML}</style>{script_plotly}</head>
+<body>
+<h1>{html.escape(titulo_doc)}</h1>
+<p class='caption'>Versión DPE: {html.escape(str(metadatos.get('version_dpe', 'N/A')))} | Fecha Diagnóstico: {html.escape(str(metadatos.get('fecha_diagnostico', 'N/A')))}</p>
+<nav>{''.join(navegacion)}</nav>
+{destino.html()}
+<hr><p class='caption' style='text-align:center;'>© {datetime.date.today().year} ECO Consultores. Todos los derechos reservados.</p>
+</body></html>
+"""
+
+
+def _inicializar_proceso(modo_mapa):
+    dpe_secciones.MAPA_MODO = modo_mapa
+    dpe_geo.esperar_geometria(timeout=dpe_geo.GEOJSON_DESCARGA_TIMEOUT_S * 2)
+
+
+def procesar_archivo(ruta_entrada, dir_salida):
+    resultado = {"archivo": os.path.basename(ruta_entrada), "error": None}
+    t0 = time.perf_counter()
+    try:
+        with open(ruta_entrada, "rb") as f:
+            datos = f.read()
+        reporte = cargar_reporte(datos)
+        t1 = time.perf_counter()
+        documento = renderizar_reporte_html(reporte["json_data"], reporte["nombre_cliente"], reporte["modelo"]).encode("utf-8")
+        t2 = time.perf_counter()
+        ruta_salida = os.path.join(dir_salida, os.path.splitext(resultado["archivo"])[0] + ".html")
+        with open(ruta_salida, "wb") as f:
+            f.write(documento)
+        t3 = time.perf_counter()
+        resultado.update(bytes_entrada=len(datos), bytes_salida=len(documento),
+                         t_parseo=t1 - t0, t_render=t2 - t1, t_escritura=t3 - t2, t_total=t3 - t0)
+    except Exception as e:
+        resultado.update(error=f"{type(e).__name__}: {e}", bytes_entrada=0, bytes_salida=0, t_total=time.perf_counter() - t0)
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renderiza una carpeta de informes DPE (.json) a HTML estático.")
+    parser.add_argument("entrada", help="Carpeta con los archivos JSON del motor DPE")
+    parser.add_argument("salida", help="Carpeta donde se escriben los HTML")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo (defecto: núm. de CPU)")
+    parser.add_argument("--mapa", choices=["offline", "teselas"], default="offline",
+                        help="Modo del mapa coroplético; 'offline' deja el HTML totalmente autónomo")
+    args = parser.parse_args(argv)
+
+    archivos = sorted(glob.glob(os.path.join(args.entrada, "*.json")))
+    if not archivos:
+        print(f"No hay archivos .json en '{args.entrada}'.", file=sys.stderr)
+        return 1
+    os.makedirs(args.salida, exist_ok=True)
+
+    inicio = time.perf_counter()
+    resultados = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, args.procesos), initializer=_inicializar_proceso,
+                                                initargs=(args.mapa,)) as pool:
+        futuros = [pool.submit(procesar_archivo, ruta, args.salida) for ruta in archivos]
+        for futuro in concurrent.futures.as_completed(futuros):
+            r = futuro.result()
+            resultados.append(r)
+            if r["error"]:
+                print(f"ERROR {r['archivo']}: {r['error']}")
+            else:
+                print(f"{r['archivo']}: parseo {r['t_parseo']:.3f}s | render {r['t_render']:.3f}s | "
+                      f"escritura {r['t_escritura']:.3f}s | total {r['t_total']:.3f}s | "
+                      f"{r['bytes_entrada'] / 1024:,.0f} KB -> {r['bytes_salida'] / 1024:,.0f} KB")
+    duracion = time.perf_counter() - inicio
+
+    correctos = [r for r in resultados if not r["error"]]
+    mb_entrada = sum(r["bytes_entrada"] for r in correctos) / (1024 * 1024)
+    print(f"\n{len(correctos)}/{len(resultados)} informes en {duracion:.2f}s "
+          f"({len(correctos) / duracion:.2f} informes/s, {mb_entrada / duracion:.2f} MB/s de JSON) "
+          f"con {args.procesos} proceso(s).")
+    return 0 if len(correctos) == len(resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
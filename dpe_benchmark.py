@@ -0,0 +1,241 @@
+# Benchmark de renderizado por sección con informes sintéticos (dpe_sintetico).
+# Cada sección se ejecuta sin navegador con AppTest de Streamlit, llamando a la
+# misma render_seccion que usa app.py, y se mide:
+#   - frío: primera ejecución, con las cachés de figuras y fragmentos vacías;
+#   - caliente: mediana de las repeticiones siguientes (cachés llenas);
+#   - pico de memoria de Python durante el render en frío (tracemalloc);
+#   - elementos, figuras y bytes de los mensajes que se enviarían al navegador.
+# Los resultados se añaden a un JSONL y se comparan con la última ejecución
+# guardada de cada perfil y sección para detectar regresiones entre versiones.
+# Además se comprueba que el markdown agrupado (dpe_ui.UIAgrupada) sea el mismo
+# texto que emitiría una llamada a st.markdown por pieza.
+#
+#   python dpe_benchmark.py --perfiles pequeno grande --repeticiones 5
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Block
+
+PERFILES = {
+    "pequeno": {"escala": 1, "filas_bccr": 365},
+    "mediano": {"escala": 4, "filas_bccr": 3650},
+    "grande": {"escala": 15, "filas_bccr": 36500, "competidores": 60, "tipos_obra": 15},
+}
+RESULTADOS_POR_DEFECTO = os.path.join("benchmarks", "resultados.jsonl")
+# Diferencias absolutas por debajo de estas no se consideran regresión (ruido de las secciones de texto).
+_DIFERENCIA_MINIMA = {"caliente_ms": 2.0, "pico_mb": 0.1, "payload_kb": 1.0}
+
+_reportes = {}  # ruta -> informe cargado (AppTest ejecuta el script en este mismo proceso)
+
+
+def reporte_benchmark(ruta, nuevo=False):
+    from dpe_carga import cargar_reporte
+
+    if nuevo or ruta not in _reportes:
+        with open(ruta, "rb") as f:
+            _reportes[ruta] = cargar_reporte(f.read())
+    return _reportes[ruta]
+
+
+def _script_seccion(ruta, titulo, frio, medir_memoria):
+    # Se ejecuta dentro de AppTest: solo puede usar lo que importa.
+    import tracemalloc
+
+    import streamlit as st
+    from dpe_benchmark import reporte_benchmark
+    from dpe_figuras import limpiar_caches_figuras
+    from dpe_secciones import render_seccion
+    from dpe_ui import fragmentos_cache
+
+    if frio:
+        limpiar_caches_figuras()
+        fragmentos_cache.clear()
+    reporte = reporte_benchmark(ruta, nuevo=frio)
+    st.session_state.nombre_cliente = reporte["nombre_cliente"]
+    st.session_state.metadatos_informe = reporte["json_data"].get("metadatos_informe", {})
+    if medir_memoria:
+        tracemalloc.start()
+    metricas = render_seccion(titulo, reporte["json_data"], modelo=reporte["modelo"])
+    if medir_memoria:
+        metricas["pico_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    st.session_state.metricas_benchmark = metricas
+
+
+def _script_agrupacion(ruta, titulo, agrupar):
+    import streamlit as st
+    from dpe_benchmark import reporte_benchmark
+    from dpe_secciones import render_functions_map, tab_titles_map
+    from dpe_ui import UIAgrupada
+
+    reporte = reporte_benchmark(ruta)
+    st.session_state.nombre_cliente = reporte["nombre_cliente"]
+    st.session_state.metadatos_informe = reporte["json_data"].get("metadatos_informe", {})
+    clave = tab_titles_map[titulo]
+    # La función render_* directamente (sin fragmentos precompilados): se compara solo la agrupación.
+    ui = UIAgrupada(st, agrupar=agrupar)
+    render_functions_map[clave](reporte["json_data"].get(clave, {}), ui, reporte["modelo"].seccion(clave))
+    ui.vaciar()
+
+
+def comprobar_agrupacion(ruta, titulo):
+    """None si el markdown agrupado equivale al de una llamada por pieza; si no, la primera diferencia."""
+    textos = []
+    for agrupar in (False, True):
+        at = AppTest.from_function(_script_agrupacion, args=(ruta, titulo, agrupar), default_timeout=300)
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{titulo}: {at.exception[0].value}")
+        # Las piezas vacías y las líneas en blanco repetidas no cambian el markdown resultante.
+        textos.append(re.sub(r"\n{3,}", "\n\n", "\n\n".join(m.value for m in at.markdown if m.value)))
+    por_llamada, agrupado = textos
+    if por_llamada == agrupado:
+        return None
+    i = next((i for i, (a, b) in enumerate(zip(por_llamada, agrupado)) if a != b), min(len(por_llamada), len(agrupado)))
+    return f"byte {i}: {por_llamada[max(0, i - 20):i + 40]!r} != {agrupado[max(0, i - 20):i + 40]!r}"
+
+
+def _nodos(nodo):
+    yield nodo
+    for hijo in getattr(nodo, "children", {}).values():
+        yield from _nodos(hijo)
+
+
+def _carga_util(at):
+    """(elementos, figuras, bytes) de los mensajes que el script envió al navegador."""
+    elementos = figuras = tamano = 0
+    for nodo in _nodos(at._tree):
+        proto = getattr(nodo, "proto", None)
+        if proto is not None:
+            tamano += proto.ByteSize()
+        if not isinstance(nodo, Block):
+            elementos += 1
+            figuras += nodo.type == "plotly_chart"
+    return elementos, figuras, tamano
+
+
+def _ejecutar(ruta, titulo, frio=False, medir_memoria=False):
+    at = AppTest.from_function(_script_seccion, args=(ruta, titulo, frio, medir_memoria), default_timeout=300)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{titulo}: {at.exception[0].value}")
+    return at, at.session_state.metricas_benchmark
+
+
+def medir_seccion(ruta, titulo, repeticiones):
+    at, frio = _ejecutar(ruta, titulo, frio=True)
+    _, memoria = _ejecutar(ruta, titulo, frio=True, medir_memoria=True)
+    calientes = [_ejecutar(ruta, titulo)[1]["segundos"] for _ in range(max(1, repeticiones))]
+    elementos, figuras, tamano = _carga_util(at)
+    return {
+        "frio_ms": round(frio["segundos"] * 1000, 2),
+        "caliente_ms": round(statistics.median(calientes) * 1000, 2),
+        "pico_mb": round(memoria["pico_bytes"] / 1024 / 1024, 3),
+        "payload_kb": round(tamano / 1024, 1),
+        "elementos": elementos,
+        "figuras": figuras,
+        "mensajes": frio["mensajes"],
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ultimos_resultados(ruta):
+    """{(perfil, sección): último registro guardado}."""
+    ultimos = {}
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    registro = json.loads(linea)
+                    ultimos[(registro["perfil"], registro["seccion"])] = registro
+    return ultimos
+
+
+def _variacion(actual, anterior):
+    if not anterior:
+        return ""
+    return f"{(actual - anterior) / anterior * 100:+.0f}%"
+
+
+def main():
+    from dpe_json import BACKEND_ACTIVO
+    from dpe_secciones import tab_titles_map
+    from dpe_sintetico import generar_informe
+
+    parser = argparse.ArgumentParser(description="Benchmark de renderizado por sección con informes sintéticos.")
+    parser.add_argument("--perfiles", nargs="+", choices=list(PERFILES), default=list(PERFILES))
+    parser.add_argument("--secciones", nargs="+", choices=list(tab_titles_map), default=list(tab_titles_map),
+                        metavar="SECCION", help="Títulos de pestaña a medir (por defecto todas).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones en caliente por sección (se toma la mediana).")
+    parser.add_argument("--resultados", default=RESULTADOS_POR_DEFECTO, help="JSONL donde se acumulan los resultados.")
+    parser.add_argument("--sin-guardar", action="store_true", help="Solo compara; no añade los resultados al JSONL.")
+    parser.add_argument("--umbral", type=float, default=0.25,
+                        help="Variación relativa (caliente, pico o payload) a partir de la cual se marca una regresión.")
+    parser.add_argument("--estricto", action="store_true", help="Devuelve código 1 si hay alguna regresión.")
+    args = parser.parse_args()
+
+    anteriores = _ultimos_resultados(args.resultados)
+    comun = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "streamlit": __import__("streamlit").__version__,
+        "json_backend": BACKEND_ACTIVO,
+    }
+    registros, regresiones = [], []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for perfil in args.perfiles:
+            ruta = os.path.join(carpeta, f"{perfil}.json")
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(generar_informe(**PERFILES[perfil]), f, ensure_ascii=False)
+            print(f"\nPerfil '{perfil}' ({os.path.getsize(ruta) / 1024:,.0f} KB) {PERFILES[perfil]}")
+            print(f"{'sección':<26}{'frío ms':>9}{'cal. ms':>9}{'Δ':>6}{'pico MB':>9}{'Δ':>6}"
+                  f"{'payload KB':>12}{'Δ':>6}{'elem.':>7}{'fig.':>6}")
+            for titulo in args.secciones:
+                medidas = medir_seccion(ruta, titulo, args.repeticiones)
+                anterior = anteriores.get((perfil, titulo), {})
+                variaciones = [_variacion(medidas[c], anterior.get(c)) for c in ("caliente_ms", "pico_mb", "payload_kb")]
+                print(f"{titulo:<26}{medidas['frio_ms']:>9.1f}{medidas['caliente_ms']:>9.1f}{variaciones[0]:>6}"
+                      f"{medidas['pico_mb']:>9.2f}{variaciones[1]:>6}{medidas['payload_kb']:>12.1f}{variaciones[2]:>6}"
+                      f"{medidas['elementos']:>7}{medidas['figuras']:>6}")
+                for campo, minima in _DIFERENCIA_MINIMA.items():
+                    if (anterior.get(campo) and medidas[campo] > anterior[campo] * (1 + args.umbral)
+                            and medidas[campo] - anterior[campo] >= minima):
+                        regresiones.append(f"{perfil}/{titulo}: {campo} {anterior[campo]} -> {medidas[campo]} "
+                                           f"(commit anterior {anterior.get('commit')})")
+                diferencia = comprobar_agrupacion(ruta, titulo)
+                if diferencia:
+                    regresiones.append(f"{perfil}/{titulo}: el markdown agrupado difiere del emitido por llamada ({diferencia})")
+                registros.append(dict(comun, perfil=perfil, parametros=PERFILES[perfil], seccion=titulo, **medidas))
+
+    if not args.sin_guardar:
+        os.makedirs(os.path.dirname(args.resultados) or ".", exist_ok=True)
+        with open(args.resultados, "a", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"\n{len(registros)} resultados añadidos a {args.resultados}")
+    if regresiones:
+        print(f"\nPosibles regresiones (> {args.umbral:.0%}):")
+        for regresion in regresiones:
+            print(f"  - {regresion}")
+    return 1 if regresiones and args.estricto else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# Caché LRU acotada por número de entradas y por presupuesto de bytes.
+# Vive en un módulo aparte porque Streamlit re-ejecuta app.py en cada rerun:
+# cualquier objeto creado ahí se perdería, mientras que los módulos importados
+# permanecen en memoria durante toda la vida del proceso.
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+
+def hash_contenido(datos):
+    """Hash SHA-256 (hex) de un bloque de bytes; sirve como clave de caché."""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def estimar_tamano_objeto(obj):
+    """Tamaño aproximado en bytes de un grafo JSON (dict/list/str/num)."""
+    total = 0
+    pendientes = [obj]
+    vistos = set()
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos:
+            continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, (list, tuple)):
+            pendientes.extend(actual)
+    return total
+
+
+class CacheLRU:
+    """Caché LRU thread-safe con límite de entradas y de bytes.
+
+    Cada entrada guarda su tamaño estimado; al superar cualquiera de los dos
+    límites se desalojan las entradas menos usadas recientemente.
+    """
+
+    def __init__(self, max_entradas=8, max_bytes=256 * 1024 * 1024):
+        self.max_entradas = max(1, int(max_entradas))
+        self.max_bytes = max(0, int(max_bytes))
+        self._entradas = OrderedDict()  # clave -> (valor, tamano)
+        self._bytes_actuales = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.desalojos = 0
+
+    def __contains__(self, clave):
+        with self._lock:
+            return clave in self._entradas
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entradas)
+
+    def get(self, clave, default=None):
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.hits += 1
+                return self._entradas[clave][0]
+            self.misses += 1
+            return default
+
+    def put(self, clave, valor, tamano=None):
+        if tamano is None:
+            tamano = estimar_tamano_objeto(valor)
+        with self._lock:
+            if clave in self._entradas:
+                self._bytes_actuales -= self._entradas.pop(clave)[1]
+            # Un objeto mayor que todo el presupuesto no se guarda (no desaloja al resto).
+            if self.max_bytes and tamano > self.max_bytes:
+                return valor
+            self._entradas[clave] = (valor, tamano)
+            self._bytes_actuales += tamano
+            self._desalojar()
+        return valor
+
+    def get_or_compute(self, clave, calcular, medir=None):
+        """Devuelve la entrada cacheada o la calcula con `calcular()` y la guarda."""
+        centinela = object()
+        valor = self.get(clave, centinela)
+        if valor is not centinela:
+            return valor
+        valor = calcular()
+        return self.put(clave, valor, medir(valor) if medir else None)
+
+    def remedir(self, clave, valor, tamano):
+        """Actualiza el tamaño de una entrada que creció tras guardarse y desaloja si hace falta.
+
+        Solo si `clave` sigue guardando ese mismo `valor` (no una copia recargada).
+        La propia entrada también puede desalojarse si ya no cabe en el presupuesto.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] is not valor:
+                return
+            self._bytes_actuales += tamano - entrada[1]
+            self._entradas[clave] = (valor, tamano)
+            self._entradas.move_to_end(clave)  # crece porque se está usando
+            if self.max_bytes and tamano > self.max_bytes:
+                self._bytes_actuales -= self._entradas.pop(clave)[1]
+                self.desalojos += 1
+            self._desalojar()
+
+    def pop(self, clave, default=None):
+        with self._lock:
+            if clave not in self._entradas:
+                return default
+            valor, tamano = self._entradas.pop(clave)
+            self._bytes_actuales -= tamano
+            return valor
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes_actuales = 0
+
+    def tamanos(self):
+        """{clave: bytes estimados} de las entradas actuales, de la menos a la más usada."""
+        with self._lock:
+            return {clave: tamano for clave, (_, tamano) in self._entradas.items()}
+
+    def _desalojar(self):
+        while self._entradas and (
+            len(self._entradas) > self.max_entradas
+            or (self.max_bytes and self._bytes_actuales > self.max_bytes)
+        ):
+            _, (_, tamano) = self._entradas.popitem(last=False)
+            self._bytes_actuales -= tamano
+            self.desalojos += 1
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "bytes": self._bytes_actuales,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "desalojos": self.desalojos,
+            }
@@ -0,0 +1,313 @@
+# Carga y parseo de los informes JSON generados por el motor DPE.
+# Todo lo que hay aquí es independiente de Streamlit para poder reutilizarlo
+# desde la app y desde herramientas de línea de comandos.
+import gzip
+import lzma
+import os
+import threading
+import zipfile
+import zlib
+from collections.abc import Mapping
+from functools import lru_cache
+
+from dpe_cache import hash_contenido, estimar_tamano_objeto
+from dpe_arranque import importar
+from dpe_json import cargar_json
+
+NOMBRE_CLIENTE_SIN_NOMBRE = "Cliente (Nombre no en JSON)"
+NOMBRE_CLIENTE_SIN_METADATOS = "Cliente (Metadatos no en JSON)"
+
+# A partir de este tamaño el informe no se decodifica entero: se indexan los
+# rangos de bytes de cada sección de primer nivel y cada una se decodifica la
+# primera vez que se pide. 0 desactiva la carga diferida.
+CARGA_DIFERIDA_MIN_MB = float(os.environ.get("DPE_CARGA_DIFERIDA_MIN_MB", "2"))
+
+_BOM_UTF8 = b"\xef\xbb\xbf"
+_ESPACIOS = b" \t\r\n"
+
+# Subidas comprimidas: se descomprimen por bloques y se cortan al superar este
+# tamaño descomprimido (protección contra bombas de descompresión).
+DESCOMPRESION_MAX_MB = float(os.environ.get("DPE_DESCOMPRESION_MAX_MB", "512"))
+EXTENSIONES_SUBIDA = ["json", "gz", "xz", "zip"]
+_BLOQUE_DESCOMPRESION = 1024 * 1024
+
+
+def decodificar_json_dpe(datos):
+    """Decodifica los bytes de un informe (UTF-8, con o sin BOM) a un objeto Python."""
+    return cargar_json(datos)
+
+
+def extraer_nombre_cliente(json_data):
+    if json_data and "metadatos_informe" in json_data:
+        nombre_cliente_json = json_data["metadatos_informe"].get("cliente_nombre")
+        return nombre_cliente_json if nombre_cliente_json else NOMBRE_CLIENTE_SIN_NOMBRE
+    return NOMBRE_CLIENTE_SIN_METADATOS
+
+
+@lru_cache(maxsize=None)
+def _tablas_delimitadores():
+    import numpy as np
+
+    es_delimitador = np.zeros(256, dtype=bool)
+    es_delimitador[list(b"{}[]:,")] = True
+    variacion_profundidad = np.zeros(256, dtype=np.int8)
+    variacion_profundidad[list(b"{[")] = 1
+    variacion_profundidad[list(b"}]")] = -1
+    return es_delimitador, variacion_profundidad
+
+
+def indexar_secciones(datos):
+    """Recorre el documento una vez y devuelve {clave: (inicio, fin)} de cada valor de primer nivel.
+
+    El recorrido es vectorial (numpy): la paridad de las comillas no escapadas
+    indica qué delimitadores quedan fuera de cadenas y una suma acumulada da la
+    profundidad de cada uno. Aquí se comprueba que entre cada separador y su ':'
+    solo haya una clave (espacios, cadena, espacios); la validez de cada valor se
+    comprueba al decodificarlo. Lanza ValueError si el documento no es un objeto
+    JSON bien delimitado.
+    """
+    inicio_doc = len(_BOM_UTF8) if datos.startswith(_BOM_UTF8) else 0
+    if not datos[inicio_doc:].lstrip(_ESPACIOS).startswith(b"{"):
+        raise ValueError("El documento no es un objeto JSON.")
+    import numpy as np  # solo al indexar un informe grande: la pantalla de bienvenida no lo necesita
+
+    es_delimitador, variacion_profundidad = _tablas_delimitadores()
+    bytes_doc = np.frombuffer(datos, dtype=np.uint8)
+
+    es_comilla = bytes_doc == 0x22
+    es_comilla[:inicio_doc] = False
+    # Una comilla precedida por un número impar de '\\' está escapada (caso raro: bucle en Python).
+    tras_barra = np.flatnonzero(es_comilla[1:] & (bytes_doc[:-1] == 0x5C)) + 1
+    for pos in tras_barra.tolist():
+        barras = 0
+        while pos - barras - 1 >= 0 and datos[pos - barras - 1] == 0x5C:
+            barras += 1
+        if barras % 2:
+            es_comilla[pos] = False
+    comillas = np.flatnonzero(es_comilla)
+    if len(comillas) % 2:
+        raise ValueError("Cadena JSON sin cerrar.")
+
+    # Un byte está fuera de cadena si el número de comillas anteriores es par
+    # (la suma en uint8 desborda, pero conserva la paridad).
+    fuera_de_cadena = (np.cumsum(es_comilla, dtype=np.uint8) & 1) == 0
+    del es_comilla
+    fuera_de_cadena &= es_delimitador[bytes_doc]
+    delimitadores = np.flatnonzero(fuera_de_cadena)
+    del fuera_de_cadena
+    simbolos = bytes_doc[delimitadores]
+    profundidad = np.cumsum(variacion_profundidad[simbolos], dtype=np.int32)
+
+    cierres = np.flatnonzero(profundidad <= 0)
+    if not len(cierres) or profundidad[cierres[0]] < 0:
+        raise ValueError("Documento JSON incompleto o mal anidado.")
+    cierre_doc = int(delimitadores[cierres[0]])
+    if datos[cierre_doc] != 0x7D:
+        raise ValueError(f"Cierre inesperado en el byte {cierre_doc}.")
+    if datos[cierre_doc + 1:].strip(_ESPACIOS):
+        raise ValueError(f"Datos extra tras el objeto JSON (byte {cierre_doc + 1}).")
+
+    # Separadores ':' y ',' del objeto raíz (profundidad 1), hasta su cierre.
+    en_raiz = (profundidad == 1) & (delimitadores < cierre_doc)
+    dos_puntos = delimitadores[en_raiz & (simbolos == 0x3A)].tolist()
+    comas = delimitadores[en_raiz & (simbolos == 0x2C)].tolist() + [cierre_doc]
+    if dos_puntos and len(comas) != len(dos_puntos):
+        raise ValueError("Separadores del objeto raíz inconsistentes.")
+
+    apertura_doc = int(delimitadores[0])
+    if not dos_puntos and datos[apertura_doc + 1:cierre_doc].strip(_ESPACIOS):
+        raise ValueError(f"Contenido sin clave en el objeto raíz (byte {apertura_doc + 1}).")
+    indice = {}
+    inicio_clave = apertura_doc + 1
+    for pos_dos_puntos, fin in zip(dos_puntos, comas):
+        # La clave es la última cadena antes de ':' y no puede haber nada más entre el separador y ':'.
+        i = int(np.searchsorted(comillas, pos_dos_puntos)) - 2
+        if i < 0 or comillas[i] < inicio_clave:
+            raise ValueError(f"Clave ausente antes del byte {pos_dos_puntos}.")
+        if datos[inicio_clave:comillas[i]].strip(_ESPACIOS) or datos[comillas[i + 1] + 1:pos_dos_puntos].strip(_ESPACIOS):
+            raise ValueError(f"Clave mal formada antes del byte {pos_dos_puntos}.")
+        clave = cargar_json(datos[comillas[i]:comillas[i + 1] + 1])
+        indice[clave] = (pos_dos_puntos + 1, fin)
+        inicio_clave = fin + 1
+    return indice
+
+
+_SIN_DECODIFICAR = object()
+
+
+class ReporteDiferido(Mapping):
+    """Informe que se comporta como un dict de solo lectura y decodifica cada sección bajo demanda.
+
+    Conserva los bytes originales (mucho más compactos que el objeto Python) y
+    memoriza cada sección decodificada. Es seguro compartirlo entre sesiones.
+    `al_decodificar(reporte)`, si se asigna, se llama tras decodificar cada sección
+    nueva (el almacén lo usa para volver a medir la entrada y desalojar si hace falta).
+    """
+
+    def __init__(self, datos, indice=None):
+        self._datos = datos
+        self._indice = indice if indice is not None else indexar_secciones(datos)
+        self._decodificadas = {}
+        self._bytes_decodificados = 0
+        self._lock = threading.Lock()
+        self.al_decodificar = None
+
+    def __getitem__(self, clave):
+        if clave not in self._indice:
+            raise KeyError(clave)
+        valor = self._decodificadas.get(clave, _SIN_DECODIFICAR)
+        if valor is _SIN_DECODIFICAR:
+            with self._lock:
+                valor = self._decodificadas.get(clave, _SIN_DECODIFICAR)
+                nueva = valor is _SIN_DECODIFICAR
+                if nueva:
+                    inicio, fin = self._indice[clave]
+                    valor = cargar_json(memoryview(self._datos)[inicio:fin])
+                    self._bytes_decodificados += estimar_tamano_objeto(valor)
+                    self._decodificadas[clave] = valor
+            # Fuera del lock: el aviso puede tomar el lock del almacén.
+            if nueva and self.al_decodificar is not None:
+                self.al_decodificar(self)
+        return valor
+
+    def __contains__(self, clave):
+        return clave in self._indice
+
+    def __iter__(self):
+        return iter(self._indice)
+
+    def __len__(self):
+        return len(self._indice)
+
+    def secciones_decodificadas(self):
+        return list(self._decodificadas)
+
+    def seccion_decodificada(self, clave):
+        return clave in self._decodificadas
+
+    def tamano_crudo(self, clave):
+        """Bytes que ocupa la sección en el archivo original (no la decodifica)."""
+        inicio, fin = self._indice[clave]
+        return fin - inicio
+
+    def tamano_estimado(self):
+        """Bytes crudos más lo ya decodificado (crece a medida que se visitan secciones)."""
+        return len(self._datos) + self._bytes_decodificados
+
+
+def _medir_reporte(reporte):
+    json_data = reporte["json_data"]
+    if isinstance(json_data, ReporteDiferido):
+        return json_data.tamano_estimado()
+    return estimar_tamano_objeto(json_data)
+
+
+def cargar_reporte(datos, cache=None):
+    """Parsea un informe una sola vez por contenido distinto.
+
+    Devuelve un dict con `hash`, `json_data`, `nombre_cliente`, `bytes` y
+    `modelo` (el ModeloReporte con los datos de gráficos ya normalizados).
+    Si se pasa una `CacheLRU`, el resultado se guarda bajo el hash de los bytes
+    y las siguientes llamadas con el mismo archivo no vuelven a decodificarlo.
+    Los errores de decodificación se propagan y no se cachean.
+
+    Los informes de más de `CARGA_DIFERIDA_MIN_MB` se devuelven como
+    `ReporteDiferido`: solo se decodifican los metadatos al cargar y el resto
+    de secciones cuando se renderizan por primera vez. Con `cache`, cada
+    sección decodificada actualiza el tamaño de la entrada (y puede desalojar otras).
+    """
+    clave = hash_contenido(datos)
+
+    def _parsear():
+        if CARGA_DIFERIDA_MIN_MB and len(datos) >= CARGA_DIFERIDA_MIN_MB * 1024 * 1024:
+            try:
+                json_data = ReporteDiferido(bytes(datos))
+            except ValueError:
+                # Estructura irreconocible: el decodificador completo da el error preciso.
+                json_data = decodificar_json_dpe(datos)
+            else:
+                # El nombre del cliente obliga a decodificar ya los metadatos (sección pequeña).
+                json_data.get("metadatos_informe")
+        else:
+            json_data = decodificar_json_dpe(datos)
+        # pandas llega con dpe_modelo: solo se importa al cargar el primer informe (dpe_arranque).
+        modelo = importar("dpe_modelo").ModeloReporte(json_data, huella=clave)
+        if not isinstance(json_data, ReporteDiferido):
+            modelo.normalizar_todo()
+        return {
+            "hash": clave,
+            "json_data": json_data,
+            "nombre_cliente": extraer_nombre_cliente(json_data),
+            "bytes": len(datos),
+            "modelo": modelo,
+        }
+
+    if cache is None:
+        return _parsear()
+
+    def _parsear_y_vigilar():
+        reporte = _parsear()
+        if isinstance(reporte["json_data"], ReporteDiferido):
+            reporte["json_data"].al_decodificar = lambda _: cache.remedir(clave, reporte, _medir_reporte(reporte))
+        return reporte
+
+    return cache.get_or_compute(clave, _parsear_y_vigilar, medir=_medir_reporte)
+
+
+# --- Subidas comprimidas (.json.gz, .json.xz, .zip) ---
+class ErrorDescompresion(ValueError):
+    """El archivo comprimido está dañado, no contiene informes o supera el límite descomprimido."""
+
+
+def _leer_acotado(flujo, limite_bytes):
+    datos = bytearray()
+    while True:
+        bloque = flujo.read(_BLOQUE_DESCOMPRESION)
+        if not bloque:
+            return datos
+        datos += bloque
+        if limite_bytes and len(datos) > limite_bytes:
+            raise ErrorDescompresion(
+                f"El contenido descomprimido supera el límite de {limite_bytes / 1024 / 1024:,.0f} MB "
+                "(DPE_DESCOMPRESION_MAX_MB).")
+
+
+def informes_en_archivo(nombre, archivo):
+    """Nombres de los informes .json dentro de un .zip; [None] para cualquier otro archivo."""
+    if not nombre.lower().endswith(".zip"):
+        return [None]
+    try:
+        with zipfile.ZipFile(archivo) as zf:
+            miembros = [i.filename for i in zf.infolist()
+                        if not i.is_dir() and i.filename.lower().endswith(".json")
+                        and not i.filename.startswith("__MACOSX/")]
+    except zipfile.BadZipFile as e:
+        raise ErrorDescompresion(f"El archivo .zip está dañado: {e}") from e
+    if not miembros:
+        raise ErrorDescompresion("El archivo .zip no contiene ningún informe .json.")
+    return miembros
+
+
+def leer_informe_subido(nombre, archivo, miembro=None, limite_mb=DESCOMPRESION_MAX_MB):
+    """Bytes JSON de un archivo subido (`archivo` es un objeto tipo archivo binario).
+
+    `.gz` y `.xz` se descomprimen en flujo; de un `.zip` se lee `miembro` (o el
+    primer informe). Los .json se devuelven tal cual.
+    """
+    limite_bytes = int(limite_mb * 1024 * 1024)
+    nombre = nombre.lower()
+    archivo.seek(0)
+    try:
+        if nombre.endswith(".gz"):
+            with gzip.GzipFile(fileobj=archivo, mode="rb") as flujo:
+                return _leer_acotado(flujo, limite_bytes)
+        if nombre.endswith(".xz"):
+            with lzma.LZMAFile(archivo, mode="rb") as flujo:
+                return _leer_acotado(flujo, limite_bytes)
+        if nombre.endswith(".zip"):
+            miembro = miembro or informes_en_archivo(nombre, archivo)[0]
+            with zipfile.ZipFile(archivo) as zf, zf.open(miembro) as flujo:
+                return _leer_acotado(flujo, limite_bytes)
+    except (OSError, EOFError, RuntimeError, lzma.LZMAError, zipfile.BadZipFile, KeyError, zlib.error) as e:
+        raise ErrorDescompresion(f"No se pudo descomprimir '{nombre}': {e}") from e
+    return archivo.read()
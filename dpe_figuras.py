@@ -0,0 +1,452 @@
+# Constructores puros de las figuras Plotly del visor.
+# Cada constructor recibe el conjunto de datos ya normalizado de dpe_modelo
+# (columnas tipadas y ordenadas) y devuelve una tupla (figura, aviso): si no hay
+# nada que graficar, figura es None y aviso explica el motivo. No llaman a
+# Streamlit ni modifican sus entradas, de modo que su resultado se puede
+# memoizar por la huella de los datos.
+import functools
+import inspect
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from dpe_cache import CacheLRU, hash_contenido
+from dpe_modelo import MESES_ORDENADOS_CFIA
+from dpe_tema import COLOR_AZUL_ECO, COLOR_VERDE_ECO, COLOR_GRIS_ECO, COLOR_TEXTO_CUERPO_CSS, COLOR_TEXTO_TITULO_PRINCIPAL_CSS
+
+FIGURAS_CACHE_MAX_ENTRADAS = int(os.environ.get("DPE_FIGURAS_CACHE_MAX_ENTRADAS", "64"))
+# Series temporales largas (indicadores BCCR): puntos máximos por traza tras la
+# reducción LTTB (0 = sin reducir) y a partir de cuántos puntos se usa WebGL.
+SERIES_MAX_PUNTOS = int(os.environ.get("DPE_SERIES_MAX_PUNTOS", "2000"))
+SERIES_WEBGL_MIN_PUNTOS = int(os.environ.get("DPE_SERIES_WEBGL_MIN_PUNTOS", "1000"))
+# Gráficos repetidos (desglose CFIA por tipo de obra, barras de madurez por área): a
+# partir de cuántos se agrupan en una sola figura de múltiplos pequeños (0 = nunca).
+GRAFICOS_COMPACTOS_DESDE = int(os.environ.get("DPE_GRAFICOS_COMPACTOS_DESDE", "6"))
+
+_caches_figuras = {}
+
+
+def _serializar_argumento(obj):
+    # Los conjuntos de datos de dpe_modelo se identifican por su huella (no por su contenido completo).
+    return getattr(obj, "huella", None) or str(obj)
+
+
+def _clave_argumentos(args, kwargs):
+    serializado = json.dumps([args, kwargs], sort_keys=True, default=_serializar_argumento, ensure_ascii=False)
+    return hash_contenido(serializado.encode("utf-8"))
+
+
+def figura_memoizada(constructor=None, *, fuera_de_clave=()):
+    """Memoiza un constructor por el hash de sus argumentos (una caché LRU por constructor).
+
+    `fuera_de_clave` nombra argumentos que no entran en la clave porque otro argumento
+    ya los identifica: json.dumps serializa dicts y listas de forma nativa (sin pasar
+    por la huella), así que un GeoJSON completo se serializaría y hashearía entero.
+    """
+    if constructor is None:
+        return functools.partial(figura_memoizada, fuera_de_clave=fuera_de_clave)
+    cache = CacheLRU(max_entradas=FIGURAS_CACHE_MAX_ENTRADAS, max_bytes=0)
+    _caches_figuras[constructor.__name__] = cache
+    firma = inspect.signature(constructor)
+
+    @functools.wraps(constructor)
+    def envoltura(*args, **kwargs):
+        if fuera_de_clave:
+            argumentos = firma.bind(*args, **kwargs).arguments
+            clave = _clave_argumentos((), {k: v for k, v in argumentos.items() if k not in fuera_de_clave})
+        else:
+            clave = _clave_argumentos(args, kwargs)
+        return cache.get_or_compute(clave, lambda: constructor(*args, **kwargs), medir=lambda _: 0)
+
+    return envoltura
+
+
+def limpiar_caches_figuras():
+    for cache in _caches_figuras.values():
+        cache.clear()
+
+
+def estadisticas_figuras():
+    """Hits/misses por constructor, para diagnóstico."""
+    return {nombre: cache.estadisticas() for nombre, cache in _caches_figuras.items()}
+
+
+def calentar_plotly():
+    """Construye y serializa figuras mínimas con los tipos de traza y funciones de
+    plotly.express que usan los constructores, para que Plotly cargue sus validadores
+    y la plantilla por defecto antes del primer informe (ver dpe_arranque.py)."""
+    df = pd.DataFrame({"Provincia": ["A", "B"], "Variacion_%": [-1.0, 1.0], "clave_provincia": ["a", "b"]})
+    cuadrado = [[[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]]
+    geojson = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "id": clave, "properties": {}, "geometry": {"type": "Polygon", "coordinates": cuadrado}}
+        for clave in ("a", "b")]}
+    df_mapa = pd.DataFrame({"clave_provincia": ["a", "b"], "Provincia_Compatible": ["A", "B"], "m2_construidos": [1, 2]})
+    figuras = [
+        go.Figure([go.Scatterpolar(r=[1, 2], theta=["a", "b"], fill="toself"), go.Scatter(x=[0, 1], y=[0, 1]),
+                   go.Scattergl(x=[0, 1], y=[0, 1])]),
+        go.Figure([go.Bar(x=["Ene"], y=[1])], layout=dict(barmode="stack")),
+        px.bar(df, x="Provincia", y="Variacion_%", color="Variacion_%", color_continuous_scale="RdYlGn",
+               color_continuous_midpoint=0),
+        px.bar(df, x="Variacion_%", y="Provincia", orientation="h", range_x=[0, 100],
+               color_discrete_sequence=[COLOR_VERDE_ECO]),
+        _mapa_con_teselas(df_mapa, geojson, ""),
+    ]
+    for figura in figuras:
+        figura.update_layout(title_x=0.5, paper_bgcolor="rgba(0,0,0,0)", font_color=COLOR_TEXTO_CUERPO_CSS)
+        figura.to_json()
+    return len(figuras)
+
+
+@figura_memoizada
+def construir_figura_radar(radar, titulo):
+    labels = list(radar.etiquetas)
+    values = radar.valores.tolist()
+    fig_radar = go.Figure()
+    r_fill, g_fill, b_fill = tuple(int(COLOR_VERDE_ECO.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+    fill_color_rgba = f'rgba({r_fill}, {g_fill}, {b_fill}, 0.6)'
+    fig_radar.add_trace(go.Scatterpolar(
+        r=values + [values[0]],
+        theta=labels + [labels[0]],
+        fill='toself', fillcolor=fill_color_rgba,
+        line_color=COLOR_AZUL_ECO
+    ))
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 100], ticksuffix='%', showline=True,
+                            showticklabels=True, ticks='outside', dtick=20,
+                            gridcolor=COLOR_GRIS_ECO, linecolor=COLOR_GRIS_ECO,
+                            tickfont=dict(size=9, color=COLOR_GRIS_ECO)),
+            angularaxis=dict(showline=False, ticks='outside', direction="clockwise",
+                             tickfont=dict(size=10, color=COLOR_TEXTO_CUERPO_CSS))
+        ),
+        title=dict(text=titulo, x=0.5, font=dict(size=16, color=COLOR_TEXTO_TITULO_PRINCIPAL_CSS)),
+        showlegend=False, height=450, margin=dict(l=50, r=50, t=80, b=50),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color=COLOR_TEXTO_CUERPO_CSS, size=11)
+    )
+    return fig_radar, None
+
+
+def indices_lttb(x, y, n_salida):
+    """Índices que conserva Largest-Triangle-Three-Buckets (siempre incluye el primer y el último punto).
+
+    `x` debe ser creciente. Cada cubeta elige el punto que forma el triángulo de
+    mayor área con el punto elegido en la cubeta anterior y la media de la
+    siguiente; el cálculo dentro de cada cubeta es vectorial.
+    """
+    n = len(x)
+    if n_salida >= n or n_salida < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n_salida - 2 cubetas interiores; el primer y el último punto van aparte.
+    bordes = np.linspace(1, n - 1, n_salida - 1).astype(np.int64)
+    suma_x = np.concatenate(([0.0], np.cumsum(x)))
+    suma_y = np.concatenate(([0.0], np.cumsum(y)))
+    tamanos = np.diff(bordes)
+    media_x = (suma_x[bordes[1:]] - suma_x[bordes[:-1]]) / tamanos
+    media_y = (suma_y[bordes[1:]] - suma_y[bordes[:-1]]) / tamanos
+    # La "siguiente cubeta" de la última cubeta interior es el último punto.
+    media_x = np.append(media_x[1:], x[-1])
+    media_y = np.append(media_y[1:], y[-1])
+
+    seleccion = np.empty(n_salida, dtype=np.int64)
+    seleccion[0], seleccion[-1] = 0, n - 1
+    a = 0
+    for i in range(n_salida - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        xs, ys = x[inicio:fin], y[inicio:fin]
+        areas = np.abs((x[a] - media_x[i]) * (ys - y[a]) - (x[a] - xs) * (media_y[i] - y[a]))
+        a = inicio + int(np.argmax(areas))
+        seleccion[i + 1] = a
+    return seleccion
+
+
+def _traza_serie_temporal(fechas, valores, **propiedades):
+    # Sin NaN, reducida con LTTB al presupuesto de puntos y en WebGL si sigue siendo larga.
+    validos = ~np.isnan(valores)
+    fechas, valores = fechas[validos], valores[validos]
+    if SERIES_MAX_PUNTOS and len(fechas) > SERIES_MAX_PUNTOS:
+        segundos = (fechas - fechas[0]) / np.timedelta64(1, "s")
+        indices = indices_lttb(segundos, valores, SERIES_MAX_PUNTOS)
+        fechas, valores = fechas[indices], valores[indices]
+    tipo_traza = go.Scattergl if SERIES_WEBGL_MIN_PUNTOS and len(fechas) >= SERIES_WEBGL_MIN_PUNTOS else go.Scatter
+    return tipo_traza(x=fechas, y=valores, **propiedades)
+
+
+def descripcion_muestreo_serie(fechas):
+    """Texto para el caption: puntos reales, rango de fechas y, si aplica, cuántos se grafican."""
+    if not len(fechas):
+        return ""
+    desde, hasta = np.datetime_as_string(fechas.min(), unit="D"), np.datetime_as_string(fechas.max(), unit="D")
+    texto = f"{len(fechas):,} observaciones del {desde} al {hasta}"
+    if SERIES_MAX_PUNTOS and len(fechas) > SERIES_MAX_PUNTOS:
+        texto += f"; se grafican {SERIES_MAX_PUNTOS:,} puntos por indicador (reducción LTTB que conserva la forma de la serie)"
+    return texto + "."
+
+
+@figura_memoizada
+def construir_figura_bccr(serie, titulo):
+    fig_bccr = go.Figure()
+    tbp_data_exists = serie.tasa_basica_pasiva is not None and not np.isnan(serie.tasa_basica_pasiva).all()
+    tc_data_exists = serie.tipo_cambio is not None and not np.isnan(serie.tipo_cambio).all()
+    if tbp_data_exists:
+        fig_bccr.add_trace(_traza_serie_temporal(serie.fechas, serie.tasa_basica_pasiva, name='Tasa Básica Pasiva (%)', yaxis='y1', line=dict(color=COLOR_AZUL_ECO)))
+    if tc_data_exists:
+        fig_bccr.add_trace(_traza_serie_temporal(serie.fechas, serie.tipo_cambio, name='Tipo de Cambio Venta (CRC)', yaxis='y2', line=dict(color=COLOR_VERDE_ECO)))
+
+    if not (tbp_data_exists or tc_data_exists):
+        return None, "No hay datos numéricos válidos para graficar Tasa Básica Pasiva o Tipo de Cambio del BCCR en el JSON."
+    fig_bccr.update_layout(
+        title_text=titulo, title_x=0.5,
+        xaxis_title='Fecha',
+        yaxis=dict(title=dict(text='Tasa Básica Pasiva (%)', font=dict(color=COLOR_AZUL_ECO)),
+                   tickfont=dict(color=COLOR_AZUL_ECO), side='left', showgrid=False,
+                   visible=tbp_data_exists),
+        yaxis2=dict(title=dict(text='Tipo de Cambio Venta (CRC)', font=dict(color=COLOR_VERDE_ECO)),
+                    tickfont=dict(color=COLOR_VERDE_ECO), overlaying='y', side='right',
+                    showgrid=tc_data_exists, gridcolor='rgba(0,0,0,0.05)',
+                    visible=tc_data_exists),
+        legend_title_text='Indicadores', legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        font_color=COLOR_TEXTO_CUERPO_CSS
+    )
+    return fig_bccr, None
+
+
+def _puntos_validos(serie):
+    if serie is None:
+        return [], np.empty(0)
+    validos = ~np.isnan(serie.valores)
+    return [mes for mes, ok in zip(serie.meses, validos) if ok], serie.valores[validos]
+
+
+@figura_memoizada
+def construir_figura_tendencia_cfia(tendencia, titulo):
+    fig_tend = go.Figure()
+
+    for nombre_hist, serie_hist in tendencia.historico:
+        if not np.isnan(serie_hist.valores).all():
+            fig_tend.add_trace(go.Scatter(x=list(serie_hist.meses), y=serie_hist.valores, mode='lines+markers', name=f'Hist. {nombre_hist}', line=dict(width=1.5), marker=dict(size=4)))
+
+    last_real_month_name = None
+    last_real_value = None
+    meses_real, valores_real = _puntos_validos(tendencia.real)
+    if meses_real and (valores_real > 0).any():
+        fig_tend.add_trace(go.Scatter(x=meses_real, y=valores_real, mode='lines+markers', name='Actual Real', line=dict(color='black', width=2.5), marker=dict(size=6)))
+        last_real_month_name = meses_real[-1]
+        last_real_value = float(valores_real[-1])
+
+    meses_proy, valores_proy = _puntos_validos(tendencia.proyeccion)
+    puntos_proy = list(zip(meses_proy, valores_proy.tolist()))
+    if last_real_month_name and last_real_value is not None:
+        # La proyección arranca en el último mes real; se evita duplicar ese mes.
+        if puntos_proy and puntos_proy[0][0] == last_real_month_name:
+            puntos_proy = puntos_proy[1:]
+        puntos_proy = sorted([(last_real_month_name, last_real_value)] + puntos_proy,
+                             key=lambda punto: MESES_ORDENADOS_CFIA.index(punto[0]))
+        puntos_proy = [punto for i, punto in enumerate(puntos_proy) if punto[0] not in {m for m, _ in puntos_proy[:i]}]
+    if puntos_proy and any(valor > 0 for _, valor in puntos_proy):
+        fig_tend.add_trace(go.Scatter(x=[m for m, _ in puntos_proy], y=[v for _, v in puntos_proy], mode='lines+markers', name='Proyección', line=dict(dash='dashdot', color='red', width=2.5), marker=dict(symbol='x', size=6)))
+
+    if not fig_tend.data:
+        return None, "No hay datos suficientes o válidos para generar el gráfico de tendencia CFIA con los datos proporcionados."
+    fig_tend.update_layout(
+        title_text=titulo, title_x=0.5,
+        xaxis_title='Mes', yaxis_title='M² Construidos',
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        font_color=COLOR_TEXTO_CUERPO_CSS,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig_tend, None
+
+
+@figura_memoizada
+def construir_figura_variacion_provincial(variacion, titulo):
+    # Ya viene sin NaN y ordenada de mayor a menor.
+    df_var_prov = pd.DataFrame({'Provincia': variacion.provincias, 'Variacion_%': variacion.variacion})
+    fig_var_prov = px.bar(df_var_prov, x='Provincia', y='Variacion_%',
+                          title=titulo,
+                          labels={'Variacion_%': 'Variación Porcentual (%)', 'Provincia': 'Provincia'},
+                          color='Variacion_%',
+                          color_continuous_scale=[(0, "red"), (0.48, "lightcoral"), (0.5, "lightgrey"), (0.52, "lightgreen"), (1, "green")],
+                          color_continuous_midpoint=0)
+    fig_var_prov.update_layout(title_x=0.5, yaxis_ticksuffix="%", paper_bgcolor='rgba(0,0,0,0)',
+                               plot_bgcolor='rgba(0,0,0,0)', font_color=COLOR_TEXTO_CUERPO_CSS, coloraxis_showscale=False)
+    return fig_var_prov, None
+
+
+def _mapa_con_teselas(df_mapa, geojson, titulo):
+    parametros = dict(geojson=geojson,
+                      locations='clave_provincia',
+                      hover_name='Provincia_Compatible',
+                      hover_data={'clave_provincia': False},
+                      color='m2_construidos',
+                      color_continuous_scale="Greens",
+                      zoom=6.2, center={"lat": 9.7489, "lon": -83.7534},
+                      opacity=0.6,
+                      labels={'m2_construidos': 'M² Construidos'},
+                      title=titulo)
+    if hasattr(px, "choropleth_map"):  # MapLibre (plotly >= 5.24); choropleth_mapbox ya no existe en plotly 7
+        return px.choropleth_map(df_mapa, map_style="carto-positron", **parametros)
+    return px.choropleth_mapbox(df_mapa, mapbox_style="carto-positron", **parametros)
+
+
+def _anillos_xy(geometria):
+    # Coordenadas de todos los anillos exteriores, separados por None para que Plotly los dibuje por separado.
+    poligonos = geometria.get("coordinates", []) if geometria else []
+    if geometria and geometria.get("type") == "Polygon":
+        poligonos = [poligonos]
+    xs, ys = [], []
+    for poligono in poligonos:
+        if not poligono:
+            continue
+        for x, y, *_ in poligono[0]:
+            xs.append(x)
+            ys.append(y)
+        xs.append(None)
+        ys.append(None)
+    return xs, ys
+
+
+def _mapa_sin_teselas(df_mapa, geojson, titulo):
+    """Coroplético cartesiano dibujado solo con la geometría local: no pide nada a servidores externos."""
+    valores = df_mapa.groupby('clave_provincia')['m2_construidos'].sum()
+    nombres = df_mapa.drop_duplicates('clave_provincia').set_index('clave_provincia')['Provincia_Compatible']
+    v_min, v_max = float(valores.min()), float(valores.max())
+    rango = (v_max - v_min) or 1.0
+    fig_mapa = go.Figure()
+    for feature in geojson["features"]:
+        xs, ys = _anillos_xy(feature.get("geometry"))
+        clave = feature.get("id")
+        if clave in valores.index:
+            valor = float(valores[clave])
+            relleno = px.colors.sample_colorscale("Greens", [(valor - v_min) / rango])[0]
+            etiqueta = f"<b>{nombres[clave]}</b><br>M² Construidos: {valor:,.0f}"
+        else:
+            relleno = "rgba(200,200,200,0.35)"
+            etiqueta = f"<b>{feature['properties'].get('NAME_1', clave)}</b><br>Sin datos"
+        fig_mapa.add_trace(go.Scatter(x=xs, y=ys, mode="lines", fill="toself", fillcolor=relleno,
+                                      line=dict(color="white", width=0.8), hoveron="fills",
+                                      name=etiqueta, hoverinfo="name", showlegend=False))
+    # Traza invisible que solo aporta la barra de color.
+    fig_mapa.add_trace(go.Scatter(x=[None], y=[None], mode="markers", hoverinfo="skip", showlegend=False,
+                                  marker=dict(colorscale="Greens", cmin=v_min, cmax=v_max, color=[v_min],
+                                              showscale=True, colorbar=dict(title="M² Construidos"))))
+    fig_mapa.update_xaxes(visible=False)
+    # Proyección equirectangular corregida para la latitud de Costa Rica (~9.75°).
+    fig_mapa.update_yaxes(visible=False, scaleanchor="x", scaleratio=1 / math.cos(math.radians(9.75)))
+    fig_mapa.update_layout(title_text=titulo, height=520, hovermode="closest")
+    return fig_mapa
+
+
+@figura_memoizada(fuera_de_clave=("geojson",))
+def construir_figura_mapa_m2(mapa, geojson, clave_geo, titulo, modo="teselas"):
+    # `geojson` es el FeatureCollection indexado de dpe_geo (id = clave normalizada de provincia);
+    # `clave_geo` lo identifica en la clave de caché y `geojson` queda fuera de ella: hashear la
+    # geometría completa costaba ~0.58 s por render (7 provincias × 50k vértices) frente a
+    # ~0.07 ms del resto de la clave, más que construir la figura.
+    # `modo`: "teselas" (mapa base carto-positron) u "offline" (sin mapa base, sin red).
+    df_mapa = pd.DataFrame({'Provincia_Compatible': mapa.provincias, 'm2_construidos': mapa.m2,
+                            'clave_provincia': mapa.claves})
+    if modo == "offline":
+        fig_mapa = _mapa_sin_teselas(df_mapa, geojson, titulo)
+    else:
+        fig_mapa = _mapa_con_teselas(df_mapa, geojson, titulo)
+    fig_mapa.update_layout(title_x=0.5, margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                           paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                           font_color=COLOR_TEXTO_CUERPO_CSS)
+    return fig_mapa, None
+
+
+@figura_memoizada
+def construir_figura_desglose_obra(desglose, titulo):
+    meses_plot = list(desglose.meses)
+    fig_obra = go.Figure()
+    for sub_col, valores in desglose.subtipos:
+        if (valores > 0).any():
+            fig_obra.add_trace(go.Bar(name=sub_col, x=meses_plot, y=valores))
+    if not fig_obra.data:
+        return None, f"No hay datos de M² para graficar para: {desglose.tipo}"
+    fig_obra.update_layout(barmode='stack', title=titulo,
+                           title_x=0.5, xaxis_title='Mes', yaxis_title='M² Construidos',
+                           legend_title_text='Sub-Tipo de Obra', paper_bgcolor='rgba(0,0,0,0)',
+                           plot_bgcolor='rgba(0,0,0,0)', font_color=COLOR_TEXTO_CUERPO_CSS)
+    return fig_obra, None
+
+
+@figura_memoizada
+def construir_figura_barra_madurez(barra, titulo):
+    df_bar = pd.DataFrame([{'Área': barra.etiqueta, 'Madurez (%)': barra.valor}])
+    fig_bar = px.bar(df_bar, x='Madurez (%)', y='Área', orientation='h', range_x=[0, 100],
+                     color_discrete_sequence=[COLOR_VERDE_ECO])
+    fig_bar.update_layout(height=150, margin=dict(l=10, r=10, t=30, b=10),
+                          title_text=titulo,
+                          title_x=0.5,
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                          font_color=COLOR_TEXTO_CUERPO_CSS)
+    return fig_bar, None
+
+
+def usar_graficos_compactos(cantidad):
+    return GRAFICOS_COMPACTOS_DESDE > 0 and cantidad >= GRAFICOS_COMPACTOS_DESDE
+
+
+@figura_memoizada
+def construir_figura_desglose_obra_compacta(desgloses, titulos, columnas=2):
+    """Un panel por tipo de obra con ejes compartidos; cada sub-tipo tiene un color y una entrada de leyenda."""
+    paneles = [(d, t) for d, t in zip(desgloses, titulos) if any((v > 0).any() for _, v in d.subtipos)]
+    if not paneles:
+        return None, "No hay datos de M² para graficar en ningún tipo de obra."
+    filas = math.ceil(len(paneles) / columnas)
+    fig_obra = make_subplots(rows=filas, cols=columnas, shared_xaxes="all", shared_yaxes="all",
+                             subplot_titles=[titulo for _, titulo in paneles],
+                             vertical_spacing=min(0.08, 0.5 / filas), horizontal_spacing=0.06)
+    colores = px.colors.qualitative.Plotly
+    color_por_subtipo = {}
+    for i, (desglose, _) in enumerate(paneles):
+        for sub_col, valores in desglose.subtipos:
+            if not (valores > 0).any():
+                continue
+            nuevo = sub_col not in color_por_subtipo
+            color = color_por_subtipo.setdefault(sub_col, colores[len(color_por_subtipo) % len(colores)])
+            fig_obra.add_trace(go.Bar(name=sub_col, x=list(desglose.meses), y=valores, marker_color=color,
+                                      legendgroup=sub_col, showlegend=nuevo),
+                               row=i // columnas + 1, col=i % columnas + 1)
+    fig_obra.update_annotations(font_size=12)
+    fig_obra.update_layout(barmode='stack', height=80 + 220 * filas, legend_title_text='Sub-Tipo de Obra',
+                           margin=dict(l=10, r=10, t=40, b=10), paper_bgcolor='rgba(0,0,0,0)',
+                           plot_bgcolor='rgba(0,0,0,0)', font_color=COLOR_TEXTO_CUERPO_CSS)
+    # Con ejes compartidos Plotly solo rotula la fila inferior; la última fila puede quedar incompleta.
+    fig_obra.update_xaxes(showticklabels=True)
+    fig_obra.update_yaxes(title_text='M² Construidos', col=1)
+    return fig_obra, None
+
+
+@figura_memoizada
+def construir_figura_barras_madurez_compacta(barras, titulo):
+    """Todas las áreas en una barra horizontal cada una, en el orden del informe y con la escala 0-100 común."""
+    etiquetas, vistas = [], {}
+    for barra in barras:
+        # Las etiquetas repetidas se numeran: en un eje categórico se fusionarían en una sola barra.
+        vistas[barra.etiqueta] = vistas.get(barra.etiqueta, 0) + 1
+        etiquetas.append(barra.etiqueta if vistas[barra.etiqueta] == 1 else f"{barra.etiqueta} ({vistas[barra.etiqueta]})")
+    if not etiquetas:
+        return None, "No hay valores de madurez para graficar."
+    valores = [barra.valor for barra in barras]
+    fig_bar = go.Figure(go.Bar(x=valores, y=etiquetas, orientation='h', marker_color=COLOR_VERDE_ECO,
+                               text=[f"{v:.0f}%" for v in valores], textposition='outside', cliponaxis=False,
+                               hovertemplate='%{y}: %{x}%<extra></extra>'))
+    fig_bar.update_layout(height=90 + 26 * len(etiquetas), margin=dict(l=10, r=40, t=40, b=10),
+                          title_text=titulo, title_x=0.5,
+                          xaxis=dict(title_text='Madurez (%)', range=[0, 100]),
+                          yaxis=dict(autorange='reversed', title_text=None),
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                          font_color=COLOR_TEXTO_CUERPO_CSS)
+    return fig_bar, None
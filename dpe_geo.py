@@ -0,0 +1,437 @@
+# Geometría de provincias de Costa Rica (GADM nivel 1) para el mapa coroplético.
+# Orden de búsqueda: memoria del proceso -> caché en disco -> archivo local -> descarga.
+# Al cargarse, la geometría se normaliza e indexa una sola vez (clave de provincia
+# -> feature), se generan sus variantes simplificadas y ya no se vuelve a tocar:
+# los renders solo la leen.
+# La carga (y la descarga) solo ocurre en un hilo de fondo (iniciar_precarga), nunca dentro
+# de un rerun de Streamlit: si la geometría aún no está lista, obtener_geometria()
+# devuelve None y la sección lo indica al usuario.
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import unicodedata
+import zipfile
+
+from dpe_json import cargar_json
+
+# URL del GeoJSON de GADM para Costa Rica (Provincias)
+URL_GEOJSON_GADM_PROVINCIAS_CR_ZIP = "https://geodata.ucdavis.edu/gadm/gadm4.1/json/gadm41_CRI_1.json.zip"
+GEOJSON_FILENAME = "gadm41_CRI_1.json"
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOJSON_CACHE_DIR = os.environ.get("DPE_GEOJSON_CACHE_DIR", os.path.join(SCRIPT_DIR, ".cache", "geo"))
+# Copia local para hosts sin salida a Internet (.json o .json.zip de GADM).
+GEOJSON_LOCAL_PATH = os.environ.get("DPE_GEOJSON_LOCAL", os.path.join(SCRIPT_DIR, "assets", GEOJSON_FILENAME))
+GEOJSON_DESCARGA_TIMEOUT_S = 30
+GEOJSON_REINTENTO_S = 10 * 60
+
+# Niveles de simplificación precalculados: (tolerancia en grados, decimales de cuantización).
+# 0.001° ~ 110 m en Costa Rica. "completa" conserva la geometría original de GADM.
+NIVELES_GEOMETRIA = {
+    "completa": None,
+    "alta": (0.0005, 5),
+    "media": (0.002, 4),
+    "baja": (0.008, 3),
+}
+GEOMETRIA_NIVEL = os.environ.get("DPE_GEOMETRIA_NIVEL", "media")
+if GEOMETRIA_NIVEL not in NIVELES_GEOMETRIA:
+    GEOMETRIA_NIVEL = "media"
+
+# Sondeo del servidor de teselas del mapa base (carto-positron) para el modo "auto" del mapa.
+# Se hace desde este proceso: solo aproxima lo que verá el navegador del usuario, que es
+# quien descarga las teselas.
+MAPA_URL_SONDEO = os.environ.get("DPE_MAPA_URL_SONDEO", "https://basemaps.cartocdn.com/")
+SONDEO_TESELAS_TIMEOUT_S = 3
+SONDEO_TESELAS_VIGENCIA_S = 10 * 60
+
+_lock = threading.Lock()
+_geometria_memoria = None
+_hilo_precarga = None
+_ultimo_intento = 0.0
+_ultimo_error = None
+_teselas_ok = None
+_teselas_sondeadas_en = 0.0
+_hilo_sondeo = None
+
+
+def _ruta_cache():
+    return os.path.join(GEOJSON_CACHE_DIR, GEOJSON_FILENAME)
+
+
+def _ruta_meta():
+    return _ruta_cache() + ".meta.json"
+
+
+def _validar_geojson(geojson):
+    return isinstance(geojson, dict) and geojson.get("type") == "FeatureCollection" and bool(geojson.get("features"))
+
+
+def _extraer_de_zip(datos_zip):
+    with zipfile.ZipFile(io.BytesIO(datos_zip), 'r') as zip_ref:
+        if GEOJSON_FILENAME not in zip_ref.namelist():
+            raise ValueError(f"Archivo '{GEOJSON_FILENAME}' no encontrado dentro del ZIP.")
+        with zip_ref.open(GEOJSON_FILENAME) as geojson_file:
+            return geojson_file.read()
+
+
+def _leer_cache_disco():
+    """Lee la caché en disco verificando el hash guardado; si no cuadra la descarta."""
+    ruta, ruta_meta = _ruta_cache(), _ruta_meta()
+    if not (os.path.exists(ruta) and os.path.exists(ruta_meta)):
+        return None
+    try:
+        with open(ruta_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        if hashlib.sha256(datos).hexdigest() != meta.get("sha256"):
+            raise ValueError("hash no coincide")
+        geojson = cargar_json(datos)
+        if not _validar_geojson(geojson):
+            raise ValueError("no es un FeatureCollection válido")
+        return geojson
+    except Exception as e:
+        _registrar_error(f"Caché de GeoJSON corrupta, se descarta ({e}).")
+        for r in (ruta, ruta_meta):
+            try: os.remove(r)
+            except OSError: pass
+        return None
+
+
+def _guardar_cache_disco(datos_json):
+    os.makedirs(GEOJSON_CACHE_DIR, exist_ok=True)
+    ruta, ruta_meta = _ruta_cache(), _ruta_meta()
+    meta = {
+        "sha256": hashlib.sha256(datos_json).hexdigest(),
+        "bytes": len(datos_json),
+        "url": URL_GEOJSON_GADM_PROVINCIAS_CR_ZIP,
+        "guardado": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    # Escritura atómica: nunca queda a la vista un archivo a medio escribir.
+    for destino, contenido in ((ruta, datos_json), (ruta_meta, json.dumps(meta).encode("utf-8"))):
+        tmp = f"{destino}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(contenido)
+        os.replace(tmp, destino)
+
+
+def _leer_local():
+    if not GEOJSON_LOCAL_PATH or not os.path.exists(GEOJSON_LOCAL_PATH):
+        return None
+    try:
+        with open(GEOJSON_LOCAL_PATH, "rb") as f:
+            datos = f.read()
+        if zipfile.is_zipfile(io.BytesIO(datos)):
+            datos = _extraer_de_zip(datos)
+        geojson = cargar_json(datos)
+        return geojson if _validar_geojson(geojson) else None
+    except Exception as e:
+        _registrar_error(f"No se pudo leer el GeoJSON local '{GEOJSON_LOCAL_PATH}': {e}")
+        return None
+
+
+def descargar_geojson():
+    """Descarga el ZIP de GADM y devuelve los bytes del GeoJSON (bloqueante)."""
+    import requests
+    response = requests.get(URL_GEOJSON_GADM_PROVINCIAS_CR_ZIP, timeout=GEOJSON_DESCARGA_TIMEOUT_S)
+    response.raise_for_status()
+    return _extraer_de_zip(response.content)
+
+
+def normalizar_provincia(nombre):
+    """Clave de unión insensible a acentos, mayúsculas y espacios ('San José' == 'Sanjosé' == 'san jose')."""
+    if not isinstance(nombre, str):
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", nombre)
+    return "".join(c for c in descompuesto if c.isalnum() and not unicodedata.combining(c)).lower()
+
+
+def indexar_geometria(geojson, nivel=None):
+    """Índice clave de provincia -> feature, y un FeatureCollection cuyo `id` es esa clave.
+
+    Las features indexadas son copias superficiales (comparten la geometría), así
+    que el GeoJSON de origen no se modifica. Además se precalculan todas las
+    variantes de NIVELES_GEOMETRIA; `geojson` apunta a la del `nivel` configurado.
+    """
+    nivel = nivel or GEOMETRIA_NIVEL
+    features_por_clave = {}
+    for feature in geojson.get("features", []):
+        nombre = (feature.get("properties") or {}).get("NAME_1")
+        clave = normalizar_provincia(nombre)
+        if not clave or clave in features_por_clave:
+            continue
+        features_por_clave[clave] = dict(feature, id=clave, properties=dict(feature.get("properties") or {}, clave_provincia=clave))
+    completa = {"type": "FeatureCollection", "features": list(features_por_clave.values())}
+    variantes = {}
+    for nombre_nivel, parametros in NIVELES_GEOMETRIA.items():
+        fc = completa if parametros is None else simplificar_geometria(completa, *parametros)
+        variantes[nombre_nivel] = {"geojson": fc, "vertices": contar_vertices(fc), "bytes": tamano_serializado(fc)}
+    return {
+        "geojson": variantes[nivel]["geojson"],
+        "nivel": nivel,
+        "clave": f"{GEOJSON_FILENAME}:{nivel}",
+        "variantes": variantes,
+        "features_por_clave": features_por_clave,
+        "nombres": {clave: f["properties"].get("NAME_1") for clave, f in features_por_clave.items()},
+    }
+
+
+# --- Simplificación con preservación de topología ---
+# Los anillos se cortan en los vértices donde cambia el conjunto de provincias que
+# los comparten; cada tramo se simplifica una sola vez (Douglas-Peucker sobre su
+# orientación canónica) y se reutiliza en todas las provincias que lo comparten,
+# de modo que las fronteras comunes siguen coincidiendo sin huecos ni solapes.
+
+def _anillos(geometria):
+    if not geometria:
+        return []
+    if geometria.get("type") == "Polygon":
+        return [geometria["coordinates"]]
+    if geometria.get("type") == "MultiPolygon":
+        return geometria["coordinates"]
+    return []
+
+
+def _cuantizar_anillo(anillo, decimales):
+    import numpy as np  # se importa con la primera geometría, no al cargar el módulo
+
+    arr = np.round(np.asarray([p[:2] for p in anillo], dtype=float), decimales)
+    if len(arr) > 1:
+        distinto = np.any(arr[1:] != arr[:-1], axis=1)
+        arr = arr[np.concatenate(([True], distinto))]
+    puntos = list(map(tuple, arr.tolist()))
+    if len(puntos) > 1 and puntos[0] == puntos[-1]:
+        puntos.pop()
+    return puntos  # anillo abierto (sin repetir el primer vértice)
+
+
+def _douglas_peucker(puntos, tolerancia):
+    """Douglas-Peucker iterativo y vectorizado; conserva siempre los extremos."""
+    n = len(puntos)
+    if n < 3:
+        return puntos
+    import numpy as np
+
+    arr = np.asarray(puntos, dtype=float)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[0] = conservar[-1] = True
+    pila = [(0, n - 1)]
+    while pila:
+        i, j = pila.pop()
+        if j <= i + 1:
+            continue
+        a, b = arr[i], arr[j]
+        tramo = arr[i + 1:j]
+        dx, dy = b - a
+        norma = np.hypot(dx, dy)
+        if norma == 0:
+            dist = np.hypot(tramo[:, 0] - a[0], tramo[:, 1] - a[1])
+        else:
+            dist = np.abs(dx * (tramo[:, 1] - a[1]) - dy * (tramo[:, 0] - a[0])) / norma
+        k = int(np.argmax(dist))
+        if dist[k] > tolerancia:
+            m = i + 1 + k
+            conservar[m] = True
+            pila.append((i, m))
+            pila.append((m, j))
+    return [puntos[k] for k in np.flatnonzero(conservar)]
+
+
+def _simplificar_tramo(tramo, tolerancia, memo):
+    invertido = tramo[::-1]
+    canonico, es_invertido = (tuple(tramo), False) if tuple(tramo) <= tuple(invertido) else (tuple(invertido), True)
+    if canonico not in memo:
+        memo[canonico] = _douglas_peucker(list(canonico), tolerancia)
+    resultado = memo[canonico]
+    return resultado[::-1] if es_invertido else resultado
+
+
+def simplificar_geometria(fc, tolerancia, decimales):
+    """Nuevo FeatureCollection simplificado y cuantizado; no modifica `fc`."""
+    anillos_cuantizados = []  # por feature -> por polígono -> por anillo
+    duenos = {}
+    for i_f, feature in enumerate(fc["features"]):
+        poligonos = []
+        for i_p, poligono in enumerate(_anillos(feature.get("geometry"))):
+            anillos = []
+            for i_a, anillo in enumerate(poligono):
+                puntos = _cuantizar_anillo(anillo, decimales)
+                for p in puntos:
+                    duenos.setdefault(p, set()).add((i_f, i_p, i_a))
+                anillos.append(puntos)
+            poligonos.append(anillos)
+        anillos_cuantizados.append(poligonos)
+
+    memo = {}
+    features = []
+    for feature, poligonos in zip(fc["features"], anillos_cuantizados):
+        nuevos_poligonos = []
+        for i_p, anillos in enumerate(poligonos):
+            nuevos_anillos = []
+            for i_a, puntos in enumerate(anillos):
+                n = len(puntos)
+                if n < 3:
+                    continue
+                grupos = [frozenset(duenos[p]) for p in puntos]
+                cortes = [k for k in range(n) if grupos[k] != grupos[k - 1] or grupos[k] != grupos[(k + 1) % n]]
+                if not cortes:
+                    # Anillo sin vértices de unión (isla o enclave): se ancla en su vértice mínimo.
+                    inicio = min(range(n), key=lambda k: puntos[k])
+                    rotado = puntos[inicio:] + puntos[:inicio]
+                    simplificado = _simplificar_tramo(rotado + [rotado[0]], tolerancia, memo)[:-1]
+                else:
+                    simplificado = []
+                    for c_i, c_j in zip(cortes, cortes[1:] + [cortes[0] + n]):
+                        tramo = [puntos[k % n] for k in range(c_i, c_j + 1)]
+                        simplificado.extend(_simplificar_tramo(tramo, tolerancia, memo)[:-1])
+                if len(simplificado) < 3:
+                    if i_a == 0:
+                        break  # el exterior colapsó: se descarta el polígono completo (islotes)
+                    continue  # hueco demasiado pequeño para la tolerancia
+                nuevos_anillos.append([list(p) for p in simplificado] + [list(simplificado[0])])
+            if nuevos_anillos:
+                nuevos_poligonos.append(nuevos_anillos)
+        if not nuevos_poligonos and poligonos and len(poligonos[0][0]) >= 3:
+            # Nunca se pierde una provincia entera: se conserva su exterior solo cuantizado.
+            exterior = poligonos[0][0]
+            nuevos_poligonos = [[[list(p) for p in exterior] + [list(exterior[0])]]]
+        features.append(dict(feature, geometry={"type": "MultiPolygon", "coordinates": nuevos_poligonos}))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def contar_vertices(fc):
+    return sum(len(anillo) for feature in fc["features"] for poligono in _anillos(feature.get("geometry")) for anillo in poligono)
+
+
+def tamano_serializado(fc):
+    return len(json.dumps(fc, separators=(",", ":")).encode("utf-8"))
+
+
+def resumen_simplificacion(geometria):
+    """Vértices y bytes de cada variante, con el ahorro respecto a la geometría completa."""
+    base = geometria["variantes"]["completa"]
+    filas = []
+    for nombre_nivel, variante in geometria["variantes"].items():
+        filas.append({
+            "nivel": nombre_nivel,
+            "vertices": variante["vertices"],
+            "bytes": variante["bytes"],
+            "ahorro_vertices_pct": round(100 * (1 - variante["vertices"] / base["vertices"]), 1) if base["vertices"] else 0.0,
+            "ahorro_bytes_pct": round(100 * (1 - variante["bytes"] / base["bytes"]), 1) if base["bytes"] else 0.0,
+        })
+    return filas
+
+
+def provincias_sin_geometria(nombres, claves, geometria):
+    """Nombres cuya clave normalizada no encuentra provincia en el índice (sin recorrer las features)."""
+    indexadas = geometria["features_por_clave"]
+    faltantes = []
+    for nombre, clave in zip(nombres, claves):
+        if clave not in indexadas and nombre not in faltantes:
+            faltantes.append(nombre)
+    return faltantes
+
+
+def _registrar_error(mensaje):
+    global _ultimo_error
+    _ultimo_error = mensaje
+
+
+def _cargar_sin_red():
+    global _geometria_memoria
+    if _geometria_memoria is None:
+        geojson = _leer_cache_disco() or _leer_local()
+        if geojson is not None:
+            _geometria_memoria = indexar_geometria(geojson)
+    return _geometria_memoria
+
+
+def _precargar():
+    global _geometria_memoria
+    try:
+        if _cargar_sin_red() is not None:
+            return
+        datos_json = descargar_geojson()
+        geojson = cargar_json(datos_json)
+        if not _validar_geojson(geojson):
+            raise ValueError("la descarga no es un FeatureCollection válido")
+        _guardar_cache_disco(datos_json)
+        _geometria_memoria = indexar_geometria(geojson)
+        _registrar_error(None)
+    except Exception as e:
+        _registrar_error(f"Error procesando GeoJSON: {e}")
+
+
+def iniciar_precarga():
+    """Lanza (una vez por proceso, o tras GEOJSON_REINTENTO_S si falló) el hilo que calienta la geometría."""
+    global _hilo_precarga, _ultimo_intento
+    with _lock:
+        if _geometria_memoria is not None:
+            return
+        if _hilo_precarga is not None and _hilo_precarga.is_alive():
+            return
+        if _hilo_precarga is not None and time.monotonic() - _ultimo_intento < GEOJSON_REINTENTO_S:
+            return
+        _ultimo_intento = time.monotonic()
+        _hilo_precarga = threading.Thread(target=_precargar, name="dpe-geojson-precarga", daemon=True)
+        _hilo_precarga.start()
+
+
+def obtener_geometria():
+    """Geometría indexada ya preparada, o None. Nunca bloquea: leer, indexar y
+    simplificar la geometría ocurre siempre en el hilo de precarga."""
+    if _geometria_memoria is None:
+        iniciar_precarga()
+    return _geometria_memoria
+
+
+def geometria_en_memoria():
+    """Como obtener_geometria, pero sin lanzar la precarga (vistas de diagnóstico)."""
+    return _geometria_memoria
+
+
+def esperar_geometria(timeout=None):
+    """Variante bloqueante de obtener_geometria para herramientas de línea de comandos (no usar en Streamlit)."""
+    iniciar_precarga()
+    hilo = _hilo_precarga
+    if hilo is not None:
+        hilo.join(timeout)
+    return _geometria_memoria
+
+
+def precarga_en_curso():
+    return _hilo_precarga is not None and _hilo_precarga.is_alive()
+
+
+def ultimo_error():
+    return _ultimo_error
+
+
+def _sondear_teselas():
+    global _teselas_ok, _teselas_sondeadas_en
+    try:
+        import requests
+        respuesta = requests.head(MAPA_URL_SONDEO, timeout=SONDEO_TESELAS_TIMEOUT_S, allow_redirects=True)
+        ok = respuesta.status_code < 500
+    except Exception:
+        ok = False
+    _teselas_ok = ok
+    _teselas_sondeadas_en = time.monotonic()
+
+
+def teselas_disponibles():
+    """Resultado del último sondeo de teselas (True/False), o None si aún no hay ninguno.
+
+    No bloquea: si el resultado no existe o está vencido lanza un sondeo en segundo plano.
+    """
+    global _hilo_sondeo
+    with _lock:
+        vencido = _teselas_ok is None or time.monotonic() - _teselas_sondeadas_en > SONDEO_TESELAS_VIGENCIA_S
+        if vencido and not (_hilo_sondeo is not None and _hilo_sondeo.is_alive()):
+            _hilo_sondeo = threading.Thread(target=_sondear_teselas, name="dpe-sondeo-teselas", daemon=True)
+            _hilo_sondeo.start()
+    return _teselas_ok
@@ -0,0 +1,207 @@
+# Inspector del JSON crudo del informe.
+# st.json(informe) serializa y envía el documento entero al navegador en cada
+# rerun; con informes de varios MB la pestaña se congela. El inspector solo envía
+# el nodo abierto (una página de sus hijos) y resuelve la búsqueda en el servidor
+# contra un índice de rutas que se construye una vez por informe. Con un
+# ReporteDiferido el índice se construye por sección y solo para las secciones ya
+# decodificadas: buscar no obliga a decodificar el informe entero.
+import itertools
+import json
+import os
+from collections.abc import Mapping
+
+import streamlit as st
+
+from dpe_cache import CacheLRU
+from dpe_carga import ReporteDiferido
+
+INSPECTOR_TAMANO_PAGINA = max(1, int(os.environ.get("DPE_INSPECTOR_TAMANO_PAGINA", "50")))
+INSPECTOR_MAX_RESULTADOS = 200
+_VISTA_PREVIA_MAX = 120
+
+# Índices de rutas por hash del informe; se desalojan como las demás cachés.
+indices_cache = CacheLRU(max_entradas=4, max_bytes=128 * 1024 * 1024)
+
+
+def formatear_ruta(ruta):
+    texto = "$"
+    for paso in ruta:
+        texto += f"[{paso}]" if isinstance(paso, int) else f".{paso}"
+    return texto
+
+
+def resolver_ruta(raiz, ruta):
+    nodo = raiz
+    for paso in ruta:
+        nodo = nodo[paso]
+    return nodo
+
+
+def tipo_nodo(valor):
+    if isinstance(valor, Mapping):
+        return "objeto"
+    if isinstance(valor, list):
+        return "lista"
+    if isinstance(valor, str):
+        return "texto"
+    if isinstance(valor, bool):
+        return "booleano"
+    if valor is None:
+        return "nulo"
+    return "número"
+
+
+def vista_previa(valor, maximo=_VISTA_PREVIA_MAX):
+    if isinstance(valor, Mapping):
+        return f"{{{len(valor)} claves}}"
+    if isinstance(valor, list):
+        return f"[{len(valor)} elementos]"
+    texto = json.dumps(valor, ensure_ascii=False)
+    return texto if len(texto) <= maximo else texto[:maximo - 1] + "…"
+
+
+def pagina_claves(nodo, pagina, tamano=INSPECTOR_TAMANO_PAGINA):
+    """Claves (o índices) de la página pedida de un objeto o lista, sin tocar los valores."""
+    inicio = pagina * tamano
+    if isinstance(nodo, Mapping):
+        return list(itertools.islice(iter(nodo), inicio, inicio + tamano))
+    return list(range(inicio, min(inicio + tamano, len(nodo))))
+
+
+def fila_hijo(nodo, clave):
+    """(tipo, vista previa, se puede abrir) de un hijo; no decodifica secciones diferidas."""
+    if isinstance(nodo, ReporteDiferido) and not nodo.seccion_decodificada(clave):
+        return "sin decodificar", f"({nodo.tamano_crudo(clave) / 1024:,.1f} KB)", True
+    valor = nodo[clave]
+    previa = vista_previa(valor)
+    return tipo_nodo(valor), previa, isinstance(valor, (Mapping, list)) or len(previa) >= _VISTA_PREVIA_MAX
+
+
+def construir_indice(raiz, prefijo=()):
+    """Índice de búsqueda: (rutas, textos) con un texto en minúsculas "ruta = valor" por nodo.
+
+    `prefijo` es la ruta de `raiz` dentro del informe (para indexar una sola sección).
+    """
+    rutas, textos = [], []
+    pendientes = [(tuple(prefijo), raiz)]
+    while pendientes:
+        ruta, nodo = pendientes.pop()
+        if ruta:
+            rutas.append(ruta)
+            textos.append(f"{formatear_ruta(ruta)} = {vista_previa(nodo)}".lower())
+        if isinstance(nodo, Mapping):
+            hijos = [(ruta + (clave,), valor) for clave, valor in nodo.items()]
+        elif isinstance(nodo, list):
+            hijos = [(ruta + (i,), valor) for i, valor in enumerate(nodo)]
+        else:
+            continue
+        pendientes.extend(reversed(hijos))  # recorrido en el orden del documento
+    return rutas, textos
+
+
+def _indice_seccion(raiz, clave, huella):
+    if huella is None:
+        return construir_indice(raiz[clave], (clave,))
+    return indices_cache.get_or_compute(f"{huella}:{clave}", lambda: construir_indice(raiz[clave], (clave,)))
+
+
+def indice_informe(raiz, huella=None):
+    if isinstance(raiz, ReporteDiferido):
+        # Las secciones sin decodificar solo aportan su clave; se indexan al abrirlas.
+        rutas, textos = [], []
+        for clave in raiz:
+            if raiz.seccion_decodificada(clave):
+                rutas_seccion, textos_seccion = _indice_seccion(raiz, clave, huella)
+                rutas += rutas_seccion
+                textos += textos_seccion
+            else:
+                rutas.append((clave,))
+                textos.append(f"{formatear_ruta((clave,))} = (sin decodificar)".lower())
+        return rutas, textos
+    if huella is None:
+        return construir_indice(raiz)
+    return indices_cache.get_or_compute(huella, lambda: construir_indice(raiz))
+
+
+def buscar(indice, consulta, max_resultados=INSPECTOR_MAX_RESULTADOS):
+    """Rutas cuyo texto contiene todas las palabras de la consulta (sin distinguir mayúsculas)."""
+    palabras = consulta.lower().split()
+    if not palabras:
+        return [], 0
+    rutas, textos = indice
+    encontrados = [ruta for ruta, texto in zip(rutas, textos) if all(p in texto for p in palabras)]
+    return encontrados[:max_resultados], len(encontrados)
+
+
+# --- Interfaz (se llama dentro de un fragmento de app.py) ---
+def _ir_a(ruta):
+    st.session_state.inspector_ruta = tuple(ruta)
+    st.session_state.inspector_pagina = 1
+
+
+def _abrir(clave_widget, base=None):
+    # Las claves de los selectbox incluyen la ruta/consulta: al cambiar de nodo empiezan de cero.
+    seleccion = st.session_state.get(clave_widget)
+    if seleccion is not None:
+        _ir_a(seleccion if base is None else base + (seleccion,))
+
+
+def render_inspector(json_data, huella=None, ui=st):
+    if "inspector_ruta" not in st.session_state:
+        _ir_a(())
+    ruta = st.session_state.inspector_ruta
+    try:
+        nodo = resolver_ruta(json_data, ruta)
+    except (KeyError, IndexError, TypeError):
+        _ir_a(())  # la ruta era de otro informe
+        ruta, nodo = (), json_data
+
+    consulta = ui.text_input("Buscar clave o valor:", key="inspector_busqueda",
+                             placeholder="p. ej. tasa_basica_pasiva o San José")
+    if consulta.strip():
+        with ui.spinner("Buscando..."):
+            resultados, total = buscar(indice_informe(json_data, huella), consulta)
+        if resultados:
+            ui.caption(f"{total:,} coincidencias" + (f" (se muestran {len(resultados)})" if total > len(resultados) else ""))
+            col_res, col_ir = ui.columns([5, 1], vertical_alignment="bottom")
+            clave_resultado = f"inspector_resultado:{consulta}"
+            col_res.selectbox("Resultados:", resultados, format_func=formatear_ruta, key=clave_resultado)
+            col_ir.button("Ir", on_click=_abrir, args=(clave_resultado,), key="inspector_ir")
+        else:
+            ui.caption("Sin coincidencias.")
+        if isinstance(json_data, ReporteDiferido):
+            pendientes = [clave for clave in json_data if not json_data.seccion_decodificada(clave)]
+            if pendientes:
+                ui.caption(f"La búsqueda cubre las secciones ya abiertas ({len(json_data) - len(pendientes)} de "
+                           f"{len(json_data)}); las demás se indexan al abrirlas aquí o en el visor.")
+
+    col_ruta, col_subir, col_raiz = ui.columns([6, 1, 1], vertical_alignment="center")
+    col_ruta.code(formatear_ruta(ruta), language=None)
+    col_subir.button("⬆️ Subir", on_click=_ir_a, args=(ruta[:-1],), disabled=not ruta,
+                     key="inspector_subir")
+    col_raiz.button("⏮ Raíz", on_click=_ir_a, args=((),), disabled=not ruta,
+                    key="inspector_raiz")
+
+    if not isinstance(nodo, (Mapping, list)):
+        ui.code(json.dumps(nodo, ensure_ascii=False, indent=2), language="json")
+        return
+    if not nodo:
+        ui.caption("(vacío)")
+        return
+
+    total_paginas = -(-len(nodo) // INSPECTOR_TAMANO_PAGINA)
+    pagina = 1
+    if total_paginas > 1:
+        pagina = ui.number_input(f"Página (de {total_paginas:,}):", min_value=1, max_value=total_paginas,
+                                 step=1, key="inspector_pagina")
+    claves = pagina_claves(nodo, min(pagina, total_paginas) - 1)
+    filas = [(clave,) + fila_hijo(nodo, clave) for clave in claves]
+    ui.dataframe([{"Clave": str(clave), "Tipo": tipo, "Valor": previa} for clave, tipo, previa, _ in filas],
+                 hide_index=True)
+
+    abribles = [clave for clave, _, _, abrible in filas if abrible]
+    if abribles:
+        col_hijo, col_abrir = ui.columns([5, 1], vertical_alignment="bottom")
+        clave_hijo = f"inspector_hijo:{formatear_ruta(ruta)}:{pagina}"
+        col_hijo.selectbox("Abrir:", abribles, key=clave_hijo)
+        col_abrir.button("Abrir", on_click=_abrir, args=(clave_hijo, ruta), key="inspector_abrir")
@@ -0,0 +1,101 @@
+# Decodificación JSON con backend intercambiable.
+# Todo el JSON que entra a la app (informes, secciones diferidas, GeoJSON) pasa
+# por cargar_json(). Con orjson instalado se decodifica directamente desde los
+# bytes, sin construir el `str` intermedio de decode("utf-8") + json.loads; si no
+# está, se usa la biblioteca estándar.
+#
+#   python dpe_json.py            compara los backends con informes sintéticos y el GeoJSON
+import argparse
+import json
+import os
+import time
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+_BOM_UTF8 = b"\xef\xbb\xbf"
+
+
+def _cargar_stdlib(datos):
+    # json.loads acepta bytes (detecta UTF-8 y el BOM) pero no memoryview.
+    if isinstance(datos, memoryview):
+        datos = datos.tobytes()
+    if isinstance(datos, str):
+        return json.loads(datos.lstrip("\ufeff"))
+    return json.loads(datos)
+
+
+def _cargar_orjson(datos):
+    if isinstance(datos, str):
+        datos = datos.lstrip("\ufeff")
+    elif datos[:3] == _BOM_UTF8:
+        datos = memoryview(datos)[3:]
+    try:
+        return orjson.loads(datos)
+    except orjson.JSONDecodeError:
+        # orjson es más estricto (NaN/Infinity, sustitutos sueltos): la biblioteca
+        # estándar lo acepta o da el error de siempre. Los enteros de más de 64 bits
+        # orjson los devuelve como float; el motor DPE no los genera.
+        return _cargar_stdlib(datos)
+
+
+BACKENDS = {"stdlib": _cargar_stdlib}
+if orjson is not None:
+    BACKENDS["orjson"] = _cargar_orjson
+
+# "auto" usa el backend más rápido instalado; "stdlib" u "orjson" lo fuerzan
+# (si el pedido no está instalado se usa la biblioteca estándar).
+JSON_BACKEND = os.environ.get("DPE_JSON_BACKEND", "auto")
+if JSON_BACKEND in BACKENDS:
+    BACKEND_ACTIVO = JSON_BACKEND
+elif JSON_BACKEND == "auto" and "orjson" in BACKENDS:
+    BACKEND_ACTIVO = "orjson"
+else:
+    BACKEND_ACTIVO = "stdlib"
+_cargar = BACKENDS[BACKEND_ACTIVO]
+
+
+def cargar_json(datos):
+    """Decodifica JSON desde bytes, bytearray, memoryview o str (con o sin BOM); los errores son json.JSONDecodeError."""
+    return _cargar(datos)
+
+
+# --- Benchmark ---
+def _medir(funcion, datos, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(datos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    from dpe_sintetico import generar_informe
+
+    parser = argparse.ArgumentParser(description="Compara los backends de decodificación JSON.")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones por caso (se reporta la mejor).")
+    parser.add_argument("--geojson", default=os.environ.get("DPE_GEOJSON_LOCAL", "assets/gadm41_CRI_1.json"),
+                        help="GeoJSON de provincias a incluir en la comparación (si existe).")
+    args = parser.parse_args()
+
+    casos = []
+    for escala, filas_bccr in ((1, 365), (5, 3650), (20, 36500)):
+        datos = json.dumps(generar_informe(escala, filas_bccr), ensure_ascii=False).encode("utf-8")
+        casos.append((f"informe escala={escala} bccr={filas_bccr}", datos))
+    if os.path.exists(args.geojson) and args.geojson.endswith(".json"):
+        with open(args.geojson, "rb") as f:
+            casos.append((f"GeoJSON {os.path.basename(args.geojson)}", f.read()))
+
+    print(f"Backend activo: {BACKEND_ACTIVO} (DPE_JSON_BACKEND={JSON_BACKEND})")
+    print(f"{'caso':<36}{'MB':>8}" + "".join(f"{nombre:>12}" for nombre in BACKENDS) + "  (ms, mejor de "
+          f"{args.repeticiones})")
+    for nombre_caso, datos in casos:
+        tiempos = [_medir(backend, datos, args.repeticiones) for backend in BACKENDS.values()]
+        print(f"{nombre_caso:<36}{len(datos) / 1024 / 1024:>8.2f}" + "".join(f"{t * 1000:>12.1f}" for t in tiempos))
+
+
+if __name__ == "__main__":
+    main()
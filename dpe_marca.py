@@ -0,0 +1,107 @@
+# Logo corporativo servido como archivo estático con URL por contenido.
+# En lugar de incrustar el PNG como data URI en cada rerun, se generan variantes
+# redimensionadas en static/marca/ con el hash de su contenido en el nombre
+# (logo_barra.<hash>.png). Streamlit las sirve en /app/static/ cuando
+# server.enableStaticServing está activo; la URL solo cambia si cambia el logo, así
+# que el navegador lo descarga una vez por despliegue. Si el servido estático está
+# desactivado o la carpeta no se puede escribir, se usa la variante como data URI.
+#
+#   python dpe_marca.py        genera las variantes (p. ej. al construir una imagen de solo lectura)
+import base64
+import glob
+import io
+import os
+import threading
+
+from dpe_cache import hash_contenido
+from dpe_tema import LOGO_PATH, SCRIPT_DIR
+
+# Ancho máximo en px de cada variante: el doble del ancho mostrado, para pantallas de alta densidad.
+VARIANTES_LOGO = {"icono": 64, "barra": 480, "bienvenida": 300, "portada": 500}
+CARPETA_MARCA = os.path.join(SCRIPT_DIR, "static", "marca")
+_PREFIJO_URL = "app/static/marca/"
+
+_lock = threading.Lock()
+_variantes = None  # variante -> ruta del archivo generado
+
+
+def _redimensionar(origen, ancho):
+    from PIL import Image
+
+    with Image.open(origen) as imagen:
+        imagen.load()
+    # Logos de pocos colores: la paleta mantiene el PNG pequeño tras el suavizado del redimensionado.
+    paleta = imagen.getcolors(256) is not None
+    imagen.thumbnail((ancho, ancho), Image.LANCZOS)
+    if paleta:
+        imagen = imagen.quantize(256, method=Image.Quantize.FASTOCTREE)
+    salida = io.BytesIO()
+    imagen.save(salida, "PNG", optimize=True)
+    return salida.getvalue()
+
+
+def generar_variantes(origen=LOGO_PATH, carpeta=CARPETA_MARCA):
+    """Escribe las variantes que falten y borra las de un logo anterior; devuelve {variante: ruta}."""
+    if not os.path.exists(origen):
+        return {}
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = {}
+    for variante, ancho in VARIANTES_LOGO.items():
+        datos = _redimensionar(origen, ancho)
+        ruta = os.path.join(carpeta, f"logo_{variante}.{hash_contenido(datos)[:12]}.png")
+        if not os.path.exists(ruta):
+            tmp = f"{ruta}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(datos)
+            os.replace(tmp, ruta)
+        for anterior in glob.glob(os.path.join(carpeta, f"logo_{variante}.*.png")):
+            if anterior != ruta:
+                try:
+                    os.remove(anterior)
+                except OSError:
+                    pass
+        rutas[variante] = ruta
+    return rutas
+
+
+def variantes_logo():
+    """{variante: ruta}, generadas una vez por proceso ({} si no hay logo o no se pudieron escribir)."""
+    global _variantes
+    with _lock:
+        if _variantes is None:
+            try:
+                _variantes = generar_variantes()
+            except OSError:
+                _variantes = {}
+        return _variantes
+
+
+def fuente_logo(variante, servido_estatico):
+    """Ruta del logo para st.image/page_icon: URL estática si se sirve, si no el archivo de la variante."""
+    ruta = variantes_logo().get(variante)
+    if ruta is None:
+        return LOGO_PATH
+    return "/" + _PREFIJO_URL + os.path.basename(ruta) if servido_estatico else ruta
+
+
+def src_logo(variante, servido_estatico):
+    """Valor de src para un <img> en HTML: URL estática o data URI de la variante (None si no hay logo)."""
+    ruta = variantes_logo().get(variante) or (LOGO_PATH if os.path.exists(LOGO_PATH) else None)
+    if ruta is None:
+        return None
+    if servido_estatico and ruta != LOGO_PATH:
+        return _PREFIJO_URL + os.path.basename(ruta)
+    with open(ruta, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode()
+
+
+def ruta_local(fuente):
+    """Archivo en disco de una fuente devuelta por fuente_logo (para destinos sin servidor, p. ej. dpe_batch)."""
+    if fuente.startswith("/" + _PREFIJO_URL):
+        return os.path.join(CARPETA_MARCA, fuente[len("/" + _PREFIJO_URL):])
+    return fuente
+
+
+if __name__ == "__main__":
+    for nombre, ruta in generar_variantes().items():
+        print(f"{nombre:<12}{os.path.getsize(ruta) / 1024:>7.1f} KB  {os.path.relpath(ruta, SCRIPT_DIR)}")
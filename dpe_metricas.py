@@ -0,0 +1,142 @@
+# Métricas de renderizado por sección, siempre activas y en memoria del proceso.
+# Cada render de sección registra duración, elementos y figuras enviados y bytes
+# de los mensajes al navegador. El registro guarda una ventana de muestras por
+# sección (percentiles p50/p95/p99) y puede volcarse a un archivo JSON Lines (una
+# línea por render) o de texto Prometheus (reescrito cada pocos segundos, apto
+# para el textfile collector de node_exporter).
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+METRICAS_VENTANA = int(os.environ.get("DPE_METRICAS_VENTANA", "1000"))
+# Archivo de exportación ("" = sin exportar); .prom se escribe en formato Prometheus y el resto como JSON Lines.
+METRICAS_ARCHIVO = os.environ.get("DPE_METRICAS_ARCHIVO", "")
+METRICAS_INTERVALO_S = float(os.environ.get("DPE_METRICAS_INTERVALO_S", "10"))
+PERCENTILES = (50, 95, 99)
+
+
+class MedidorMensajes:
+    """Cuenta los mensajes que Streamlit envía al navegador mientras está activo.
+
+    Envuelve la cola de la sesión (`ScriptRunContext._enqueue`); fuera de un
+    script de Streamlit (p. ej. dpe_batch) no mide nada y `bytes` queda en None.
+    """
+
+    def __init__(self, contexto):
+        self._contexto = contexto if hasattr(contexto, "_enqueue") else None
+        self.elementos = 0
+        self.bytes = None
+
+    def _enqueue(self, mensaje):
+        self.bytes += mensaje.ByteSize()
+        if mensaje.WhichOneof("type") == "delta" and mensaje.delta.WhichOneof("type") == "new_element":
+            self.elementos += 1
+        self._original(mensaje)
+
+    def __enter__(self):
+        if self._contexto is not None:
+            self.bytes = 0
+            self._original = self._contexto._enqueue
+            self._contexto._enqueue = self._enqueue
+        return self
+
+    def __exit__(self, *exc):
+        if self._contexto is not None:
+            self._contexto._enqueue = self._original
+        return False
+
+
+class RegistroMetricas:
+    """Ventana de las últimas muestras de render por sección (thread-safe, compartida por las sesiones)."""
+
+    def __init__(self, ventana=METRICAS_VENTANA, archivo=METRICAS_ARCHIVO, intervalo_s=METRICAS_INTERVALO_S):
+        self._muestras = defaultdict(lambda: deque(maxlen=max(1, ventana)))
+        self._totales = defaultdict(lambda: [0, 0.0])  # sección -> [renders, segundos] desde el arranque
+        self._lock = threading.RLock()  # reentrante: la exportación .prom llama a resumen() con el lock tomado
+        self.archivo = archivo
+        self._intervalo_s = intervalo_s
+        self._ultima_escritura = 0.0
+
+    def registrar(self, seccion, segundos, elementos, figuras, bytes_enviados):
+        muestra = {"ts": time.time(), "seccion": seccion, "segundos": segundos, "elementos": elementos,
+                   "figuras": figuras, "bytes": bytes_enviados}
+        with self._lock:
+            self._muestras[seccion].append(muestra)
+            totales = self._totales[seccion]
+            totales[0] += 1
+            totales[1] += segundos
+        if self.archivo:
+            self._exportar(muestra)
+
+    def resumen(self):
+        """Una fila por sección con percentiles de duración y medias de elementos, figuras y bytes."""
+        import numpy as np  # solo lo pide la vista de administración
+
+        with self._lock:
+            copia = {seccion: list(muestras) for seccion, muestras in self._muestras.items()}
+            totales = {seccion: tuple(t) for seccion, t in self._totales.items()}
+        filas = []
+        for seccion, muestras in copia.items():
+            ms = np.array([m["segundos"] for m in muestras]) * 1000
+            bytes_medidos = [m["bytes"] for m in muestras if m["bytes"] is not None]
+            fila = {"seccion": seccion, "renders": totales[seccion][0], "segundos_total": totales[seccion][1],
+                    "muestras": len(muestras)}
+            fila.update({f"p{p}_ms": float(v) for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))})
+            fila["elementos"] = float(np.mean([m["elementos"] for m in muestras]))
+            fila["figuras"] = float(np.mean([m["figuras"] for m in muestras]))
+            fila["kb"] = float(np.mean(bytes_medidos)) / 1024 if bytes_medidos else None
+            filas.append(fila)
+        return sorted(filas, key=lambda f: -f["p95_ms"])
+
+    def prometheus(self):
+        """Resumen en formato de exposición de texto de Prometheus."""
+        lineas = [
+            "# HELP dpe_render_seccion_segundos Duración del render de cada sección del informe.",
+            "# TYPE dpe_render_seccion_segundos summary",
+        ]
+        filas = self.resumen()
+        for fila in filas:
+            etiqueta = f'seccion="{_escapar_etiqueta(fila["seccion"])}"'
+            for p in PERCENTILES:
+                lineas.append(f'dpe_render_seccion_segundos{{{etiqueta},quantile="{p / 100}"}} {fila[f"p{p}_ms"] / 1000:.6f}')
+            lineas.append(f"dpe_render_seccion_segundos_sum{{{etiqueta}}} {fila['segundos_total']:.6f}")
+            lineas.append(f"dpe_render_seccion_segundos_count{{{etiqueta}}} {fila['renders']}")
+        for nombre, campo, ayuda, escala in (
+            ("dpe_render_seccion_elementos", "elementos", "Elementos enviados por render (media de la ventana).", 1),
+            ("dpe_render_seccion_figuras", "figuras", "Figuras Plotly por render (media de la ventana).", 1),
+            ("dpe_render_seccion_bytes", "kb", "Bytes enviados al navegador por render (media de la ventana).", 1024),
+        ):
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge"]
+            lineas += [f'{nombre}{{seccion="{_escapar_etiqueta(f["seccion"])}"}} {f[campo] * escala:.1f}'
+                       for f in filas if f[campo] is not None]
+        return "\n".join(lineas) + "\n"
+
+    def _exportar(self, muestra):
+        try:
+            if self.archivo.endswith(".prom"):
+                # Comprobación del intervalo y escritura bajo el lock: dos sesiones concurrentes
+                # no pueden escribir a la vez el mismo archivo temporal.
+                with self._lock:
+                    ahora = time.monotonic()
+                    if ahora - self._ultima_escritura < self._intervalo_s:
+                        return
+                    self._ultima_escritura = ahora
+                    # Escritura atómica: el recolector nunca lee un archivo a medio escribir.
+                    tmp = f"{self.archivo}.{os.getpid()}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(self.prometheus())
+                    os.replace(tmp, self.archivo)
+            else:
+                with self._lock, open(self.archivo, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(muestra, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # las métricas nunca deben romper el render
+
+
+def _escapar_etiqueta(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registro_metricas = RegistroMetricas()
@@ -0,0 +1,346 @@
+# Modelo tipado del informe DPE, normalizado una sola vez al cargarlo.
+# Cada conjunto de datos de gráfico se valida y se convierte aquí en columnas
+# compactas (numpy) ya ordenadas: fechas parseadas, meses en orden calendario y
+# valores numéricos con NaN donde el JSON traía texto. Los constructores de
+# dpe_figuras solo dibujan y las funciones render_* solo consumen estos datos.
+# Los problemas de calidad de datos se acumulan en `ModeloSeccion.avisos`.
+import hashlib
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from dpe_geo import normalizar_provincia
+
+MESES_ORDENADOS_CFIA = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+
+def _huella(*partes):
+    # Identifica el contenido de un conjunto de datos; es la clave de memoización de sus figuras.
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            h.update(str(parte.dtype).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            h.update(repr(parte).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+@dataclass(frozen=True, eq=False)
+class DatosRadar:
+    etiquetas: tuple
+    valores: np.ndarray
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class SerieBCCR:
+    fechas: np.ndarray                # datetime64[ns], solo filas con fecha válida
+    tasa_basica_pasiva: np.ndarray    # float64 con NaN; None si la columna no viene en el JSON
+    tipo_cambio: np.ndarray
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class SerieMensual:
+    meses: tuple                      # en orden calendario (MESES_ORDENADOS_CFIA)
+    valores: np.ndarray               # float64 con NaN
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class TendenciaCFIA:
+    historico: tuple                  # ((nombre_serie, SerieMensual), ...)
+    real: SerieMensual
+    proyeccion: SerieMensual
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class VariacionProvincial:
+    provincias: tuple                 # ordenadas de mayor a menor variación
+    variacion: np.ndarray
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class MapaM2:
+    provincias: tuple                 # nombre tal como viene en el JSON
+    claves: tuple                     # normalizar_provincia(nombre), para unir con el GeoJSON
+    m2: np.ndarray                    # float64, 0 donde no había dato numérico
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class DesgloseObra:
+    tipo: str
+    meses: tuple
+    subtipos: tuple                   # ((nombre_subtipo, valores float64 sin NaN), ...)
+    huella: str = ""
+
+
+@dataclass(frozen=True, eq=False)
+class BarraMadurez:
+    etiqueta: str
+    valor: float
+    huella: str = ""
+
+
+@dataclass
+class ModeloSeccion:
+    # nombre -> (datos | None, aviso | None); los gráficos repetidos guardan un dict o
+    # una lista de esas tuplas ("desglose_obra" por tipo, "barras_madurez" por área).
+    graficos: dict = field(default_factory=dict)
+    avisos: list = field(default_factory=list)     # problemas de calidad de datos
+
+    def grafico(self, nombre):
+        return self.graficos.get(nombre, (None, None))
+
+
+def _es_lista_con_error(valor):
+    # El motor DPE marca un dataset fallido como [{"Error": "..."}].
+    return isinstance(valor, list) and len(valor) == 1 and isinstance(valor[0], dict) and bool(valor[0].get("Error"))
+
+
+def _a_numerico(serie, descripcion, avisos):
+    numerica = pd.to_numeric(serie, errors="coerce")
+    invalidos = int((numerica.isna() & serie.notna()).sum())
+    if invalidos:
+        avisos.append(f"{descripcion}: {invalidos} valor(es) no numérico(s) ignorado(s).")
+    return numerica.to_numpy(dtype=np.float64)
+
+
+def _ordenar_por_mes(df, descripcion, avisos):
+    desconocidos = sorted({str(m) for m in df["Mes"] if m not in MESES_ORDENADOS_CFIA})
+    if desconocidos:
+        avisos.append(f"{descripcion}: mes(es) no reconocido(s) descartado(s): {', '.join(desconocidos)}.")
+    df = df[df["Mes"].isin(MESES_ORDENADOS_CFIA)].copy()
+    df["Mes"] = pd.Categorical(df["Mes"], categories=MESES_ORDENADOS_CFIA, ordered=True)
+    return df.sort_values("Mes", kind="stable")
+
+
+def _serie_mensual(filas, columna, descripcion, avisos):
+    df = pd.DataFrame(filas)
+    if df.empty or "Mes" not in df.columns or columna not in df.columns:
+        return None
+    df = _ordenar_por_mes(df, descripcion, avisos)
+    valores = _a_numerico(df[columna], descripcion, avisos)
+    meses = tuple(df["Mes"].astype(str))
+    return SerieMensual(meses, valores, _huella(meses, valores))
+
+
+def normalizar_radar(radar_data_list, avisos):
+    if not (radar_data_list and isinstance(radar_data_list, list) and len(radar_data_list) >= 3):
+        return None, "Datos para gráfico radar no disponibles o insuficientes."
+    filas = [item for item in radar_data_list if isinstance(item, dict)]
+    etiquetas = tuple(str(item["label"]) for item in filas if item.get("label") is not None)
+    valores = []
+    for item in filas:
+        if item.get("value") is None:
+            continue
+        try:
+            valores.append(float(item["value"]))
+        except (ValueError, TypeError):
+            avisos.append(f"Radar de madurez: valor no numérico '{item['value']}' para '{item.get('label')}' (se usa 0).")
+            valores.append(0.0)
+    if not (etiquetas and valores and len(etiquetas) == len(valores)):
+        return None, "Datos para gráfico radar incompletos o con formato incorrecto."
+    valores = np.asarray(valores, dtype=np.float64)
+    return DatosRadar(etiquetas, valores, _huella(etiquetas, valores)), None
+
+
+def normalizar_bccr(datos_bccr, avisos):
+    if not (datos_bccr and isinstance(datos_bccr, list)) or _es_lista_con_error(datos_bccr):
+        return None, "No se encontraron datos para el gráfico BCCR en el JSON o los datos son inválidos/con error."
+    df_bccr = pd.DataFrame([fila for fila in datos_bccr if isinstance(fila, dict)])
+    if df_bccr.empty or "Fecha" not in df_bccr.columns:
+        return None, "Datos para gráfico BCCR en formato incorrecto (falta columna 'Fecha' o DataFrame vacío después de cargar)."
+    fechas = pd.to_datetime(df_bccr["Fecha"], errors="coerce")
+    if fechas.isna().any():
+        avisos.append(f"Indicadores BCCR: {int(fechas.isna().sum())} fila(s) con fecha no válida descartada(s).")
+        df_bccr, fechas = df_bccr[fechas.notna()], fechas[fechas.notna()]
+    columnas = {}
+    for col in ("Tasa_Basica_Pasiva", "Tipo_Cambio_Venta_Referencia"):
+        columnas[col] = _a_numerico(df_bccr[col], f"Indicadores BCCR ({col})", avisos) if col in df_bccr.columns else None
+    fechas = fechas.to_numpy(dtype="datetime64[ns]")
+    serie = SerieBCCR(fechas, columnas["Tasa_Basica_Pasiva"], columnas["Tipo_Cambio_Venta_Referencia"],
+                      _huella(fechas, columnas["Tasa_Basica_Pasiva"], columnas["Tipo_Cambio_Venta_Referencia"]))
+    return serie, None
+
+
+def normalizar_tendencia_cfia(tend_data, avisos):
+    sin_datos = "Datos para gráfico de tendencia M2 (CFIA) no disponibles o incompletos en el JSON."
+    if not (tend_data and isinstance(tend_data, dict)):
+        return None, sin_datos
+    proyeccion_raw = tend_data.get("actual_proyeccion")
+    if not tend_data.get("historico") and not tend_data.get("actual_real") and (not proyeccion_raw or _es_lista_con_error(proyeccion_raw)):
+        return None, sin_datos
+    historico = []
+    df_hist = pd.DataFrame(tend_data.get("historico", []))
+    if not df_hist.empty and "Mes" in df_hist.columns:
+        df_hist = _ordenar_por_mes(df_hist, "Tendencia CFIA (histórico)", avisos)
+        meses = tuple(df_hist["Mes"].astype(str))
+        for col_hist in df_hist.columns:
+            if col_hist != "Mes":
+                valores = _a_numerico(df_hist[col_hist], f"Tendencia CFIA (histórico {col_hist})", avisos)
+                historico.append((str(col_hist), SerieMensual(meses, valores, _huella(meses, valores))))
+    real = _serie_mensual(tend_data.get("actual_real", []), "Valor_Actual", "Tendencia CFIA (actual real)", avisos)
+    proyeccion = _serie_mensual(proyeccion_raw or [], "Valor_Proyeccion", "Tendencia CFIA (proyección)", avisos)
+    historico = tuple(historico)
+    huella = _huella(*(s.huella for _, s in historico), [n for n, _ in historico],
+                     real.huella if real else None, proyeccion.huella if proyeccion else None)
+    return TendenciaCFIA(historico, real, proyeccion, huella), None
+
+
+def normalizar_variacion_provincial(var_prov_data, avisos):
+    if not (var_prov_data and isinstance(var_prov_data, list)) or _es_lista_con_error(var_prov_data):
+        return None, "No hay datos disponibles para el gráfico de variación provincial CFIA en el JSON."
+    df_var_prov = pd.DataFrame(var_prov_data)
+    if "Provincia" not in df_var_prov.columns or "Variacion_%" not in df_var_prov.columns:
+        return None, "Datos para gráfico de variación provincial CFIA incompletos (faltan columnas 'Provincia' o 'Variacion_%')."
+    df_var_prov["Variacion_%"] = _a_numerico(df_var_prov["Variacion_%"], "Variación provincial CFIA", avisos)
+    df_var_prov = df_var_prov.dropna(subset=["Variacion_%"]).sort_values(by="Variacion_%", ascending=False, kind="stable")
+    if df_var_prov.empty:
+        return None, "No hay datos válidos para el gráfico de variación provincial CFIA después del preprocesamiento."
+    provincias = tuple(df_var_prov["Provincia"].astype(str))
+    variacion = df_var_prov["Variacion_%"].to_numpy(dtype=np.float64)
+    return VariacionProvincial(provincias, variacion, _huella(provincias, variacion)), None
+
+
+def normalizar_mapa_m2(mapa_data, avisos):
+    if not (mapa_data and isinstance(mapa_data, list)) or _es_lista_con_error(mapa_data):
+        return None, "No hay datos disponibles para el mapa coroplético de M² por provincia en el JSON."
+    df_mapa = pd.DataFrame(mapa_data)
+    if "Provincia_Compatible" not in df_mapa.columns or "m2_construidos" not in df_mapa.columns:
+        return None, "Datos para el mapa coroplético incompletos (faltan 'Provincia_Compatible' o 'm2_construidos')."
+    m2 = np.nan_to_num(_a_numerico(df_mapa["m2_construidos"], "Mapa M² provincial", avisos), nan=0.0)
+    provincias = tuple(df_mapa["Provincia_Compatible"].astype(str))
+    claves = tuple(normalizar_provincia(p) for p in provincias)
+    return MapaM2(provincias, claves, m2, _huella(provincias, m2)), None
+
+
+def normalizar_desglose_obra(tipo_obra, datos_obra, avisos):
+    if not (datos_obra and isinstance(datos_obra, list)):
+        return None, f"Datos para tipo de obra '{tipo_obra}' no disponibles o en formato incorrecto."
+    df_obra = pd.DataFrame(datos_obra)
+    if df_obra.empty or "Mes" not in df_obra.columns:  # 'Mes' es lo que se guarda desde Colab
+        return None, f"No hay datos válidos para graficar el tipo de obra: {tipo_obra} (faltan columnas o datos)."
+    df_obra = _ordenar_por_mes(df_obra, f"Desglose CFIA ({tipo_obra})", avisos)
+    meses = tuple(df_obra["Mes"].astype(str))
+    subtipos = tuple(
+        (str(col), np.nan_to_num(_a_numerico(df_obra[col], f"Desglose CFIA ({tipo_obra} / {col})", avisos), nan=0.0))
+        for col in df_obra.columns if col != "Mes")
+    huella = _huella(tipo_obra, meses, *(n for n, _ in subtipos), *(v for _, v in subtipos))
+    return DesgloseObra(str(tipo_obra), meses, subtipos, huella), None
+
+
+def normalizar_barra_madurez(graf_data, area_titulo, avisos):
+    if not (isinstance(graf_data, dict) and graf_data.get("label") and graf_data.get("value") is not None):
+        return None, None
+    try:
+        valor = float(graf_data["value"])
+    except (ValueError, TypeError):
+        aviso = f"Valor no numérico para gráfico de barra en '{area_titulo}': {graf_data['value']}"
+        avisos.append(aviso)
+        return None, aviso
+    etiqueta = str(graf_data["label"])
+    return BarraMadurez(etiqueta, valor, _huella(etiqueta, valor)), None
+
+
+def _protegido(modelo, descripcion, normalizador, *args):
+    # Un dataset con una forma inesperada no debe impedir cargar el informe: su error
+    # queda como aviso de ese gráfico y la sección lo muestra en su lugar.
+    try:
+        return normalizador(*args, modelo.avisos)
+    except Exception as e:
+        aviso = f"Error al procesar los datos de {descripcion}: {e}"
+        modelo.avisos.append(aviso)
+        return None, aviso
+
+
+def _normalizar_resumen_ejecutivo(data, modelo):
+    radar = data.get("madurez_global", {}).get("grafico_radar_data", [])
+    modelo.graficos["radar"] = _protegido(modelo, "gráfico radar", normalizar_radar, radar)
+
+
+def _normalizar_analisis_externo(data, modelo):
+    sec_macro = data.get("macroentorno_data", {})
+    sec_cfia = data.get("sector_industria_data", {})
+    modelo.graficos["bccr"] = _protegido(modelo, "indicadores BCCR", normalizar_bccr,
+                                         sec_macro.get("grafico_bccr_data", []))
+    modelo.graficos["tendencia_cfia"] = _protegido(modelo, "tendencia CFIA", normalizar_tendencia_cfia,
+                                                   sec_cfia.get("grafico_tendencia_m2_data", {}))
+    modelo.graficos["variacion_provincial"] = _protegido(modelo, "variación provincial CFIA", normalizar_variacion_provincial,
+                                                         sec_cfia.get("grafico_variacion_provincial_data", []))
+    modelo.graficos["mapa_m2"] = _protegido(modelo, "mapa M² provincial", normalizar_mapa_m2,
+                                            sec_cfia.get("mapa_m2_provincial_data", []))
+    desglose = sec_cfia.get("graficos_desglose_obra_data", {})
+    if desglose and isinstance(desglose, dict):
+        modelo.graficos["desglose_obra"] = {
+            tipo: _protegido(modelo, f"desglose CFIA ({tipo})", normalizar_desglose_obra, tipo, datos)
+            for tipo, datos in desglose.items()}
+
+
+def _normalizar_diagnostico_interno(data, modelo):
+    areas = data.get("evaluacion_detallada_areas", {}).get("lista_areas_evaluacion_data", [])
+    modelo.graficos["barras_madurez"] = [
+        _protegido(modelo, f"madurez ({area.get('titulo_area_display_pdf_style', 'Área no especificada')})",
+                   normalizar_barra_madurez, area.get("grafico_barra_madurez_data", {}),
+                   area.get("titulo_area_display_pdf_style", "Área no especificada"))
+        for area in areas]
+
+
+_NORMALIZADORES = {
+    "resumen_ejecutivo": _normalizar_resumen_ejecutivo,
+    "analisis_entorno_externo": _normalizar_analisis_externo,
+    "diagnostico_interno": _normalizar_diagnostico_interno,
+}
+
+
+def normalizar_seccion(clave, data):
+    """Modelo de una sección (vacío si la sección no tiene gráficos)."""
+    modelo = ModeloSeccion()
+    normalizador = _NORMALIZADORES.get(clave)
+    if normalizador and isinstance(data, dict):
+        try:
+            normalizador(data, modelo)
+        except Exception as e:  # estructura de la sección inesperada (no de un dataset concreto)
+            modelo.avisos.append(f"Error al procesar los gráficos de la sección '{clave}': {e}")
+    return modelo
+
+
+class ModeloReporte:
+    """Modelos de sección de un informe, normalizados una vez y compartidos entre sesiones.
+
+    Con un informe cargado completo se llama a `normalizar_todo()` al cargarlo;
+    con un ReporteDiferido cada sección se normaliza al decodificarse.
+    """
+
+    def __init__(self, json_data, huella=None):
+        self._json_data = json_data
+        self.huella = huella  # hash del contenido del informe (clave de los fragmentos precompilados)
+        self._secciones = {}
+        self._lock = threading.Lock()
+
+    def seccion(self, clave):
+        modelo = self._secciones.get(clave)
+        if modelo is None:
+            with self._lock:
+                modelo = self._secciones.get(clave)
+                if modelo is None:
+                    modelo = normalizar_seccion(clave, self._json_data.get(clave, {}))
+                    self._secciones[clave] = modelo
+        return modelo
+
+    def normalizar_todo(self):
+        for clave in _NORMALIZADORES:
+            if clave in self._json_data:
+                self.seccion(clave)
+        return self
+
+    def avisos(self):
+        """(clave de sección, aviso) de las secciones ya normalizadas."""
+        return [(clave, aviso) for clave, modelo in list(self._secciones.items()) for aviso in modelo.avisos]
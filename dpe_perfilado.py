@@ -0,0 +1,114 @@
+# Perfilado profundo de reruns completos (opcional, solo para administración).
+# Con el perfilado activo, cada rerun completo del script se ejecuta bajo cProfile
+# y tracemalloc y deja en DPE_PERFILADO_DIR:
+#   - <marca>.pstats: estadísticas de cProfile (snakeviz, `python -m pstats`);
+#   - <marca>.txt: funciones con más tiempo acumulado y las líneas que más memoria
+#     retuvieron durante el rerun (diferencia entre instantáneas de tracemalloc).
+# Desactivado no instala ningún hook: app.py solo consulta una bandera.
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+# "1" perfila todos los reruns completos; si no, un administrador lo activa con ?perfilar=1.
+PERFILADO = os.environ.get("DPE_PERFILADO", "0") == "1"
+PERFILADO_DIR = os.environ.get("DPE_PERFILADO_DIR", os.path.join(".cache", "perfiles"))
+PERFILADO_TOP = int(os.environ.get("DPE_PERFILADO_TOP", "25"))
+PERFILADO_MAX_ARCHIVOS = int(os.environ.get("DPE_PERFILADO_MAX_ARCHIVOS", "20"))
+
+# tracemalloc es global del proceso: solo se perfila un rerun a la vez (las
+# asignaciones de otras sesiones concurrentes también aparecerían en la diferencia).
+_lock = threading.Lock()
+_activo = None
+_FILTROS_MEMORIA = (tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                    tracemalloc.Filter(False, "<unknown>"))
+
+
+class PerfilRerun:
+    """cProfile + tracemalloc de un rerun: iniciar() al principio del script y detener() al final."""
+
+    def __init__(self, etiqueta, carpeta=PERFILADO_DIR, top=PERFILADO_TOP):
+        self.etiqueta = re.sub(r"[^\w.-]+", "_", etiqueta)
+        self.carpeta = carpeta
+        self.top = top
+        self._perfil = None
+        self._propio_tracemalloc = False
+
+    def iniciar(self):
+        """Empieza a perfilar; devuelve False si otro rerun se está perfilando."""
+        global _activo
+        with _lock:
+            if _activo is not None:
+                # Un rerun interrumpido (st.rerun, st.stop, excepción) no llega a detener();
+                # si su hilo ya terminó, se guarda lo medido y se libera el perfilador.
+                if _activo._hilo.is_alive():
+                    return False
+                _activo._finalizar(interrumpido=True)
+            self._hilo = threading.current_thread()
+            _activo = self
+        self._propio_tracemalloc = not tracemalloc.is_tracing()
+        if self._propio_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._antes = tracemalloc.take_snapshot()
+        self._inicio = time.perf_counter()
+        self._perfil = cProfile.Profile()
+        self._perfil.enable()
+        return True
+
+    def detener(self):
+        """Deja de perfilar y escribe los archivos; devuelve la ruta base (sin extensión)."""
+        with _lock:
+            return self._finalizar()
+
+    def _finalizar(self, interrumpido=False):
+        global _activo
+        self._perfil.disable()
+        segundos = time.perf_counter() - self._inicio
+        despues = tracemalloc.take_snapshot()
+        pico = tracemalloc.get_traced_memory()[1]
+        if self._propio_tracemalloc:
+            tracemalloc.stop()
+        _activo = None
+
+        os.makedirs(self.carpeta, exist_ok=True)
+        marca = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(self.carpeta, f"{marca}_{self.etiqueta}" + ("_interrumpido" if interrumpido else ""))
+        self._perfil.dump_stats(base + ".pstats")
+
+        salida = io.StringIO()
+        salida.write(f"Rerun {self.etiqueta}{' (interrumpido)' if interrumpido else ''}: "
+                     f"{segundos * 1000:,.0f} ms, pico de memoria de Python {pico / 1024**2:,.1f} MB\n\n")
+        salida.write(f"== Memoria retenida por línea (top {self.top}) ==\n")
+        diferencias = despues.filter_traces(_FILTROS_MEMORIA).compare_to(self._antes.filter_traces(_FILTROS_MEMORIA), "lineno")
+        for estadistica in diferencias[:self.top]:
+            salida.write(f"{estadistica}\n")
+        salida.write(f"\n== Tiempo acumulado por función (top {self.top}) ==\n")
+        pstats.Stats(self._perfil, stream=salida).sort_stats("cumulative").print_stats(self.top)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(salida.getvalue())
+        _rotar(self.carpeta)
+        return base
+
+
+def _rotar(carpeta, maximo=PERFILADO_MAX_ARCHIVOS):
+    for base in listar_perfiles(carpeta)[maximo:]:
+        for extension in (".pstats", ".txt"):
+            try:
+                os.remove(base + extension)
+            except OSError:
+                pass
+
+
+def listar_perfiles(carpeta=PERFILADO_DIR):
+    """Rutas base (sin extensión) de los perfiles guardados, del más reciente al más antiguo."""
+    if not os.path.isdir(carpeta):
+        return []
+    return sorted((os.path.join(carpeta, nombre[:-len(".pstats")]) for nombre in os.listdir(carpeta)
+                   if nombre.endswith(".pstats")), reverse=True)
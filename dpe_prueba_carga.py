@@ -0,0 +1,341 @@
+# Prueba de carga con sesiones concurrentes contra un servidor de la app.
+# Cada sesión virtual habla el mismo protocolo que el navegador (WebSocket
+# /_stcore/stream con mensajes BackMsg/ForwardMsg y subida por /_stcore/upload_file):
+# sube un informe del corpus, recorre todas las secciones de tab_titles_map y activa
+# y desactiva los datos JSON crudos. Se mide la latencia de cada rerun (desde que se
+# envía hasta que llega script_finished), el RSS del servidor y el throughput.
+#
+#   python dpe_prueba_carga.py --sesiones 20 --rampa 5
+#   python dpe_prueba_carga.py --url http://servidor:8501 --pid 1234 --corpus informes/ --mezcla "*.json=3" "*.json.gz=1"
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+import requests
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect
+
+from dpe_carga import EXTENSIONES_SUBIDA
+
+# Mezcla de tamaños por defecto cuando no se da un corpus (informes sintéticos de dpe_benchmark.PERFILES).
+MEZCLA_SINTETICA = {"pequeno.json": 6, "mediano.json": 3, "grande.json": 1}
+CLAVE_SUBIDA, CLAVE_SECCION, CLAVE_DATOS_CRUDOS = "dpe_json_uploader", "seccion_activa", "show_json_data"
+PERCENTILES = (50, 95, 99)
+
+
+def rss_proceso(pid):
+    """RSS en bytes del proceso (Linux, /proc); None si no se puede leer."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def elegir_informes(corpus, mezcla, cantidad, semilla):
+    """`cantidad` rutas del corpus según la mezcla {patrón glob: peso} (un archivo al azar dentro de cada patrón)."""
+    archivos = sorted(nombre for nombre in os.listdir(corpus)
+                      if any(nombre.endswith(f".{extension}") for extension in EXTENSIONES_SUBIDA))
+    grupos = {patron: [os.path.join(corpus, a) for a in archivos if fnmatch.fnmatch(a, patron)] for patron in mezcla}
+    vacios = [patron for patron, rutas in grupos.items() if not rutas]
+    if vacios:
+        raise SystemExit(f"Ningún archivo de {corpus} coincide con: {', '.join(vacios)}")
+    rng = random.Random(semilla)
+    patrones = list(grupos)
+    return [rng.choice(grupos[patron]) for patron in rng.choices(patrones, [mezcla[p] for p in patrones], k=cantidad)]
+
+
+class SesionVirtual:
+    """Una pestaña del navegador: mantiene el estado de los widgets y mide cada rerun."""
+
+    def __init__(self, url, xsrf, timeout_s):
+        self.url = url.rstrip("/")
+        self.xsrf = xsrf
+        self.timeout_s = timeout_s
+        self.id_sesion = None
+        self.query_string = ""
+        self.widgets = {}  # clave del widget -> (id, proto del elemento, fragment_id)
+        self.estados = {}  # id del widget -> WidgetState que se envía en cada rerun
+        self.reruns = []
+        self.errores = []
+        self._ws = None
+
+    async def __aenter__(self):
+        url_ws = self.url.replace("http", "ws", 1) + "/_stcore/stream"
+        self._ws = await connect(url_ws, subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout_s)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._ws.close()
+
+    async def _recibir(self):
+        datos = await asyncio.wait_for(self._ws.recv(), self.timeout_s)
+        mensaje = ForwardMsg()
+        mensaje.ParseFromString(datos)
+        return mensaje, len(datos)
+
+    def _procesar(self, mensaje):
+        tipo = mensaje.WhichOneof("type")
+        if tipo == "new_session":
+            self.id_sesion = mensaje.new_session.initialize.session_id
+        elif tipo == "page_info_changed":
+            self.query_string = mensaje.page_info_changed.query_string
+        elif tipo == "delta" and mensaje.delta.WhichOneof("type") == "new_element":
+            elemento = mensaje.delta.new_element
+            tipo_elemento = elemento.WhichOneof("type")
+            if tipo_elemento == "exception":
+                self.errores.append(elemento.exception.message)
+            id_widget = getattr(getattr(elemento, tipo_elemento), "id", "")
+            for clave in (CLAVE_SUBIDA, CLAVE_SECCION, CLAVE_DATOS_CRUDOS):
+                if id_widget.endswith(f"-{clave}"):
+                    self.widgets[clave] = (id_widget, getattr(elemento, tipo_elemento), mensaje.delta.fragment_id)
+
+    async def rerun(self, tipo, detalle="", fragmento=""):
+        """Pide un rerun con el estado actual de los widgets y espera a script_finished."""
+        mensaje = BackMsg()
+        estado = mensaje.rerun_script
+        estado.query_string = self.query_string
+        estado.page_script_hash = ""
+        estado.fragment_id = fragmento
+        estado.widget_states.widgets.extend(self.estados.values())
+        inicio = time.perf_counter()
+        await self._ws.send(mensaje.SerializeToString())
+        recibidos = 0
+        while True:
+            respuesta, tamano = await self._recibir()
+            recibidos += tamano
+            self._procesar(respuesta)
+            if respuesta.WhichOneof("type") == "script_finished":
+                break
+        self.reruns.append({"tipo": tipo, "detalle": detalle, "ms": (time.perf_counter() - inicio) * 1000,
+                            "bytes": recibidos, "fin": time.time()})
+
+    async def subir(self, ruta):
+        """Sube el archivo como lo hace st.file_uploader y hace el rerun con el archivo seleccionado."""
+        nombre = os.path.basename(ruta)
+        mensaje = BackMsg()
+        mensaje.file_urls_request.request_id = uuid.uuid4().hex
+        mensaje.file_urls_request.file_names.append(nombre)
+        mensaje.file_urls_request.session_id = self.id_sesion
+        await self._ws.send(mensaje.SerializeToString())
+        while True:
+            respuesta, _ = await self._recibir()
+            if respuesta.WhichOneof("type") == "file_urls_response":
+                urls = respuesta.file_urls_response.file_urls[0]
+                break
+            self._procesar(respuesta)
+
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        url_subida = urls.upload_url if urls.upload_url.startswith("http") else self.url + urls.upload_url
+        respuesta_http = await asyncio.to_thread(
+            requests.put, url_subida, files={"file": (nombre, datos, "application/octet-stream")},
+            headers={"X-Xsrftoken": self.xsrf}, cookies={"_streamlit_xsrf": self.xsrf}, timeout=self.timeout_s)
+        respuesta_http.raise_for_status()
+
+        estado = WidgetState(id=self.widgets[CLAVE_SUBIDA][0])
+        archivo = estado.file_uploader_state_value.uploaded_file_info.add()
+        archivo.name, archivo.size, archivo.file_id = nombre, len(datos), urls.file_id
+        archivo.file_urls.CopyFrom(urls)
+        self.estados[estado.id] = estado
+        await self.rerun("subida", f"{nombre} ({len(datos) / 1024:,.0f} KB)")
+
+    async def recorrer_secciones(self):
+        if CLAVE_SECCION not in self.widgets:
+            return  # modo "pestanas": la subida ya renderizó todas las secciones
+        id_widget, radio, fragmento = self.widgets[CLAVE_SECCION]
+        for titulo in radio.options:
+            self.estados[id_widget] = WidgetState(id=id_widget, string_value=titulo)
+            await self.rerun("seccion", titulo)
+
+    async def alternar_datos_crudos(self):
+        for valor in (True, False):
+            id_widget, _, fragmento = self.widgets[CLAVE_DATOS_CRUDOS]
+            self.estados[id_widget] = WidgetState(id=id_widget, bool_value=valor)
+            await self.rerun("datos_crudos", "mostrar" if valor else "ocultar", fragmento)
+
+
+async def recorrido(url, xsrf, ruta, vueltas, timeout_s, retraso_s=0.0):
+    """Flujo completo de un consultor; devuelve la SesionVirtual con sus reruns medidos."""
+    await asyncio.sleep(retraso_s)
+    async with SesionVirtual(url, xsrf, timeout_s) as sesion:
+        try:
+            await sesion.rerun("inicial")
+            await sesion.subir(ruta)
+            for _ in range(vueltas):
+                await sesion.recorrer_secciones()
+                await sesion.alternar_datos_crudos()
+        except Exception as exc:  # una sesión fallida no detiene la prueba; se reporta
+            sesion.errores.append(f"{type(exc).__name__}: {exc}")
+    return sesion
+
+
+async def muestrear_rss(pid, muestras, intervalo_s=0.25):
+    while True:
+        rss = rss_proceso(pid)
+        if rss is not None:
+            muestras.append((time.time(), rss))
+        await asyncio.sleep(intervalo_s)
+
+
+def _tabla_latencias(titulo, grupos):
+    print(f"\n{titulo:<34}{'n':>6}" + "".join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'máx':>9}  (ms)")
+    for nombre, valores in grupos.items():
+        print(f"  {nombre[:32]:<32}{len(valores):>6}" + "".join(f"{v:>9.0f}" for v in np.percentile(valores, PERCENTILES))
+              + f"{max(valores):>9.0f}")
+
+
+def _resumen(valores):
+    return dict({f"p{p}_ms": float(v) for p, v in zip(PERCENTILES, np.percentile(valores, PERCENTILES))},
+                n=len(valores), max_ms=float(max(valores)))
+
+
+def lanzar_servidor(puerto, timeout_s=60):
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    proceso = subprocess.Popen([sys.executable, "-m", "streamlit", "run", app, "--server.headless=true",
+                                f"--server.port={puerto}", "--browser.gatherUsageStats=false",
+                                "--server.runOnSave=false", "--server.fileWatcherType=none", "--server.enableStaticServing=true"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://localhost:{puerto}"
+    limite = time.monotonic() + timeout_s
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise SystemExit(f"El servidor terminó al arrancar (código {proceso.returncode}).")
+        try:
+            if requests.get(url + "/_stcore/health", timeout=1).ok:
+                return proceso, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    proceso.terminate()
+    raise SystemExit(f"El servidor no respondió en {timeout_s} s.")
+
+
+async def prueba(args, url, pid, informes):
+    xsrf = requests.get(url + "/_stcore/health", timeout=args.timeout).cookies.get("_streamlit_xsrf", "")
+    if args.calentamiento:
+        # Importaciones y cachés del proceso: no se cuentan como crecimiento por sesión.
+        await recorrido(url, xsrf, min(set(informes), key=os.path.getsize), 1, args.timeout)
+    rss_base = rss_proceso(pid) if pid else None
+    muestras = []
+    muestreo = asyncio.create_task(muestrear_rss(pid, muestras)) if pid else None
+    inicio = time.time()
+    paso = args.rampa / max(1, args.sesiones - 1) if args.sesiones > 1 else 0
+    sesiones = await asyncio.gather(*(recorrido(url, xsrf, ruta, args.vueltas, args.timeout, i * paso)
+                                      for i, ruta in enumerate(informes)))
+    duracion = time.time() - inicio
+    await asyncio.sleep(1)  # deja que el servidor procese los cierres antes de la última muestra
+    rss_final = rss_proceso(pid) if pid else None
+    if muestreo is not None:
+        muestreo.cancel()
+    return sesiones, duracion, rss_base, max((rss for _, rss in muestras), default=None), rss_final
+
+
+def main():
+    from dpe_benchmark import PERFILES
+    from dpe_sintetico import generar_informe
+
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con sesiones concurrentes.")
+    parser.add_argument("--url", help="Servidor ya en marcha (p. ej. http://localhost:8501). Sin --url se lanza uno local.")
+    parser.add_argument("--pid", type=int, help="PID del servidor de --url, para medir su RSS.")
+    parser.add_argument("--puerto", type=int, default=8599, help="Puerto del servidor local.")
+    parser.add_argument("--sesiones", type=int, default=10, help="Sesiones concurrentes.")
+    parser.add_argument("--rampa", type=float, default=2.0, help="Segundos en los que se reparten los inicios de sesión.")
+    parser.add_argument("--vueltas", type=int, default=1, help="Recorridos completos de secciones por sesión.")
+    parser.add_argument("--corpus", help="Carpeta con informes (.json, .json.gz, ...). Por defecto, informes sintéticos.")
+    parser.add_argument("--mezcla", nargs="+", metavar="PATRON=PESO",
+                        help="Mezcla de tamaños: patrones glob del corpus con su peso (por defecto todos con peso 1).")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="Segundos máximos de espera por rerun.")
+    parser.add_argument("--sin-calentamiento", dest="calentamiento", action="store_false",
+                        help="No ejecuta una sesión previa (sin medir) para cargar importaciones y cachés.")
+    parser.add_argument("--salida", help="JSON con todos los reruns medidos y el resumen.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = carpeta
+            for perfil, parametros in PERFILES.items():
+                with open(os.path.join(carpeta, f"{perfil}.json"), "w", encoding="utf-8") as f:
+                    json.dump(generar_informe(**parametros), f, ensure_ascii=False)
+        if args.mezcla:
+            mezcla = {patron: float(peso) for patron, _, peso in (m.rpartition("=") for m in args.mezcla)}
+        else:
+            mezcla = MEZCLA_SINTETICA if args.corpus is None else {"*": 1.0}
+        informes = elegir_informes(corpus, mezcla, args.sesiones, args.semilla)
+
+        proceso = None
+        url, pid = args.url, args.pid
+        if url is None:
+            proceso, url = lanzar_servidor(args.puerto)
+            pid = proceso.pid
+        try:
+            sesiones, duracion, rss_base, rss_pico, rss_final = asyncio.run(prueba(args, url, pid, informes))
+        finally:
+            if proceso is not None:
+                proceso.terminate()
+                proceso.wait()
+
+    reruns = [r for s in sesiones for r in s.reruns]
+    errores = [e for s in sesiones for e in s.errores]
+    print(f"Servidor {url} · {args.sesiones} sesiones en {args.rampa:g} s · {args.vueltas} vuelta(s) · mezcla {mezcla}")
+    print(f"Reruns: {len(reruns)} en {duracion:.1f} s ({len(reruns) / duracion:.1f} reruns/s, "
+          f"{args.sesiones / duracion * 60:.1f} sesiones/min) · {sum(r['bytes'] for r in reruns) / 1024**2:,.1f} MB recibidos "
+          f"· {len(errores)} errores")
+    if not reruns:
+        return 1
+    por_tipo = {}
+    for r in reruns:
+        por_tipo.setdefault(r["tipo"], []).append(r["ms"])
+    por_tipo["total"] = [r["ms"] for r in reruns]
+    _tabla_latencias("Latencia de rerun por tipo", por_tipo)
+    por_seccion = {}
+    for r in reruns:
+        if r["tipo"] == "seccion":
+            por_seccion.setdefault(r["detalle"], []).append(r["ms"])
+    if por_seccion:
+        _tabla_latencias("Latencia por sección", por_seccion)
+    por_informe = {}
+    for r in reruns:
+        if r["tipo"] == "subida":
+            por_informe.setdefault(r["detalle"], []).append(r["ms"])
+    _tabla_latencias("Latencia de subida por informe", por_informe)
+
+    memoria = None
+    if rss_base is not None and rss_pico is not None:
+        memoria = {"base_mb": rss_base / 1024**2, "pico_mb": rss_pico / 1024**2, "final_mb": rss_final / 1024**2,
+                   "por_sesion_mb": (rss_pico - rss_base) / 1024**2 / args.sesiones}
+        print(f"\nRSS del servidor: base {memoria['base_mb']:,.0f} MB · pico {memoria['pico_mb']:,.0f} MB "
+              f"(+{memoria['pico_mb'] - memoria['base_mb']:,.0f} MB, {memoria['por_sesion_mb']:,.1f} MB por sesión) · "
+              f"al terminar {memoria['final_mb']:,.0f} MB")
+    else:
+        print("\nRSS del servidor: no disponible (indique --pid del servidor, solo Linux).")
+    for error in errores[:10]:
+        print(f"  error: {error}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "mezcla": mezcla, "duracion_s": duracion, "memoria": memoria,
+                       "latencias": {tipo: _resumen(valores) for tipo, valores in por_tipo.items()},
+                       "secciones": {titulo: _resumen(valores) for titulo, valores in por_seccion.items()},
+                       "errores": errores, "reruns": reruns}, f, ensure_ascii=False, indent=1)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,737 @@
+# Funciones de renderizado de las secciones del informe DPE.
+# Cada render_* recibe el sub-árbol JSON de su sección y un objeto `ui` con la
+# API de Streamlit que usan (por defecto el propio `st`). Así app.py las llama
+# tal cual y dpe_batch.py las reutiliza con un destino HTML estático.
+# render_seccion interpone UIAgrupada (dpe_ui.py), que junta el markdown consecutivo.
+import json
+import os
+import time
+from html import escape
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import dpe_geo
+from dpe_marca import fuente_logo
+from dpe_metricas import MedidorMensajes
+from dpe_modelo import ModeloReporte, normalizar_seccion
+from dpe_ui import (UIAgrupada, FragmentoNoCompilable, compilar_fragmento, emitir_fragmento,
+                    fragmentos_cache, tamano_fragmento)
+from dpe_figuras import (construir_figura_radar, construir_figura_bccr, construir_figura_tendencia_cfia,
+                         construir_figura_variacion_provincial, construir_figura_mapa_m2,
+                         construir_figura_desglose_obra, construir_figura_barra_madurez,
+                         construir_figura_desglose_obra_compacta, construir_figura_barras_madurez_compacta,
+                         descripcion_muestreo_serie, usar_graficos_compactos)
+from dpe_tema import (COLOR_VERDE_ECO, COLOR_GRIS_ECO, COLOR_TEXTO_TITULO_PRINCIPAL_CSS,
+                      COLOR_TEXTO_SUTIL_CSS, LOGO_PATH, logo_exists_at_path)
+
+# Secciones de texto estático: se compilan una vez por informe a un fragmento saneado
+# (dpe_ui.GrabadorFragmento) y se emiten con una sola llamada.
+SECCIONES_ESTATICAS = {"portada", "introduccion_contexto", "formulacion_estrategica",
+                       "consideraciones_implementacion", "conclusiones_finales", "glosario"}
+
+# Mapa coroplético: "teselas" (mapa base carto-positron), "offline" (solo geometría local, sin red)
+# o "auto" (teselas si el servidor de teselas responde, offline si no). En "auto" quien sondea
+# es el servidor de la app, no el navegador: con clientes sin acceso a las teselas hay que usar "offline".
+MAPA_MODO = os.environ.get("DPE_MAPA_MODO", "auto")
+
+
+def render_portada(data, ui=st, modelo=None):
+    ui.markdown(f"<div style='padding: 20px; text-align:center;'>", unsafe_allow_html=True)
+    ui.markdown(f"<h2 style='color: {COLOR_TEXTO_TITULO_PRINCIPAL_CSS}; font-size: 2.5em; margin-top: 50px;'>{escape(str(data.get('titulo_principal_texto', 'Título Portada')))}</h2>", unsafe_allow_html=True)
+    ui.markdown(f"<p style='font-size: 1.8em; color: {COLOR_TEXTO_TITULO_PRINCIPAL_CSS};'>{escape(str(data.get('preparado_para_texto', 'Preparado para:')))} <b style='color:{COLOR_VERDE_ECO}'>{escape(str(data.get('nombre_cliente_texto', ui.session_state.nombre_cliente)))}</b></p>", unsafe_allow_html=True)
+    
+    metadatos_informe_local = ui.session_state.get("metadatos_informe") or {}
+    
+    ui.markdown(f"<p style='font-size: 1.1em; color: {COLOR_GRIS_ECO}; margin-bottom: 100px;'>{escape(str(data.get('fecha_diagnostico_texto', metadatos_informe_local.get('fecha_diagnostico', 'N/A'))))}</p>", unsafe_allow_html=True)
+
+    if logo_exists_at_path:
+        try:
+            ui.image(fuente_logo("portada", st.get_option("server.enableStaticServing")), width=250)
+        except Exception as e:
+            ui.markdown(f"<p style='font-size: 0.8em; color: {COLOR_TEXTO_SUTIL_CSS};'>(Error al mostrar logo de portada con st.image: {escape(str(e))}. Ruta: {escape(LOGO_PATH)})</p>", unsafe_allow_html=True)
+    else:
+        ui.markdown(f"<p style='font-size: 0.8em; color: {COLOR_TEXTO_SUTIL_CSS};'>(Logo de portada no encontrado en '{escape(LOGO_PATH)}')</p>", unsafe_allow_html=True)
+
+    ui.markdown(f"<p style='font-size: 0.9em; color: {COLOR_GRIS_ECO}; margin-top: 100px;'>{escape(str(data.get('footer_linea1_texto', 'Un informe de ECO Consultores')))}</p>", unsafe_allow_html=True)
+    version_dpe_info = metadatos_informe_local.get("version_dpe", "N/A")
+    default_footer_line2_text = f'Herramienta DPE {version_dpe_info}'
+    footer_line2_content = data.get('footer_linea2_texto', default_footer_line2_text)
+    ui.markdown(f"<p style='font-size: 0.9em; color: {COLOR_GRIS_ECO};'>{escape(str(footer_line2_content))}</p>", unsafe_allow_html=True)
+    ui.markdown("</div>", unsafe_allow_html=True)
+
+def render_glosario(data, ui=st, modelo=None):
+    ui.header(data.get('titulo_seccion_texto', 'X. Glosario de Términos')) 
+    ui.markdown("---")
+    if not data.get("lista_terminos_data"):
+        ui.info("No hay términos en el glosario para mostrar.")
+        return
+    for item in data.get("lista_terminos_data", []):
+        term = item.get('termino_texto', 'N/A')
+        definition = item.get('definicion_texto', 'N/A')
+        with ui.container(): # Usar ui.container para agrupar visualmente
+            ui.markdown(f"**{term}**")
+            ui.markdown(definition)
+            ui.markdown("---") # Separador después de cada definición
+
+def render_resumen_ejecutivo(data_re, ui=st, modelo=None):
+    modelo = modelo or normalizar_seccion("resumen_ejecutivo", data_re)
+    ui.header(data_re.get('titulo_seccion_texto', "I. Resumen Ejecutivo Gerencial"))
+    # ... (el resto de tu función render_resumen_ejecutivo como la tienes) ...
+    # ... (incluyendo el gráfico radar y las subsecciones) ...
+    sec_proposito = data_re.get("proposito_alcance", {})
+    ui.subheader(sec_proposito.get('subtitulo_texto', '1.1. Propósito y Alcance'))
+    ui.write(sec_proposito.get('parrafo_texto', 'N/A'))
+    sec_madurez_global = data_re.get("madurez_global", {})
+    ui.subheader(sec_madurez_global.get('subtitulo_texto', '1.2. Nivel de Madurez Global'))
+    ui.write(sec_madurez_global.get('parrafo_texto', 'N/A'))
+    datos_radar, aviso_radar = modelo.grafico("radar")
+    if datos_radar is not None:
+        fig_radar, aviso_radar = construir_figura_radar(
+            datos_radar, sec_madurez_global.get("grafico_radar_titulo_sugerido", "Nivel de Madurez por Área (%)"))
+        if fig_radar:
+            ui.plotly_chart(fig_radar, use_container_width=True)
+            ui.caption(sec_madurez_global.get("grafico_radar_caption_texto", 
+                                              sec_madurez_global.get("grafico_radar_titulo_sugerido", "")))
+        else:
+            ui.caption(aviso_radar)
+    else:
+        ui.caption(aviso_radar)
+    sub_secciones_resumen = ["hallazgos_area", "foda_interno", "foda_externo", 
+                             "lineamientos_estrategicos", "conclusion_resumen_ejecutivo"]
+    for sub_key in sub_secciones_resumen:
+        sub_data = data_re.get(sub_key, {})
+        if sub_data: 
+            ui.subheader(sub_data.get('subtitulo_texto', sub_key.replace("_", " ").title())) 
+            if "parrafo_texto" in sub_data: ui.write(sub_data.get('parrafo_texto'))
+            if "parrafo_intro_texto" in sub_data: ui.write(sub_data.get('parrafo_intro_texto'))
+            if "lista_textos_hallazgos" in sub_data:
+                for item in sub_data.get("lista_textos_hallazgos", []): ui.markdown(f"• {item}")
+            if "fortalezas_lista_textos" in sub_data:
+                ui.markdown(f"**{sub_data.get('fortalezas_titulo_texto','Fortalezas:')}**")
+                for item in sub_data.get("fortalezas_lista_textos", []): ui.markdown(f"• {item}")
+            if "debilidades_lista_textos" in sub_data:
+                ui.markdown(f"**{sub_data.get('debilidades_titulo_texto','Debilidades:')}**")
+                for item in sub_data.get("debilidades_lista_textos", []): ui.markdown(f"• {item}")
+            if "oportunidades_lista_textos" in sub_data:
+                ui.markdown(f"**{sub_data.get('oportunidades_titulo_texto','Oportunidades:')}**")
+                for item in sub_data.get("oportunidades_lista_textos", []): ui.markdown(f"• {item}")
+            if "amenazas_lista_textos" in sub_data:
+                ui.markdown(f"**{sub_data.get('amenazas_titulo_texto','Amenazas:')}**")
+                for item in sub_data.get("amenazas_lista_textos", []): ui.markdown(f"• {item}")
+            if "lista_lineamientos_textos" in sub_data:
+                 for item in sub_data.get("lista_lineamientos_textos", []): ui.markdown(f"• {item}")
+            ui.markdown("---")
+
+def render_introduccion_contexto(data, ui=st, modelo=None):
+    # ... (tu código de render_introduccion_contexto se mantiene igual) ...
+    ui.header(data.get('titulo_seccion_texto', "II. Introducción y Contexto del Diagnóstico"))
+    seccion_presentacion = data.get("presentacion_cliente", {})
+    ui.subheader(seccion_presentacion.get('subtitulo_texto', "A. Presentación"))
+    for key, val in seccion_presentacion.items():
+        if key not in ['subtitulo_texto', 'titulo_seccion_texto'] and isinstance(val, str): 
+            ui.markdown(f"**{key.replace('_texto', '').replace('_', ' ').title()}:** {val}")
+    ui.markdown("---")
+    seccion_objetivos = data.get("objetivos_dpe", {})
+    ui.subheader(seccion_objetivos.get('subtitulo_texto', "B. Objetivos DPE"))
+    ui.write(seccion_objetivos.get('parrafo_intro_texto', ""))
+    for item in seccion_objetivos.get('lista_objetivos_textos', []): ui.markdown(f"• {item}")
+    ui.markdown("---")
+    seccion_alcance = data.get("alcance_metodologia", {})
+    ui.subheader(seccion_alcance.get('subtitulo_texto', "C. Alcance y Metodología"))
+    ui.write(seccion_alcance.get('parrafo_areas_texto', ""))
+    ui.markdown(f"**{seccion_alcance.get('proceso_recoleccion_titulo_texto','Proceso de Recolección y Marco de Evaluación:')}**")
+    for item in seccion_alcance.get('lista_metodologia_textos', []): ui.markdown(f"• {item}")
+    ui.caption(seccion_alcance.get('parrafo_limitaciones_texto', ""))
+
+def _render_desglose_obra_columnas(desgloses_obra, captions_desglose_json, ui):
+    col1_obra, col2_obra = ui.columns(2)
+    columns_map_desglose = {0: col1_obra, 1: col2_obra}
+    col_idx_desglose = 0
+    for tipo_obra_json, (desglose_obra, aviso_obra_json) in desgloses_obra.items():
+        if desglose_obra is not None:
+            fig_obra_json, aviso_obra_json = construir_figura_desglose_obra(
+                desglose_obra, captions_desglose_json.get(tipo_obra_json, f"M² Mensuales: {tipo_obra_json}"))
+            with columns_map_desglose[col_idx_desglose % 2]:
+                if fig_obra_json:
+                    ui.plotly_chart(fig_obra_json, use_container_width=True)
+                    ui.caption(captions_desglose_json.get(tipo_obra_json, f"Fuente: CFIA - {tipo_obra_json}"))
+                else:
+                    ui.info(aviso_obra_json)
+            col_idx_desglose += 1
+        else:
+             with columns_map_desglose[col_idx_desglose % 2]: ui.info(aviso_obra_json)
+             col_idx_desglose += 1
+
+
+def _render_desglose_obra_compacto(desgloses_obra, captions_desglose_json, ui):
+    # Muchos tipos de obra: una sola figura con un panel por tipo (ver GRAFICOS_COMPACTOS_DESDE).
+    validos = [(tipo, desglose) for tipo, (desglose, _) in desgloses_obra.items() if desglose is not None]
+    fig_obra, aviso_obra = construir_figura_desglose_obra_compacta(
+        tuple(desglose for _, desglose in validos), tuple(tipo for tipo, _ in validos))
+    if fig_obra:
+        ui.plotly_chart(fig_obra, use_container_width=True)
+        ui.caption(" · ".join(f"**{tipo}**: {captions_desglose_json.get(tipo, f'Fuente: CFIA - {tipo}')}"
+                              for tipo, _ in validos))
+    else:
+        ui.info(aviso_obra)
+    for tipo_obra_json, (desglose_obra, aviso_obra_json) in desgloses_obra.items():
+        if desglose_obra is None:
+            ui.info(aviso_obra_json)
+
+
+# ***** INICIO DE LA FUNCIÓN render_analisis_externo CORREGIDA *****
+def render_analisis_externo(data, ui=st, modelo=None): # data es el contenido de json_data_main.get("analisis_entorno_externo", {})
+    modelo = modelo or normalizar_seccion("analisis_entorno_externo", data)
+    ui.header(data.get('titulo_seccion_analisis_externo_texto', "III. Análisis del Entorno Externo"))
+    ui.markdown("---")
+
+    # --- A. Análisis del Macroentorno (PESTEL y BCCR) ---
+    sec_macro = data.get("macroentorno_data", {}) # Acceder al sub-diccionario
+    ui.subheader(sec_macro.get('titulo_subseccion_texto', "A. Análisis del Macroentorno"))
+
+    factores_pestel_lista = sec_macro.get("factores_pestel_lista_objetos", [])
+    if factores_pestel_lista:
+        for factor_obj in factores_pestel_lista:
+            ui.markdown(f"**{factor_obj.get('titulo_factor_texto', 'Factor Desconocido')}:** {factor_obj.get('descripcion_factor_texto', 'N/A')}")
+        ui.markdown("---")
+    elif "PESTEL" in sec_macro.get('titulo_subseccion_texto', ""): # Solo mostrar si PESTEL se esperaba
+        ui.info("Análisis PESTEL detallado no disponible en el JSON cargado.")
+    
+    ui.markdown(f"**{sec_macro.get('indicadores_bccr_titulo_texto', 'Indicadores Económicos Clave (BCCR)')}**")
+    ui.write(sec_macro.get('indicadores_bccr_descripcion_texto', "Visualización de indicadores."))
+
+    serie_bccr, aviso_bccr = modelo.grafico("bccr")
+    if serie_bccr is not None:
+        try:
+            fig_bccr, aviso_bccr = construir_figura_bccr(
+                serie_bccr, sec_macro.get("grafico_bccr_titulo_sugerido", "Indicadores Económicos Clave (BCCR)"))
+            if fig_bccr:
+                ui.plotly_chart(fig_bccr, use_container_width=True)
+                ui.caption(sec_macro.get("grafico_bccr_caption_texto", sec_macro.get("grafico_bccr_titulo_sugerido","")))
+                ui.caption(descripcion_muestreo_serie(serie_bccr.fechas))
+            else:
+                ui.info(aviso_bccr)
+        except Exception as e_bccr_plot:
+            ui.error(f"Error al procesar o graficar datos BCCR: {e_bccr_plot}")
+    else:
+        ui.info(aviso_bccr)
+    ui.markdown("---")
+
+    # --- B. Análisis del Sector/Industria (CFIA) ---
+    sec_cfia = data.get("sector_industria_data", {})
+    ui.subheader(sec_cfia.get('titulo_subseccion_texto', "B. Análisis del Sector/Industria (Construcción Costa Rica)"))
+    ui.write(sec_cfia.get('intro_sector_texto', ""))
+
+    # 1. Gráfico de Tendencia M² CFIA
+    tendencia_cfia, aviso_tend = modelo.grafico("tendencia_cfia")
+    if tendencia_cfia is not None:
+        try:
+            fig_tend, aviso_tend = construir_figura_tendencia_cfia(
+                tendencia_cfia, sec_cfia.get("grafico_tendencia_m2_titulo_sugerido", "Tendencia M² Construidos (CFIA)"))
+            if fig_tend:
+                ui.plotly_chart(fig_tend, use_container_width=True)
+                ui.caption(sec_cfia.get("grafico_tendencia_m2_caption_texto", sec_cfia.get("grafico_tendencia_m2_titulo_sugerido","")))
+            else:
+                ui.info(aviso_tend)
+        except Exception as e_tend:
+            ui.error(f"Error al generar gráfico de tendencia CFIA: {e_tend}")
+    else:
+        ui.info(aviso_tend)
+
+    # 2. Gráfico de Variación Provincial CFIA
+    variacion_prov, aviso_var_prov = modelo.grafico("variacion_provincial")
+    if variacion_prov is not None:
+        fig_var_prov, aviso_var_prov = construir_figura_variacion_provincial(
+            variacion_prov, sec_cfia.get("grafico_variacion_provincial_titulo_sugerido", "Variación M² por Provincia"))
+        if fig_var_prov:
+            ui.plotly_chart(fig_var_prov, use_container_width=True)
+            ui.caption(sec_cfia.get("grafico_variacion_provincial_caption_texto", "Fuente: CFIA"))
+        else:
+            ui.info(aviso_var_prov)
+    else:
+        ui.info(aviso_var_prov)
+
+    # 3. Mapa Coroplético M² Provincial CFIA
+    datos_mapa, aviso_mapa = modelo.grafico("mapa_m2")
+    if datos_mapa is not None:
+        geojson_costa_rica = dpe_geo.obtener_geometria()
+        if geojson_costa_rica:
+            try:
+                modo_mapa = MAPA_MODO
+                if modo_mapa == "auto":
+                    modo_mapa = "teselas" if dpe_geo.teselas_disponibles() else "offline"
+                fig_mapa, aviso_mapa = construir_figura_mapa_m2(
+                    datos_mapa, geojson_costa_rica["geojson"], geojson_costa_rica["clave"],
+                    sec_cfia.get("mapa_m2_provincial_titulo_sugerido", "M² Acumulados por Provincia"),
+                    modo=modo_mapa)
+                if fig_mapa:
+                    ui.plotly_chart(fig_mapa, use_container_width=True)
+                    ui.caption(sec_cfia.get("mapa_m2_provincial_caption_texto", "Fuente: CFIA"))
+                    variante_geo = geojson_costa_rica["variantes"][geojson_costa_rica["nivel"]]
+                    variante_completa = geojson_costa_rica["variantes"]["completa"]
+                    ui.caption(f"Mapa {'con mapa base' if modo_mapa == 'teselas' else 'sin mapa base (modo offline)'}. "
+                               f"Geometría '{geojson_costa_rica['nivel']}': {variante_geo['vertices']:,} vértices, "
+                               f"{variante_geo['bytes'] / 1024:,.0f} KB (completa: {variante_completa['vertices']:,} vértices, "
+                               f"{variante_completa['bytes'] / 1024:,.0f} KB).")
+                    provincias_sin_unir = dpe_geo.provincias_sin_geometria(
+                        datos_mapa.provincias, datos_mapa.claves, geojson_costa_rica)
+                    if provincias_sin_unir:
+                        ui.warning(f"Provincias del JSON sin geometría en el mapa: {', '.join(str(p) for p in provincias_sin_unir)}")
+                else:
+                    ui.info(aviso_mapa)
+            except Exception as e_mapa_render:
+                ui.error(f"Error al generar mapa coroplético: {e_mapa_render}")
+        elif dpe_geo.precarga_en_curso():
+            ui.info("El mapa de provincias se está preparando en segundo plano. Vuelva a abrir esta sección en unos segundos.")
+        else:
+            ui.warning(f"No se pudo cargar el GeoJSON para el mapa. {dpe_geo.ultimo_error() or ''}")
+    else:
+        ui.info(aviso_mapa)
+
+    # 4. Gráficos de Desglose por Tipo de Obra CFIA
+    desglose_obra_data_json = sec_cfia.get("graficos_desglose_obra_data", {})
+    captions_desglose_json = sec_cfia.get("captions_desglose_obra", {})
+    if desglose_obra_data_json and isinstance(desglose_obra_data_json, dict):
+        ui.subheader(sec_cfia.get("desglose_tipo_obra_subtitulo_texto", "Desglose M² por Tipo de Obra (CFIA)"))
+        desgloses_obra = modelo.graficos.get("desglose_obra", {})
+        if usar_graficos_compactos(len(desgloses_obra)):
+            _render_desglose_obra_compacto(desgloses_obra, captions_desglose_json, ui)
+        else:
+            _render_desglose_obra_columnas(desgloses_obra, captions_desglose_json, ui)
+        if sec_cfia.get("nota_graficos_adicionales_texto"):
+            ui.caption(sec_cfia.get("nota_graficos_adicionales_texto"))
+    else:
+        ui.info("No hay datos disponibles para el desglose por tipo de obra CFIA en el JSON.")
+    ui.markdown("---")
+
+    # --- C. Análisis de la Competencia ---
+    sec_comp = data.get("analisis_competencia_data", {})
+    ui.subheader(sec_comp.get('titulo_subseccion_texto', "C. Análisis de la Competencia"))
+    ui.write(sec_comp.get('intro_competencia_texto', ""))
+    for i_comp_render, comp_render_data in enumerate(sec_comp.get('lista_competidores_data', [])):
+        nombre_competidor_render = comp_render_data.get('nombre_y_url_texto', '').split('(')[0].strip()
+        if not nombre_competidor_render: nombre_competidor_render = f"Competidor {comp_render_data.get('id_competidor_display_texto', i_comp_render+1)}"
+        
+        with ui.expander(f"{comp_render_data.get('id_competidor_display_texto', f'Competidor {i_comp_render+1}')}: {nombre_competidor_render}", expanded= (i_comp_render == 0) ):
+            ui.markdown(f"**URL:** {comp_render_data.get('nombre_y_url_texto', 'N/A')}")
+            ui.markdown(f"**Giro Principal Inferido:** {comp_render_data.get('giro_principal_inferido_texto', 'N/A')}")
+            
+            prods_servs_comp_render = comp_render_data.get('productos_servicios_clave_lista_textos', [])
+            ui.markdown(f"**Productos/Servicios Clave:**")
+            if prods_servs_comp_render and prods_servs_comp_render != ['N/A']:
+                for ps_item_render in prods_servs_comp_render: ui.markdown(f"  • {ps_item_render}")
+            else: 
+                ui.markdown(f"  • N/A")
+
+            marcas_gest_comp_render = comp_render_data.get('marcas_gestionadas_lista_textos', [])
+            ui.markdown(f"**Marcas que Gestiona/Destaca:**")
+            if marcas_gest_comp_render and marcas_gest_comp_render != ['N/A']:
+                ui.markdown(f"{', '.join(marcas_gest_comp_render)}")
+            else:
+                ui.markdown(f"N/A")
+
+            ui.markdown(f"**Propuesta de Valor Observada:** {comp_render_data.get('propuesta_valor_observada_texto', 'N/A')}")
+            
+            ui.markdown(f"**{comp_render_data.get('fortalezas_clave_titulo_texto', 'Fortalezas Clave:')}**")
+            fortalezas_comp_render = comp_render_data.get('fortalezas_clave_lista_textos', ["N/A"])
+            if fortalezas_comp_render and fortalezas_comp_render != ["N/A"]:
+                for f_item_render in fortalezas_comp_render:
+                    ui.markdown(f"• {f_item_render}")
+            else:
+                ui.markdown(f"• N/A")
+            
+            ui.markdown(f"**{comp_render_data.get('comparativo_titulo_texto', 'Análisis Comparativo vs. Cliente:')}**")
+            if comp_render_data.get("comparativo_error_texto"):
+                ui.warning(comp_render_data.get("comparativo_error_texto"))
+            else:
+                solap_list_render = comp_render_data.get('comparativo_solapamiento_lista_textos', [])
+                if solap_list_render and solap_list_render != ["N/A"]:
+                    ui.markdown("<u>Puntos Clave de Solapamiento en Oferta:</u>", unsafe_allow_html=True)
+                    for s_item_render in solap_list_render: ui.markdown(f"  • {s_item_render}")
+                
+                ui.markdown(f"<i>Ventaja Potencial del Cliente:</i> {escape(str(comp_render_data.get('comparativo_ventaja_cliente_texto', 'N/A')))}", unsafe_allow_html=True)
+                ui.markdown(f"<i>Ventaja Potencial del Competidor:</i> {escape(str(comp_render_data.get('comparativo_ventaja_competidor_texto', 'N/A')))}", unsafe_allow_html=True)
+                ui.markdown(f"<i>Nivel de Amenaza Estimado:</i> {escape(str(comp_render_data.get('comparativo_amenaza_texto', 'N/A')))}", unsafe_allow_html=True)
+                obs_adic_render = comp_render_data.get('comparativo_observacion_texto', "")
+                if obs_adic_render: ui.markdown(f"<i>Observación Adicional:</i> {escape(str(obs_adic_render))}", unsafe_allow_html=True)
+            ui.markdown("---")
+    ui.markdown("---")
+
+    # --- D. Huella Digital y Ecosistema Online ---
+    sec_huella = data.get("huella_digital_data", {})
+    ui.subheader(sec_huella.get('titulo_subseccion_texto', "D. Huella Digital y Ecosistema Online"))
+    ui.markdown(f"**{sec_huella.get('huella_cliente_titulo_texto', 'Huella Digital del Cliente')}**")
+    ui.write(sec_huella.get('huella_cliente_analisis_texto', ""))
+    ui.markdown(f"**{sec_huella.get('huella_cliente_keywords_titulo_texto', 'Palabras Clave Sugeridas:')}**")
+    for kw_hc_render in sec_huella.get('huella_cliente_keywords_lista_textos', ["N/A"]): ui.markdown(f"• {kw_hc_render}")
+    
+    ui.markdown(f"**{sec_huella.get('ecosistema_digital_titulo_texto', 'Ecosistema Digital del Sector y Tendencias')}**")
+    ui.write(sec_huella.get('ecosistema_digital_intro_texto', ""))
+    for trend_obj_render in sec_huella.get('tendencias_google_lista_objetos', []):
+        ui.markdown(f"<u>Tendencias para '{escape(str(trend_obj_render.get('keyword_tendencia_texto', 'N/A')))}':</u>", unsafe_allow_html=True)
+        ui.markdown(f"*{trend_obj_render.get('consultas_aumento_titulo_texto', 'Consultas en Aumento:')}*")
+        for consulta_aum_render in trend_obj_render.get('consultas_aumento_lista_textos', ["N/A"]):
+            ui.markdown(f"  • {consulta_aum_render}")
+    ui.markdown("---")
+
+    # --- E. Síntesis de Oportunidades y Amenazas Externas ---
+    sec_sint_ext = data.get("sintesis_externa_foda_data", {})
+    ui.subheader(sec_sint_ext.get('subtitulo_texto', "E. Síntesis de Oportunidades y Amenazas Externas"))
+    ui.markdown(f"**{sec_sint_ext.get('oportunidades_externas_titulo_texto', 'Principales Oportunidades Externas:')}**")
+    for item_oe_render in sec_sint_ext.get('oportunidades_externas_lista_textos', ["N/A"]): ui.markdown(f"• {item_oe_render}")
+    ui.markdown(f"**{sec_sint_ext.get('amenazas_externas_titulo_texto', 'Principales Amenazas Externas:')}**")
+    for item_ae_render in sec_sint_ext.get('amenazas_externas_lista_textos', ["N/A"]): ui.markdown(f"• {item_ae_render}")
+# ***** FIN DE LA FUNCIÓN render_analisis_externo CORREGIDA *****
+
+
+def render_diagnostico_interno(data, ui=st, modelo=None):
+    modelo = modelo or normalizar_seccion("diagnostico_interno", data)
+    barras_madurez = modelo.graficos.get("barras_madurez", [])
+    # ... (tu código sin cambios)
+    ui.header(data.get('titulo_seccion_texto', "IV. Diagnóstico Interno: Evaluación de Capacidades y Madurez Estratégica"))
+    sec_mad_glob = data.get("madurez_global_organizacion", {})
+    ui.subheader(sec_mad_glob.get('subtitulo_texto', "A. Nivel de Madurez Global de la Organización"))
+    ui.write(sec_mad_glob.get('parrafo_puntuacion_texto', ""))
+    ui.write(sec_mad_glob.get('parrafo_explicacion_texto', ""))
+    ui.markdown("---")
+    sec_eval_areas = data.get("evaluacion_detallada_areas", {})
+    ui.subheader(sec_eval_areas.get('subtitulo_texto', "B. Evaluación Detallada por Áreas Estratégicas de Madurez"))
+    # Con muchas áreas, todas las barras van en una figura antes de los detalles (ver GRAFICOS_COMPACTOS_DESDE).
+    barras_compactas = usar_graficos_compactos(sum(barra is not None for barra, _ in barras_madurez))
+    if barras_compactas:
+        fig_barras, _ = construir_figura_barras_madurez_compacta(
+            tuple(barra for barra, _ in barras_madurez if barra is not None),
+            sec_eval_areas.get('grafico_madurez_areas_titulo_texto', "Madurez por Área Estratégica"))
+        ui.plotly_chart(fig_barras, use_container_width=True)
+    for i_area, area_data in enumerate(sec_eval_areas.get('lista_areas_evaluacion_data', [])):
+        area_titulo_display = area_data.get('titulo_area_display_pdf_style', "Área no especificada")
+        with ui.expander(area_titulo_display, expanded=True): 
+            ui.write(area_data.get('nivel_madurez_display_texto', ""))
+            barra, aviso_barra = barras_madurez[i_area]
+            if barras_compactas:
+                if aviso_barra:
+                    ui.warning(aviso_barra)
+            elif barra is not None:
+                fig_bar, _ = construir_figura_barra_madurez(
+                    barra, area_data.get('grafico_barra_madurez_caption_texto', f"Madurez: {barra.etiqueta}"))
+                ui.plotly_chart(fig_bar, use_container_width=True)
+            elif aviso_barra:
+                ui.warning(aviso_barra)
+            ui.markdown(f"**{area_data.get('interpretacion_negocio_titulo_texto', 'Interpretación para el Negocio:')}**")
+            ui.write(area_data.get('interpretacion_negocio_parrafo_texto', ""))
+            ui.markdown(f"**{area_data.get('fortalezas_clave_titulo_texto', 'Fortalezas Clave Identificadas (Nivel >= 4):')}**")
+            fortalezas_list = area_data.get('fortalezas_clave_lista_data', [])
+            if fortalezas_list:
+                for f_item in fortalezas_list:
+                    ui.markdown(f"• {f_item.get('criterio_texto', '')} {f_item.get('nivel_texto', '')}")
+            else:
+                ui.write(area_data.get('fortalezas_clave_placeholder_texto', "No se identificaron fortalezas con nivel 4 o 5 en esta área."))
+            ui.markdown(f"**{area_data.get('oportunidades_mejora_titulo_texto', 'Oportunidades de Mejora Críticas (Nivel <= 2):')}**")
+            ui.write(area_data.get('oportunidades_mejora_resumen_texto', "")) 
+    ui.markdown("---")
+    sec_sint_int = data.get("sintesis_foda_interna", {})
+    ui.subheader(sec_sint_int.get('subtitulo_texto', "C. Síntesis de Fortalezas y Debilidades Internas Clave"))
+    ui.markdown(f"**{sec_sint_int.get('fortalezas_titulo_texto', 'Principales Fortalezas Internas Consolidadas:')}**")
+    for item in sec_sint_int.get('fortalezas_lista_textos', []): ui.markdown(f"• {item}")
+    ui.markdown(f"**{sec_sint_int.get('debilidades_titulo_texto', 'Principales Debilidades Internas Críticas:')}**")
+    for item in sec_sint_int.get('debilidades_lista_textos', []): ui.markdown(f"• {item}")
+
+def render_sintesis_foda(data, ui=st, modelo=None):
+    # ... (tu código sin cambios)
+    ui.header(data.get('titulo_seccion_texto', "V. Síntesis Estratégica: Matriz FODA y Desafíos Estratégicos"))
+    texto_sesion_trabajo = "Este análisis requiere una sesión de trabajo colaborativa. Se recomienda realizarla con los líderes de proceso y Eco Consultor para identificar la estrategia a seguir y definir los próximos pasos."
+    sec_matriz = data.get("matriz_foda_integrada", {})
+    ui.subheader(sec_matriz.get('subtitulo_texto', "A. Presentación de la Matriz FODA Integrada"))
+    ui.write(sec_matriz.get('parrafo_intro_texto', ""))
+    foda_data = sec_matriz.get('tabla_foda_data', {})
+    if foda_data:
+        col1, col2 = ui.columns(2)
+        with col1:
+            ui.markdown(f"#### {sec_matriz.get('titulos_cuadrantes_foda_textos', {}).get('fortalezas', 'FORTALEZAS')}")
+            for item in foda_data.get('fortalezas_lista_textos', ["(No listadas)"]): ui.markdown(f"• {item}")
+            ui.markdown("---") 
+            ui.markdown(f"#### {sec_matriz.get('titulos_cuadrantes_foda_textos', {}).get('oportunidades', 'OPORTUNIDADES')}")
+            for item in foda_data.get('oportunidades_lista_textos', ["(No listadas)"]): ui.markdown(f"• {item}")
+        with col2:
+            ui.markdown(f"#### {sec_matriz.get('titulos_cuadrantes_foda_textos', {}).get('debilidades', 'DEBILIDADES')}")
+            for item in foda_data.get('debilidades_lista_textos', ["(No listadas)"]): ui.markdown(f"• {item}")
+            ui.markdown("---") 
+            ui.markdown(f"#### {sec_matriz.get('titulos_cuadrantes_foda_textos', {}).get('amenazas', 'AMENAZAS')}")
+            for item in foda_data.get('amenazas_lista_textos', ["(No listadas)"]): ui.markdown(f"• {item}")
+    else:
+        ui.info("Datos para la matriz FODA no disponibles.")
+    ui.markdown("---")
+    sec_tows = data.get("analisis_cruzado_tows", {})
+    ui.subheader(sec_tows.get('subtitulo_texto', "B. Análisis Cruzado (TOWS) e Implicaciones Estratégicas"))
+    placeholder_tows = sec_tows.get('parrafo_placeholder_texto', texto_sesion_trabajo)
+    if "(Placeholder:" in placeholder_tows or not sec_tows.get('parrafo_texto_analisis_FO') : 
+         ui.info(placeholder_tows) 
+    else: 
+        ui.write(sec_tows.get('parrafo_intro_texto', "A continuación se presenta el análisis cruzado:"))
+        ui.markdown(f"**Estrategias FO (Fortalezas-Oportunidades):** {sec_tows.get('parrafo_texto_analisis_FO', 'N/A')}")
+        ui.markdown(f"**Estrategias DO (Debilidades-Oportunidades):** {sec_tows.get('parrafo_texto_analisis_DO', 'N/A')}")
+        ui.markdown(f"**Estrategias FA (Fortalezas-Amenazas):** {sec_tows.get('parrafo_texto_analisis_FA', 'N/A')}")
+        ui.markdown(f"**Estrategias DA (Debilidades-Amenazas):** {sec_tows.get('parrafo_texto_analisis_DA', 'N/A')}")
+    ui.markdown("---")
+    sec_desafios = data.get("desafios_estrategicos_clave", {})
+    ui.subheader(sec_desafios.get('subtitulo_texto', "C. Identificación de los Desafíos Estratégicos Clave"))
+    placeholder_desafios = sec_desafios.get('parrafo_placeholder_texto', texto_sesion_trabajo)
+    if "(Placeholder:" in placeholder_desafios or not sec_desafios.get('lista_desafios_textos'):
+        ui.info(placeholder_desafios)
+    else:
+        ui.write(sec_desafios.get('parrafo_intro_texto', "Los desafíos estratégicos clave identificados son:"))
+        for desafio in sec_desafios.get('lista_desafios_textos', []):
+            ui.markdown(f"• {desafio}")
+
+def render_formulacion_estrategica(data, ui=st, modelo=None):
+    # ... (tu código sin cambios)
+    ui.header(data.get('titulo_seccion_texto', "VI. Formulación Estratégica: Definiendo el Rumbo"))
+    sec_identidad = data.get("identidad_estrategica", {})
+    ui.subheader(sec_identidad.get('subtitulo_texto', "A. Revisión/Definición de la Identidad Estratégica"))
+    ui.write(sec_identidad.get('parrafo_introductorio_texto', 
+             "La definición o revisión de la Misión, Visión y Valores Corporativos es un ejercicio estratégico clave. Se recomienda realizar un taller interno para (re)definir estos elementos fundamentales."))
+    ui.markdown(f"**Misión Sugerida:** {sec_identidad.get('mision_sugerida_texto', 'N/A')}")
+    ui.markdown(f"**Visión Sugerida:** {sec_identidad.get('vision_sugerida_texto', 'N/A')}")
+    ui.markdown(f"**{sec_identidad.get('titulo_valores_sugeridos_texto', 'Valores Corporativos Sugeridos:')}**")
+    for val in sec_identidad.get('lista_valores_sugeridos_textos', ["(No definidos)"]): ui.markdown(f"• {val}")
+    ui.markdown("---")
+    sec_obj = data.get("objetivos_estrategicos_prioritarios", {})
+    ui.subheader(sec_obj.get('subtitulo_texto', "B. Objetivos Estratégicos Prioritarios (Próximos 2-3 años)"))
+    ui.write(sec_obj.get('parrafo_intro_texto', 
+             "Los siguientes objetivos estratégicos han sido identificados como prioritarios:"))
+    for i, obj_data in enumerate(sec_obj.get('lista_objetivos_data', [])):
+        obj_titulo = obj_data.get('titulo_objetivo_texto', f'Objetivo Estratégico {i+1}')
+        ui.markdown(f"**{obj_data.get('id_display_pdf_style', f'OE{i+1}')}: {obj_titulo}**")
+        ui.caption(obj_data.get('descripcion_detallada_texto', ''))
+        ui.markdown(f"_{obj_data.get('kpis_metas_titulo_texto', 'Métricas Clave de Éxito (KPIs) y Metas:')}_ {obj_data.get('kpis_metas_contenido_texto', 'Se definirán en la fase de planificación detallada.')}")
+        ui.markdown(f"_{obj_data.get('alineacion_desafios_titulo_texto', 'Alineación con Desafíos Clave:')}_ {obj_data.get('alineacion_desafios_contenido_texto', 'Se alineará con los desafíos estratégicos una vez definidos.')}")
+        if i < len(sec_obj.get('lista_objetivos_data', [])) - 1: ui.markdown("---") 
+    ui.markdown("---")
+    sec_prop_valor = data.get("propuesta_valor_diferenciada", {})
+    ui.subheader(sec_prop_valor.get('subtitulo_texto', "C. Propuesta de Valor Diferenciada"))
+    ui.write(sec_prop_valor.get('parrafo_texto', 
+             "Es crucial que la empresa articule y comunique consistentemente una propuesta de valor clara y diferenciada."))
+
+def render_hoja_ruta(data, ui=st, modelo=None):
+    # ... (tu código sin cambios)
+    ui.header(data.get('titulo_seccion_texto', "VII. Hoja de Ruta Estratégica: Iniciativas y Planes de Acción"))
+    texto_sesion_trabajo = "Este cronograma es una visualización preliminar. Se recomienda desarrollar un Diagrama de Gantt más elaborado en la fase de planificación de la ejecución."
+    sec_intro = data.get("introduccion_hoja_ruta", {})
+    ui.subheader(sec_intro.get('subtitulo_texto', "A. Introducción a la Hoja de Ruta"))
+    ui.write(sec_intro.get('parrafo_texto', 
+             "La siguiente Hoja de Ruta traduce los Objetivos Estratégicos en Iniciativas y Planes de Acción concretos para los próximos 12-18 meses."))
+    ui.markdown("---")
+    sec_detalle = data.get("detalle_por_objetivo", {})
+    ui.subheader(sec_detalle.get('subtitulo_texto', "B. Detalle de Iniciativas y Planes de Acción por Objetivo Estratégico"))
+    for obj_hr in sec_detalle.get('lista_objetivos_con_detalle_data', []):
+        ui.markdown(f"#### {obj_hr.get('titulo_objetivo_pdf_style_texto', 'Objetivo Estratégico')}")
+        ui.caption(obj_hr.get('descripcion_detallada_objetivo_texto', ''))
+        for inic_hr in obj_hr.get('iniciativas_estrategicas_data', []):
+            with ui.container(): 
+                ui.markdown(f"**Iniciativa {inic_hr.get('id_iniciativa_display_texto', '')}:** {inic_hr.get('titulo_iniciativa_texto', '')}")
+                ui.write(f"_{inic_hr.get('descripcion_detallada_iniciativa_texto', '')}_")
+                ui.markdown(f"**{inic_hr.get('titulo_planes_accion_display_texto', 'Planes de Acción Específicos:')}**")
+                for plan_hr in inic_hr.get('planes_de_accion_data', []):
+                    ui.markdown(f"  • **{plan_hr.get('id_accion_display_texto', '')}:** {plan_hr.get('descripcion_accion_smart_texto', '')}")
+                    ui.markdown(f"    *Resp: {plan_hr.get('responsable_sugerido_texto', 'N/A')} | Plazo: {plan_hr.get('plazo_estimado_texto', 'N/A')} | KPI: {plan_hr.get('kpi_resultado_clave_texto', 'N/A')}*")
+                ui.markdown("---") 
+    ui.markdown("---")
+    sec_cron = data.get("cronograma_general_hoja_ruta", {})
+    ui.subheader(sec_cron.get('subtitulo_texto', "C. Cronograma General de la Hoja de Ruta (Visualización Preliminar)")) 
+    ui.write(sec_cron.get('parrafo_intro_texto', ""))
+    if sec_cron.get("tabla_cronograma_data"):
+        try:
+            df_cron = pd.DataFrame(sec_cron.get("tabla_cronograma_data", []))
+            if not df_cron.empty:
+                ui.dataframe(df_cron, use_container_width=True)
+            else:
+                ui.info(sec_cron.get('placeholder_texto', texto_sesion_trabajo))
+        except Exception as e:
+            ui.error(f"Error al mostrar tabla de cronograma: {e}")
+            ui.info(sec_cron.get('placeholder_texto', texto_sesion_trabajo))
+    else:
+        ui.info(sec_cron.get('placeholder_texto', texto_sesion_trabajo))
+    ui.caption(sec_cron.get('nota_plazos_texto', "CP: Corto Plazo (1-3 meses), MP: Mediano Plazo (4-9 meses), LP: Largo Plazo (10-18 meses)."))
+
+def render_implementacion(data, ui=st, modelo=None):
+    # ... (tu código sin cambios)
+    ui.header(data.get('titulo_seccion_texto', "VIII. Consideraciones para la Implementación y Gestión del Cambio"))
+    texto_sesion_trabajo = "Esta sección requiere una discusión detallada y planificación. Se recomienda realizarla con los líderes de proceso y Eco Consultor."
+    ui.write(data.get('parrafo_intro_general_texto', 
+             "La formulación de una estrategia sólida es solo el primer paso. El éxito real dependerá de una implementación efectiva y una gestión proactiva del cambio."))
+    sec_factores = data.get("factores_criticos_exito", {})
+    ui.subheader(sec_factores.get('subtitulo_texto', "A. Factores Críticos de Éxito para la Implementación"))
+    lista_factores = sec_factores.get('lista_factores_textos', [])
+    if not lista_factores or "(Placeholder:" in sec_factores.get('parrafo_intro_texto', lista_factores[0] if lista_factores else ""):
+        ui.info(sec_factores.get('parrafo_intro_texto', texto_sesion_trabajo)) 
+    else:
+        ui.write(sec_factores.get('parrafo_intro_texto', ""))
+        for item in lista_factores: ui.markdown(f"• {item}")
+    ui.markdown("---")
+    sec_gob = data.get("gobernanza_seguimiento_sugerida", {})
+    ui.subheader(sec_gob.get('subtitulo_texto', "B. Estructura de Gobernanza y Seguimiento Sugerida"))
+    parrafo_gob = sec_gob.get('parrafo_texto', "")
+    if "(Placeholder:" in parrafo_gob or not parrafo_gob.strip():
+        ui.info(texto_sesion_trabajo)
+    else:
+        ui.write(parrafo_gob)
+    ui.markdown("---")
+    sec_gc = data.get("gestion_cambio_comunicacion", {})
+    ui.subheader(sec_gc.get('subtitulo_texto', "C. Gestión del Cambio y Comunicación"))
+    parrafo_gc = sec_gc.get('parrafo_texto', "")
+    if "(Placeholder:" in parrafo_gc or not parrafo_gc.strip():
+        ui.info(texto_sesion_trabajo)
+    else:
+        ui.write(parrafo_gc)
+    ui.markdown("---")
+    sec_rec = data.get("implicaciones_recursos_alto_nivel", {})
+    ui.subheader(sec_rec.get('subtitulo_texto', "D. Implicaciones de Recursos (Alto Nivel)"))
+    parrafo_rec = sec_rec.get('parrafo_texto', "")
+    if "(Placeholder:" in parrafo_rec or not parrafo_rec.strip():
+        ui.info(texto_sesion_trabajo)
+    else:
+        ui.write(parrafo_rec)
+    ui.markdown("---")
+    sec_riesgos = data.get("gestion_riesgos_estrategicos_implementacion", {})
+    ui.subheader(sec_riesgos.get('subtitulo_texto', "E. Gestión de Riesgos Estratégicos para la Implementación"))
+    lista_riesgos = sec_riesgos.get('lista_riesgos_data', [])
+    is_placeholder_riesgos = not lista_riesgos or \
+                             (lista_riesgos and "(Placeholder:" in lista_riesgos[0].get("riesgo_texto", "")) or \
+                             "(Placeholder:" in sec_riesgos.get('parrafo_intro_texto', "")
+    if is_placeholder_riesgos:
+        ui.info(texto_sesion_trabajo)
+    else:
+        ui.write(sec_riesgos.get('parrafo_intro_texto', ""))
+        for riesgo_item in lista_riesgos:
+            ui.markdown(f"**Riesgo:** {riesgo_item.get('riesgo_texto', 'No especificado')}")
+            ui.markdown(f"  *Mitigación Sugerida:* {riesgo_item.get('mitigacion_texto', 'No especificada')}")
+            
+def render_conclusiones(data, ui=st, modelo=None):
+    # ... (tu código sin cambios)
+    ui.header(data.get('titulo_seccion_texto', "IX. Conclusiones Finales y Próximos Pasos Recomendados"))
+    texto_sesion_trabajo = "Se recomienda una sesión de trabajo para detallar estos próximos pasos y asegurar el compromiso del equipo."
+    sec_con_gral = data.get("conclusion_general_textos_data", {})
+    ui.write(sec_con_gral.get('parrafo1_texto', 
+             "El Diagnóstico de Planificación Estratégica ha proporcionado una evaluación integral de la madurez actual y ha sentado las bases para un crecimiento y fortalecimiento futuros."))
+    ui.write(sec_con_gral.get('parrafo2_texto', 
+             "Es fundamental entender que la estrategia es un proceso continuo de aprendizaje, adaptación y ejecución."))
+    ui.markdown("---")
+    
+    sec_rec90 = data.get("recomendaciones_proximos_90_dias_data", {})
+    ui.subheader(sec_rec90.get('subtitulo_texto', "A. Recomendaciones Específicas para los Próximos 90 Días"))
+    parrafo_intro_recs = sec_rec90.get('parrafo_intro_texto', "")
+    lista_recs = sec_rec90.get('lista_recomendaciones_textos', [])
+    is_list_a_placeholder = False
+    if lista_recs and len(lista_recs) == 1 and "(Placeholder:" in lista_recs[0]:
+        is_list_a_placeholder = True
+    if is_list_a_placeholder:
+        ui.write(parrafo_intro_recs) 
+        ui.info(lista_recs[0])      
+    elif lista_recs: 
+        ui.write(parrafo_intro_recs)
+        for item in lista_recs: 
+            ui.markdown(f"• {item}")
+    else: 
+        ui.write(parrafo_intro_recs) 
+        ui.info(texto_sesion_trabajo) 
+    ui.markdown("---") 
+    
+    sec_sesion = data.get("propuesta_sesion_acompanamiento_data", {})
+    ui.subheader(sec_sesion.get('subtitulo_texto', "B. Propuesta de Sesión de Trabajo y Acompañamiento"))
+    ui.write(sec_sesion.get('parrafo1_texto', 
+             "ECO Consultores se pone a su disposición para facilitar una sesión de trabajo con el equipo directivo."))
+    ui.write(sec_sesion.get('parrafo2_texto', 
+             "Asimismo, reiteramos nuestra disposición para acompañarlos en el proceso de ejecución de las iniciativas estratégicas."))
+    ui.markdown("---")
+    sec_agrad = data.get("agradecimiento_final_data", {})
+    ui.subheader(sec_agrad.get('subtitulo_texto', "C. Agradecimiento Final"))
+    ui.write(sec_agrad.get('parrafo_texto', 
+             "Agradecemos sinceramente a todo el equipo por su tiempo, apertura y colaboración durante el proceso de diagnóstico."))
+
+
+tab_titles_map = {
+    "Portada": "portada",
+    "Resumen Ejecutivo": "resumen_ejecutivo",
+    "Introducción": "introduccion_contexto",
+    "Análisis Externo": "analisis_entorno_externo",
+    "Diagnóstico Interno": "diagnostico_interno",
+    "Síntesis FODA": "sintesis_estrategica_foda",
+    "Formulación Estratégica": "formulacion_estrategica",
+    "Hoja de Ruta": "hoja_ruta_estrategica",
+    "Implementación": "consideraciones_implementacion",
+    "Conclusiones": "conclusiones_finales",
+    "Glosario": "glosario"
+}
+
+render_functions_map = {
+    "portada": render_portada,
+    "glosario": render_glosario,
+    "resumen_ejecutivo": render_resumen_ejecutivo,
+    "introduccion_contexto": render_introduccion_contexto,
+    "analisis_entorno_externo": render_analisis_externo,
+    "diagnostico_interno": render_diagnostico_interno,
+    "sintesis_estrategica_foda": render_sintesis_foda,
+    "formulacion_estrategica": render_formulacion_estrategica,
+    "hoja_ruta_estrategica": render_hoja_ruta,
+    "consideraciones_implementacion": render_implementacion,
+    "conclusiones_finales": render_conclusiones
+}
+
+
+def render_seccion(tab_title_display, json_data, ui=st, modelo=None):
+    """Renderiza una sección con el markdown agrupado.
+
+    Devuelve llamadas, mensajes, figuras, segundos y, dentro de un script de
+    Streamlit, los elementos y bytes realmente enviados al navegador.
+    """
+    # `modelo`: ModeloReporte del informe (dpe_carga lo crea al cargar); sin él se normaliza aquí.
+    inicio = time.perf_counter()
+    contexto = get_script_run_ctx(suppress_warning=True) if ui is st else None
+    ui = UIAgrupada(ui)
+    with MedidorMensajes(contexto) as medidor:
+        try:
+            _render_seccion(tab_title_display, json_data, ui, modelo)
+        finally:
+            ui.vaciar()
+    estadisticas = ui.estadisticas()
+    elementos = medidor.elementos if medidor.bytes is not None else estadisticas["mensajes"]
+    return dict(estadisticas, segundos=time.perf_counter() - inicio, elementos=elementos, bytes=medidor.bytes)
+
+
+def _render_seccion(tab_title_display, json_data, ui, modelo):
+    data_key = tab_titles_map[tab_title_display]
+    render_function = render_functions_map.get(data_key)
+    try:
+        # Con un ReporteDiferido la sección se decodifica aquí, la primera vez que se visita.
+        data_for_section = json_data.get(data_key, {})
+        modelo_seccion = (modelo or ModeloReporte(json_data)).seccion(data_key)
+    except json.JSONDecodeError as jde:
+        ui.error(f"La sección '{tab_title_display}' (clave JSON: '{data_key}') contiene JSON inválido: {jde}")
+        return
+
+    if render_function:
+        if data_for_section or data_key == "portada":
+            huella = getattr(modelo, "huella", None)
+            if data_key in SECCIONES_ESTATICAS and huella:
+                operaciones = _fragmento_seccion(huella, data_key, render_function, data_for_section, ui)
+                if operaciones is not None:
+                    emitir_fragmento(ui, operaciones)
+                    return
+            render_function(data_for_section, ui, modelo_seccion)
+        else:
+            ui.warning(f"Datos para la sección '{tab_title_display}' (clave JSON: '{data_key}') no encontrados o vacíos.")
+    else:
+        ui.error(f"Función de renderizado no encontrada para la clave de datos: {data_key}")
+
+
+def _fragmento_seccion(huella, data_key, render_function, data_for_section, ui):
+    # None si la sección resultó no compilable (también se recuerda, para no reintentarlo).
+    def _compilar():
+        try:
+            return compilar_fragmento(render_function, data_for_section, session_state=ui.session_state)
+        except FragmentoNoCompilable:
+            return None
+    return fragmentos_cache.get_or_compute(f"{huella}:{data_key}", _compilar,
+                                           medir=lambda ops: tamano_fragmento(ops) if ops else 0)
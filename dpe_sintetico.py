@@ -0,0 +1,175 @@
+# Informes DPE sintéticos para pruebas de rendimiento.
+# Reproducen la estructura que leen las funciones render_* (mismas claves y
+# tipos, incluidos los valores numéricos como texto que emite el motor DPE) con
+# contenido aleatorio pero determinista: la misma semilla da el mismo informe.
+#
+#   python dpe_sintetico.py informe.json --escala 4 --dias-bccr 3650 --competidores 40
+import argparse
+import datetime
+import gzip
+import json
+import random
+
+MESES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+PROVINCIAS = ["San José", "Alajuela", "Cartago", "Heredia", "Guanacaste", "Puntarenas", "Limón"]
+_PALABRAS = ("empresa mercado cliente estrategia proceso digital crecimiento equipo calidad servicio "
+             "innovación ventas costos riesgo oportunidad gestión indicador plan proyecto inversión "
+             "capacidad competencia canal producto tecnología talento liderazgo eficiencia").split()
+
+
+def _texto(rng, palabras):
+    return " ".join(rng.choice(_PALABRAS) for _ in range(palabras)).capitalize() + "."
+
+
+def _textos(rng, cantidad, palabras=14):
+    return [_texto(rng, palabras) for _ in range(cantidad)]
+
+
+def generar_informe(escala=1, filas_bccr=365, semilla=0, competidores=None, factores_pestel=None,
+                    tipos_obra=None, areas_madurez=None, objetivos=None, acciones=None, terminos_glosario=None):
+    """Devuelve un informe DPE (dict) con `filas_bccr` días de serie BCCR.
+
+    Las listas tienen ~5×`escala` elementos salvo que se fije su tamaño:
+    `competidores`, `factores_pestel`, `tipos_obra` (CFIA), `areas_madurez`,
+    `objetivos` de la hoja de ruta, `acciones` por iniciativa y `terminos_glosario`.
+    """
+    rng = random.Random(semilla)
+    n = max(1, int(5 * escala))
+    competidores = n if competidores is None else competidores
+    factores_pestel = n if factores_pestel is None else factores_pestel
+    tipos_obra = n if tipos_obra is None else tipos_obra
+    objetivos = n if objetivos is None else objetivos
+    acciones = 3 if acciones is None else acciones
+    terminos_glosario = n if terminos_glosario is None else terminos_glosario
+    inicio_bccr = datetime.date(2020, 1, 1)
+    tasa, cambio = 5.0, 550.0
+    serie_bccr = []
+    for dia in range(filas_bccr):
+        tasa = max(0.5, tasa + rng.gauss(0, 0.02))
+        cambio = max(400.0, cambio + rng.gauss(0, 0.8))
+        serie_bccr.append({"Fecha": str(inicio_bccr + datetime.timedelta(days=dia)),
+                           "Tasa_Basica_Pasiva": f"{tasa:.2f}", "Tipo_Cambio_Venta_Referencia": round(cambio, 2)})
+    areas = [f"Área {i + 1}" for i in range(n if areas_madurez is None else areas_madurez)]
+    return {
+        "metadatos_informe": {"cliente_nombre": f"Cliente Sintético {semilla}", "version_dpe": "3.0",
+                              "fecha_diagnostico": "2024-05-01", "titulo_informe_base": "Diagnóstico de Planificación Estratégica"},
+        "portada": {"titulo_principal_texto": "Diagnóstico de Planificación Estratégica",
+                    "preparado_para_texto": "Preparado para:", "fecha_diagnostico_texto": "Mayo 2024"},
+        "resumen_ejecutivo": {
+            "proposito_alcance": {"parrafo_texto": _texto(rng, 80)},
+            "madurez_global": {"parrafo_texto": _texto(rng, 60),
+                               "grafico_radar_data": [{"label": a, "value": str(rng.randint(20, 95))} for a in areas]},
+            "hallazgos_area": {"subtitulo_texto": "Hallazgos por área", "lista_textos_hallazgos": _textos(rng, n, 30)},
+            "foda_interno": {"fortalezas_lista_textos": _textos(rng, n), "debilidades_lista_textos": _textos(rng, n)},
+        },
+        "introduccion_contexto": {
+            "presentacion_cliente": {"subtitulo_texto": "Presentación del cliente", "empresa_texto": _texto(rng, 120)},
+            "objetivos_dpe": {"lista_objetivos_textos": _textos(rng, n)},
+            "alcance_metodologia": {"lista_metodologia_textos": _textos(rng, n)},
+        },
+        "analisis_entorno_externo": {
+            "macroentorno_data": {
+                "titulo_subseccion_texto": "A. Análisis PESTEL",
+                "factores_pestel_lista_objetos": [{"titulo_factor_texto": f"Factor {i + 1}", "descripcion_factor_texto": _texto(rng, 40)}
+                                                  for i in range(factores_pestel)],
+                "grafico_bccr_data": serie_bccr,
+            },
+            "sector_industria_data": {
+                "grafico_tendencia_m2_data": {
+                    "historico": [{"Mes": m, "2022": rng.randint(80000, 120000), "2023": rng.randint(80000, 120000)} for m in MESES],
+                    "actual_real": [{"Mes": m, "Valor_Actual": rng.randint(80000, 120000)} for m in MESES[:5]],
+                    "actual_proyeccion": [{"Mes": m, "Valor_Proyeccion": rng.randint(80000, 120000)} for m in MESES[4:]],
+                },
+                "grafico_variacion_provincial_data": [{"Provincia": p, "Variacion_%": round(rng.uniform(-15, 25), 1)} for p in PROVINCIAS],
+                "mapa_m2_provincial_data": [{"Provincia_Compatible": p, "m2_construidos": rng.randint(10000, 500000)} for p in PROVINCIAS],
+                "graficos_desglose_obra_data": {
+                    f"Obra tipo {j + 1}": [dict({"Mes": m}, **{f"Subtipo {k + 1}": rng.randint(0, 5000) for k in range(3)}) for m in MESES]
+                    for j in range(tipos_obra)},
+                "captions_desglose_obra": {f"Obra tipo {j + 1}": _texto(rng, 12) for j in range(tipos_obra)},
+            },
+            "analisis_competencia_data": {"lista_competidores_data": [
+                {"nombre_y_url_texto": f"Competidor {i + 1} (https://competidor{i + 1}.example)",
+                 "productos_servicios_clave_lista_textos": _textos(rng, 3, 6),
+                 "fortalezas_clave_lista_textos": _textos(rng, 3, 8),
+                 "comparativo_solapamiento_lista_textos": _textos(rng, 2, 12)} for i in range(competidores)]},
+            "huella_digital_data": {
+                "huella_cliente_keywords_lista_textos": [rng.choice(_PALABRAS) for _ in range(n)],
+                "tendencias_google_lista_objetos": [{"keyword_tendencia_texto": rng.choice(_PALABRAS),
+                                                     "consultas_aumento_lista_textos": _textos(rng, 3, 4)} for _ in range(n)],
+            },
+            "sintesis_externa_foda_data": {"oportunidades_externas_lista_textos": _textos(rng, n),
+                                           "amenazas_externas_lista_textos": _textos(rng, n)},
+        },
+        "diagnostico_interno": {
+            "evaluacion_detallada_areas": {"lista_areas_evaluacion_data": [
+                {"titulo_area_display_pdf_style": a,
+                 "grafico_barra_madurez_data": {"label": a, "value": str(rng.randint(20, 95))},
+                 "fortalezas_clave_lista_data": [{"criterio_texto": _texto(rng, 10), "nivel_texto": f"({rng.randint(1, 5)})"}
+                                                 for _ in range(3)]} for a in areas]},
+            "sintesis_foda_interna": {"fortalezas_lista_textos": _textos(rng, n), "debilidades_lista_textos": _textos(rng, n)},
+        },
+        "sintesis_estrategica_foda": {
+            "matriz_foda_integrada": {"tabla_foda_data": {"fortalezas_lista_textos": _textos(rng, n), "debilidades_lista_textos": _textos(rng, n),
+                                                          "oportunidades_lista_textos": _textos(rng, n), "amenazas_lista_textos": _textos(rng, n)}},
+            "desafios_estrategicos_clave": {"lista_desafios_textos": _textos(rng, n, 20)},
+        },
+        "formulacion_estrategica": {
+            "identidad_estrategica": {"mision_sugerida_texto": _texto(rng, 30), "vision_sugerida_texto": _texto(rng, 30)},
+            "objetivos_estrategicos_prioritarios": {"lista_objetivos_data": [{"titulo_objetivo_texto": f"OE{i + 1}. {_texto(rng, 10)}"}
+                                                                             for i in range(objetivos)]},
+        },
+        "hoja_ruta_estrategica": {
+            "detalle_por_objetivo": {"lista_objetivos_con_detalle_data": [
+                {"titulo_objetivo_pdf_style_texto": f"OE{i + 1}", "descripcion_detallada_objetivo_texto": _texto(rng, 20),
+                 "iniciativas_estrategicas_data": [
+                     {"id_iniciativa_display_texto": f"{i + 1}.{j + 1}", "titulo_iniciativa_texto": _texto(rng, 8),
+                      "descripcion_detallada_iniciativa_texto": _texto(rng, 25),
+                      "titulo_planes_accion_display_texto": "Planes de Acción Específicos:",
+                      "planes_de_accion_data": [{"id_accion_display_texto": f"{i + 1}.{j + 1}.{k + 1}",
+                                                 "descripcion_accion_smart_texto": _texto(rng, 15),
+                                                 "responsable_sugerido_texto": rng.choice(areas),
+                                                 "plazo_estimado_texto": f"{rng.randint(1, 18)} meses",
+                                                 "kpi_resultado_clave_texto": _texto(rng, 6)}
+                                                for k in range(acciones)]} for j in range(2)]} for i in range(objetivos)]},
+            "cronograma_general_hoja_ruta": {"tabla_cronograma_data": [
+                {"Iniciativa": f"{i + 1}.1", "Inicio": f"T{rng.randint(1, 4)}", "Fin": f"T{rng.randint(1, 4)}", "Responsable": rng.choice(areas)}
+                for i in range(objetivos)]},
+        },
+        "consideraciones_implementacion": {
+            "factores_criticos_exito": {"lista_factores_textos": _textos(rng, n)},
+            "gestion_riesgos_estrategicos_implementacion": {"lista_riesgos_data": [{"riesgo_texto": _texto(rng, 12), "mitigacion_texto": _texto(rng, 16)}
+                                                                                    for _ in range(n)]},
+        },
+        "conclusiones_finales": {"recomendaciones_proximos_90_dias_data": {"lista_recomendaciones_textos": _textos(rng, n)}},
+        "glosario": {"lista_terminos_data": [{"termino_texto": rng.choice(_PALABRAS).capitalize(), "definicion_texto": _texto(rng, 20)}
+                                             for _ in range(terminos_glosario)]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un informe DPE sintético.")
+    parser.add_argument("salida", help="Archivo de salida (.json o .json.gz).")
+    parser.add_argument("--escala", type=float, default=1, help="Multiplica el tamaño por defecto (5) de todas las listas.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--dias-bccr", type=int, default=365, help="Días de la serie BCCR.")
+    for opcion, ayuda in (("competidores", "Competidores analizados."), ("factores-pestel", "Factores PESTEL."),
+                          ("tipos-obra", "Tipos de obra CFIA (un gráfico de desglose cada uno)."),
+                          ("areas-madurez", "Áreas del diagnóstico interno (radar y barras de madurez)."),
+                          ("objetivos", "Objetivos estratégicos de la hoja de ruta."),
+                          ("acciones", "Acciones por iniciativa (por defecto 3)."), ("terminos-glosario", "Términos del glosario.")):
+        parser.add_argument(f"--{opcion}", type=int, help=ayuda)
+    args = parser.parse_args()
+
+    informe = generar_informe(args.escala, args.dias_bccr, args.semilla, competidores=args.competidores,
+                              factores_pestel=args.factores_pestel, tipos_obra=args.tipos_obra,
+                              areas_madurez=args.areas_madurez, objetivos=args.objetivos, acciones=args.acciones,
+                              terminos_glosario=args.terminos_glosario)
+    datos = json.dumps(informe, ensure_ascii=False).encode("utf-8")
+    abrir = gzip.open if args.salida.endswith(".gz") else open
+    with abrir(args.salida, "wb") as f:
+        f.write(datos)
+    print(f"{args.salida}: {len(datos) / 1024:,.0f} KB de JSON")
+
+
+if __name__ == "__main__":
+    main()
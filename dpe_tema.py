@@ -0,0 +1,19 @@
+# Identidad visual de ECO Consultores (colores y logo), compartida por app.py, las secciones y las figuras.
+import os
+
+COLOR_AZUL_ECO = "#173D4A"
+COLOR_VERDE_ECO = "#66913E"
+COLOR_GRIS_ECO = "#414549"
+COLOR_TEXTO_TITULO_PRINCIPAL_CSS = COLOR_AZUL_ECO
+COLOR_TEXTO_SUBTITULO_SECCION_CSS = COLOR_VERDE_ECO
+COLOR_TEXTO_SUB_SUBTITULO_CSS = COLOR_GRIS_ECO
+COLOR_TEXTO_CUERPO_CSS = "#333333"
+COLOR_TEXTO_SUTIL_CSS = "#7f8c8d"
+COLOR_TEXTO_BLANCO_CSS = "#FFFFFF"
+
+# Logo corporativo
+LOGO_FILENAME = "Logo_ECO.png"
+LOGO_DIRECTORY = "assets" # Asumiendo que tienes una carpeta 'assets' al mismo nivel que app.py
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(SCRIPT_DIR, LOGO_DIRECTORY, LOGO_FILENAME)
+logo_exists_at_path = os.path.exists(LOGO_PATH)
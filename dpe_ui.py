@@ -0,0 +1,226 @@
+# Capa de emisión entre las funciones render_* y Streamlit (o el destino HTML de dpe_batch).
+# Cada llamada a st.* es un mensaje (delta) por el websocket; las secciones de
+# texto emiten una viñeta por llamada y un informe grande genera miles. UIAgrupada
+# junta las llamadas consecutivas a markdown/write(texto) en un único bloque y
+# lo envía en cuanto llega cualquier otro elemento o se cierra un contenedor.
+import contextlib
+import os
+import re
+import textwrap
+
+from dpe_cache import CacheLRU
+from dpe_tema import COLOR_TEXTO_SUTIL_CSS
+
+# "0" desactiva la agrupación (útil para comparar el número de mensajes).
+AGRUPAR_MARKDOWN = os.environ.get("DPE_AGRUPAR_MARKDOWN", "1") != "0"
+
+
+def limpiar_texto(texto):
+    # Lo mismo que hace st.markdown con cada llamada (clean_text): sin esto, una pieza con
+    # sangría de 4 espacios se convierte en bloque de código al unirla tras una línea en blanco.
+    return textwrap.dedent(str(texto)).strip()
+
+
+class UIAgrupada:
+    """Envuelve `st` (o cualquier objeto con su API) y agrupa el markdown consecutivo.
+
+    `llamadas` cuenta lo que pidieron las funciones render_*; `mensajes` lo que
+    realmente se envió. Los contenedores devueltos (expander, columns, container...)
+    se envuelven para vaciar el bloque pendiente al entrar y al salir de ellos.
+    """
+
+    def __init__(self, ui, agrupar=AGRUPAR_MARKDOWN):
+        self._ui = ui
+        self._agrupar = agrupar
+        self._pendiente = []
+        self._pendiente_html = False
+        self.llamadas = 0
+        self.mensajes = 0
+        self.figuras = 0
+
+    def markdown(self, texto, unsafe_allow_html=False, **kwargs):
+        self.llamadas += 1
+        if kwargs or not self._agrupar:
+            self.vaciar()
+            self.mensajes += 1
+            return self._ui.markdown(texto, unsafe_allow_html=unsafe_allow_html, **kwargs)
+        # No se mezcla texto escapado con HTML permitido en el mismo bloque.
+        if self._pendiente and self._pendiente_html != unsafe_allow_html:
+            self.vaciar()
+        self._pendiente.append(limpiar_texto(texto))
+        self._pendiente_html = unsafe_allow_html
+
+    def write(self, *args, **kwargs):
+        if len(args) == 1 and isinstance(args[0], str) and not kwargs:
+            return self.markdown(args[0])
+        return self._emitir("write", *args, **kwargs)
+
+    def vaciar(self):
+        """Envía el bloque de markdown pendiente, si lo hay."""
+        if not self._pendiente:
+            return
+        # Línea en blanco entre piezas: cada una sigue siendo su propio párrafo/bloque.
+        texto = "\n\n".join(self._pendiente)
+        self._pendiente = []
+        self.mensajes += 1
+        self._ui.markdown(texto, unsafe_allow_html=self._pendiente_html)
+
+    def _emitir(self, nombre, *args, **kwargs):
+        self.llamadas += 1
+        self.figuras += nombre == "plotly_chart"
+        self.vaciar()
+        self.mensajes += 1
+        return self._envolver(getattr(self._ui, nombre)(*args, **kwargs))
+
+    def _envolver(self, resultado):
+        if isinstance(resultado, (list, tuple)):
+            return type(resultado)(self._envolver(r) for r in resultado)
+        if hasattr(resultado, "__enter__"):
+            return _ContenedorAgrupado(resultado, self)
+        return resultado
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._ui, nombre)
+        if not callable(atributo):  # p. ej. session_state
+            return atributo
+        return lambda *args, **kwargs: self._emitir(nombre, *args, **kwargs)
+
+    def estadisticas(self):
+        return {"llamadas": self.llamadas, "mensajes": self.mensajes, "figuras": self.figuras}
+
+
+class _ContenedorAgrupado:
+    def __init__(self, contenedor, ui_agrupada):
+        self._contenedor = contenedor
+        self._ui = ui_agrupada
+
+    def __enter__(self):
+        self._ui.vaciar()
+        self._contenedor.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        # Lo acumulado dentro del bloque pertenece a este contenedor.
+        self._ui.vaciar()
+        return self._contenedor.__exit__(*exc)
+
+    def __getattr__(self, nombre):
+        return getattr(self._contenedor, nombre)
+
+
+# --- Fragmentos precompilados para secciones de texto estático ---
+# Una sección cuyo contenido solo depende del JSON se "graba" una vez contra
+# GrabadorFragmento: todo su texto queda en un único bloque markdown/HTML ya
+# saneado (el texto del JSON nunca entra como HTML) y se guarda por hash del
+# informe. Volver a visitar la sección es un acierto de caché y una sola llamada.
+FRAGMENTOS_CACHE_MAX_ENTRADAS = int(os.environ.get("DPE_FRAGMENTOS_CACHE_MAX_ENTRADAS", "256"))
+FRAGMENTOS_CACHE_MAX_MB = int(os.environ.get("DPE_FRAGMENTOS_CACHE_MAX_MB", "32"))
+
+fragmentos_cache = CacheLRU(max_entradas=FRAGMENTOS_CACHE_MAX_ENTRADAS, max_bytes=FRAGMENTOS_CACHE_MAX_MB * 1024 * 1024)
+
+# (fondo, texto) aproximados de st.info / st.success / st.warning / st.error.
+_ESTILOS_AVISO = {
+    "info": ("rgba(28, 131, 225, 0.1)", "rgb(0, 66, 128)"),
+    "success": ("rgba(33, 195, 84, 0.1)", "rgb(23, 114, 51)"),
+    "warning": ("rgba(255, 227, 18, 0.1)", "rgb(146, 108, 5)"),
+    "error": ("rgba(255, 43, 43, 0.09)", "rgb(125, 53, 59)"),
+}
+
+
+class FragmentoNoCompilable(Exception):
+    """La sección usa un elemento que no se puede expresar como texto (columnas, gráficos...)."""
+
+
+def escapar_texto(texto):
+    # Neutraliza etiquetas HTML sin tocar la sintaxis markdown (**, _, #, •...).
+    return str(texto).replace("<", "&lt;")
+
+
+def _en_linea_a_html(texto):
+    # Dentro de una etiqueta HTML el markdown no se interpreta: negritas a mano.
+    return re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", escapar_texto(texto))
+
+
+class GrabadorFragmento:
+    """Sustituto de `st` que acumula texto saneado y registra los elementos que no son texto."""
+
+    def __init__(self, session_state=None):
+        self.session_state = session_state
+        self._operaciones = []
+        self._texto = []
+
+    def _cerrar_texto(self):
+        if self._texto:
+            self._operaciones.append(("markdown", ("\n\n".join(self._texto),), {"unsafe_allow_html": True}))
+            self._texto = []
+
+    def header(self, texto):
+        self._texto.append(f"## {escapar_texto(texto)}")
+
+    def subheader(self, texto):
+        self._texto.append(f"### {escapar_texto(texto)}")
+
+    def markdown(self, texto, unsafe_allow_html=False, **kwargs):
+        if kwargs:
+            raise FragmentoNoCompilable(f"markdown({', '.join(kwargs)})")
+        # El HTML propio de las funciones render_* ya escapa lo que interpola del JSON.
+        texto = limpiar_texto(texto)
+        self._texto.append(texto if unsafe_allow_html else escapar_texto(texto))
+
+    def write(self, *args, **kwargs):
+        if len(args) != 1 or not isinstance(args[0], str) or kwargs:
+            raise FragmentoNoCompilable("write")
+        self.markdown(args[0])
+
+    def caption(self, texto):
+        self._texto.append(f"<p style='font-size: 0.875rem; color: {COLOR_TEXTO_SUTIL_CSS};'>{_en_linea_a_html(texto)}</p>")
+
+    def _aviso(self, tipo, texto):
+        fondo, color = _ESTILOS_AVISO[tipo]
+        self._texto.append(f"<div style='background-color: {fondo}; color: {color}; padding: 1rem; "
+                           f"border-radius: 0.5rem; margin-bottom: 1rem;'>{_en_linea_a_html(texto)}</div>")
+
+    def info(self, texto):
+        self._aviso("info", texto)
+
+    def success(self, texto):
+        self._aviso("success", texto)
+
+    def warning(self, texto):
+        self._aviso("warning", texto)
+
+    def error(self, texto):
+        self._aviso("error", texto)
+
+    def image(self, *args, **kwargs):
+        self._cerrar_texto()
+        self._operaciones.append(("image", args, kwargs))
+
+    def container(self):
+        # Solo agrupa visualmente; en el fragmento su contenido va en línea.
+        return contextlib.nullcontext()
+
+    def __getattr__(self, nombre):
+        if nombre.startswith("_"):
+            raise AttributeError(nombre)
+        raise FragmentoNoCompilable(nombre)
+
+    def operaciones(self):
+        self._cerrar_texto()
+        return tuple(self._operaciones)
+
+
+def compilar_fragmento(render, *args, session_state=None):
+    """Ejecuta `render(*args, grabador)` y devuelve sus operaciones; lanza FragmentoNoCompilable."""
+    grabador = GrabadorFragmento(session_state)
+    render(*args, grabador)
+    return grabador.operaciones()
+
+
+def emitir_fragmento(ui, operaciones):
+    for nombre, args, kwargs in operaciones:
+        getattr(ui, nombre)(*args, **kwargs)
+
+
+def tamano_fragmento(operaciones):
+    return sum(len(str(arg)) for _, args, _ in operaciones for arg in args)